@@ -0,0 +1,267 @@
+"""Vectorised NumPy view of game boards for bulk analysis.
+
+NumPy is optional: the game never imports this module, and HAVE_NUMPY is
+False when NumPy is missing. A board is stored as an int8 grid of food
+codes (index into the game's food list, EMPTY for no food) plus boolean
+planes for mice and bones. The analysis functions take a single board or
+a stack of boards with shape (boards, rows, cols), so balancing scripts can
+evaluate millions of generated boards without per-cell Python loops:
+
+    codes = random_boards(100000, grid_size=7, food_count=3)
+    labels = component_labels(codes)
+    best = largest_component_near(codes, labels, kitty_pos=(3, 3))
+
+    arrays = BoardArrays.from_game(game)
+    arrays.expected_chain_result(length=6)
+"""
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:
+    np = None
+    HAVE_NUMPY = False
+
+EMPTY = -1  # Food code of a cell without food (the kitty's cell, mice, bones)
+
+MOUSE_POINTS = 4
+BONE_POINTS = -10
+
+# The eight neighbour offsets, in the same order everywhere
+NEIGHBOURS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def require_numpy():
+    if not HAVE_NUMPY:
+        raise ImportError("board_analysis needs NumPy (pip install numpy)")
+
+
+def as_stack(array):
+    # Analysis works on (boards, rows, cols); a single board becomes a stack of one
+    array = np.asarray(array)
+    return array[np.newaxis] if array.ndim == 2 else array
+
+
+class BoardArrays:
+    # One board as arrays: food codes, mouse and bone planes, kitty position
+    def __init__(self, codes, mice, bones, kitty_pos, food_names):
+        require_numpy()
+        self.codes = np.asarray(codes, dtype=np.int8)
+        self.mice = np.asarray(mice, dtype=bool)
+        self.bones = np.asarray(bones, dtype=bool)
+        self.kitty_pos = tuple(kitty_pos)
+        self.food_names = list(food_names)
+
+    @classmethod
+    def from_board(cls, board, food_names, mice=(), bones=(), kitty_pos=None):
+        require_numpy()
+        size = len(board)
+        code_of = {name: code for code, name in enumerate(food_names)}
+        codes = np.array([[EMPTY if food is None else code_of[food] for food in row] for row in board],
+                         dtype=np.int8)
+        mice_plane = np.zeros((size, size), dtype=bool)
+        bones_plane = np.zeros((size, size), dtype=bool)
+        for row, col in mice:
+            mice_plane[row, col] = True
+        for row, col in bones:
+            bones_plane[row, col] = True
+        if kitty_pos is None:
+            kitty_pos = (size // 2, size // 2)
+        return cls(codes, mice_plane, bones_plane, kitty_pos, food_names)
+
+    @classmethod
+    def from_game(cls, game):
+        return cls.from_board(game.board, game.foods, game.mice, game.bones, game.kitty_pos)
+
+    def to_board(self):
+        # Back to Game.board form: a list of rows of food names (None for empty)
+        return [[None if code == EMPTY else self.food_names[code] for code in row]
+                for row in self.codes.tolist()]
+
+    def hazard_cells(self):
+        # Mouse and bone positions as sets of (row, col), as Game stores them
+        mice = {tuple(cell) for cell in np.argwhere(self.mice).tolist()}
+        bones = {tuple(cell) for cell in np.argwhere(self.bones).tolist()}
+        return mice, bones
+
+    def component_labels(self):
+        return component_labels(self.codes)[0]
+
+    def component_sizes(self):
+        return component_sizes(component_labels(self.codes))[0]
+
+    def legal_start_count(self):
+        return int(legal_start_counts(self.codes, self.kitty_pos, self.mice | self.bones)[0])
+
+    def expected_chain_result(self, length, samples=10000, rng=None):
+        return expected_chain_result(self.codes, self.mice, self.bones, self.kitty_pos,
+                                     length, samples, rng)
+
+
+def random_boards(count, grid_size, food_count, kitty_pos=None, rng=None):
+    # Uniformly random food codes, with the kitty's cell left empty
+    require_numpy()
+    rng = rng if rng is not None else np.random.default_rng()
+    boards = rng.integers(0, food_count, size=(count, grid_size, grid_size), dtype=np.int8)
+    kitty_row, kitty_col = kitty_pos if kitty_pos is not None else (grid_size // 2, grid_size // 2)
+    boards[:, kitty_row, kitty_col] = EMPTY
+    return boards
+
+
+def shifted(array, row_offset, col_offset, fill):
+    # array[..., r + row_offset, c + col_offset], with fill outside the board
+    result = np.full_like(array, fill)
+    rows, cols = array.shape[-2:]
+    target_rows = slice(max(-row_offset, 0), rows - max(row_offset, 0))
+    target_cols = slice(max(-col_offset, 0), cols - max(col_offset, 0))
+    source_rows = slice(max(row_offset, 0), rows - max(-row_offset, 0))
+    source_cols = slice(max(col_offset, 0), cols - max(-col_offset, 0))
+    result[..., target_rows, target_cols] = array[..., source_rows, source_cols]
+    return result
+
+
+def component_labels(codes):
+    # 8-connected components of equal food codes. Every cell starts with its
+    # own flat index as label and repeatedly takes the smallest label of any
+    # same-food neighbour until nothing changes; empty cells get -1
+    require_numpy()
+    codes = as_stack(codes)
+    boards, rows, cols = codes.shape
+    sentinel = rows * cols
+    dtype = np.int16 if 2 * sentinel < np.iinfo(np.int16).max else np.int32
+    food = codes != EMPTY
+    labels = np.broadcast_to(np.arange(sentinel, dtype=dtype).reshape(rows, cols), codes.shape).copy()
+    labels[~food] = sentinel
+
+    # Which neighbours share the cell's food never changes: work out once a
+    # penalty per direction that pushes other neighbours' labels past the sentinel
+    penalties = []
+    for row_offset, col_offset in NEIGHBOURS:
+        same = food & (shifted(codes, row_offset, col_offset, EMPTY) == codes)
+        penalties.append(np.where(same, 0, sentinel).astype(dtype))
+
+    # Only boards whose labels still change are processed again
+    active = np.arange(boards)
+    while len(active):
+        current = labels[active]
+        # Neighbour labels are slices of one padded copy, not new arrays
+        padded = np.pad(current, ((0, 0), (1, 1), (1, 1)), constant_values=sentinel)
+        updated = current.copy()
+        candidate = np.empty_like(current)
+        for (row_offset, col_offset), penalty in zip(NEIGHBOURS, penalties):
+            neighbour = padded[:, 1 + row_offset:1 + row_offset + rows, 1 + col_offset:1 + col_offset + cols]
+            np.add(neighbour, penalty[active], out=candidate)
+            np.minimum(updated, candidate, out=updated)
+        # Pointer jumping: a label is a cell index, and that cell's label is
+        # never larger, so following it shortens long snakes considerably
+        flat = updated.reshape(len(active), -1)
+        jumped = np.take_along_axis(flat, np.minimum(flat, sentinel - 1), axis=1)
+        np.minimum(flat, np.where(flat < sentinel, jumped, sentinel), out=flat)
+        changed = (updated != current).any(axis=(1, 2))
+        labels[active] = updated
+        active = active[changed]
+    labels = labels.astype(np.int32)
+    labels[~food] = -1
+    return labels
+
+
+def component_sizes(labels):
+    # Size of each cell's component (0 for empty cells), per board
+    require_numpy()
+    labels = as_stack(labels)
+    boards, rows, cols = labels.shape
+    flat = labels.reshape(boards, -1)
+    offsets = np.arange(boards)[:, np.newaxis] * (rows * cols)
+    valid = flat >= 0
+    counts = np.bincount((flat + offsets)[valid], minlength=boards * rows * cols)
+    sizes = np.where(valid, counts[np.where(valid, flat + offsets, 0)], 0)
+    return sizes.reshape(labels.shape)
+
+
+def kitty_neighbourhood(shape, kitty_pos):
+    # Boolean plane of the in-bounds cells around the kitty
+    rows, cols = shape[-2:]
+    kitty_row, kitty_col = kitty_pos
+    plane = np.zeros((rows, cols), dtype=bool)
+    plane[max(kitty_row - 1, 0):kitty_row + 2, max(kitty_col - 1, 0):kitty_col + 2] = True
+    plane[kitty_row, kitty_col] = False
+    return plane
+
+
+def legal_start_counts(codes, kitty_pos, hazards=None):
+    # Cells next to the kitty that can start a chain (food, a mouse or a bone)
+    require_numpy()
+    codes = as_stack(codes)
+    startable = codes != EMPTY
+    if hazards is not None:
+        startable = startable | as_stack(hazards)
+    return (startable & kitty_neighbourhood(codes.shape, kitty_pos)).sum(axis=(1, 2))
+
+
+def largest_component_near(codes, labels, kitty_pos):
+    # Largest same-food component touching the kitty, per board. Chains are
+    # paths, so this is an upper bound on the longest chain from the kitty
+    require_numpy()
+    sizes = component_sizes(labels)
+    return np.where(kitty_neighbourhood(sizes.shape, kitty_pos), sizes, 0).max(axis=(1, 2))
+
+
+def expected_chain_result(codes, mice, bones, kitty_pos, length, samples=10000, rng=None):
+    # Monte Carlo estimate of calculate_chain_result for random chains of up
+    # to length cells: every sample walks from the kitty, picking uniformly
+    # among the legal next cells, and stops early when none is left
+    require_numpy()
+    rng = rng if rng is not None else np.random.default_rng()
+    codes = np.asarray(codes)
+    hazards = np.asarray(mice) | np.asarray(bones)
+    rows, cols = codes.shape
+    sample_index = np.arange(samples)
+
+    position = np.tile(np.array(kitty_pos), (samples, 1))
+    visited = np.zeros((samples, rows, cols), dtype=bool)
+    visited[:, kitty_pos[0], kitty_pos[1]] = True
+    first_food = np.full(samples, EMPTY, dtype=np.int16)
+    chain_length = np.zeros(samples, dtype=np.int32)
+    alive = np.ones(samples, dtype=bool)
+    offsets = np.array(NEIGHBOURS)
+
+    for step in range(length):
+        # Candidate cells (samples, 8) and which of them may extend the chain
+        candidate_rows = position[:, 0:1] + offsets[:, 0]
+        candidate_cols = position[:, 1:2] + offsets[:, 1]
+        inside = (candidate_rows >= 0) & (candidate_rows < rows) & (candidate_cols >= 0) & (candidate_cols < cols)
+        safe_rows = np.clip(candidate_rows, 0, rows - 1)
+        safe_cols = np.clip(candidate_cols, 0, cols - 1)
+        candidate_food = codes[safe_rows, safe_cols]
+        legal = inside & ~visited[sample_index[:, np.newaxis], safe_rows, safe_cols] & alive[:, np.newaxis]
+        if step > 0:
+            # After the first cell, food must match the chain's first food
+            matches = ((first_food[:, np.newaxis] == EMPTY) | (candidate_food == EMPTY)
+                       | (candidate_food == first_food[:, np.newaxis]) | hazards[safe_rows, safe_cols])
+            legal &= matches
+
+        # Pick a random legal candidate per sample
+        keys = np.where(legal, rng.random(legal.shape), -1.0)
+        choice = keys.argmax(axis=1)
+        moved = legal[sample_index, choice]
+        alive &= moved
+        new_rows = safe_rows[sample_index, choice]
+        new_cols = safe_cols[sample_index, choice]
+        position[moved, 0] = new_rows[moved]
+        position[moved, 1] = new_cols[moved]
+        visited[sample_index[moved], new_rows[moved], new_cols[moved]] = True
+        chain_length += moved
+
+        new_food = codes[new_rows, new_cols]
+        takes_food = moved & (first_food == EMPTY) & (new_food != EMPTY) & ~hazards[new_rows, new_cols]
+        first_food[takes_food] = new_food[takes_food]
+        if not alive.any():
+            break
+
+    # Score every chain the way ChainSelection.result does
+    visited[:, kitty_pos[0], kitty_pos[1]] = False
+    mice_caught = (visited & np.asarray(mice)).sum(axis=(1, 2))
+    bones_caught = (visited & np.asarray(bones)).sum(axis=(1, 2))
+    food_cells = chain_length - mice_caught - bones_caught
+    results = food_cells + mice_caught * MOUSE_POINTS + bones_caught * BONE_POINTS
+    results = np.where(chain_length >= 2, results, 0)
+    return float(results.mean())
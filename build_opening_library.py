@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Build the library of pre-analysed classic opening boards.
+
+Draws random 7x7 boards with three foods and the kitty in the centre,
+finds each board's best chain for the first move (the longest path of one
+food starting next to the kitty) with a depth-first search, and sorts the
+boards into the difficulty tiers of main.OPENING_TIERS. The result is
+written to assets/opening_boards.bin, where reset_game picks a board in
+O(1) for the chosen difficulty.
+
+    python build_opening_library.py                  # 2048 boards per tier
+    python build_opening_library.py --boards 512 --seed 7
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import main
+
+DEFAULT_BOARDS = 2048      # Boards per tier
+SEARCH_BUDGET = 200000     # Search steps per board before settling for the best chain so far
+
+
+def best_chain(cells, grid_size, kitty_pos, budget=SEARCH_BUDGET):
+    # Longest same-food path starting next to the kitty, by depth-first
+    # search. A branch is cut when the path plus every cell still reachable
+    # from its end can't beat the best path found so far
+    neighbours = main.get_grid_neighbours(grid_size)
+    kitty_index = kitty_pos[0] * grid_size + kitty_pos[1]
+    best = 0
+    steps = 0
+    for start in neighbours[kitty_index]:
+        food = cells[start]
+        if food is None or reachable(cells, neighbours, start, {kitty_index}) <= best:
+            continue
+
+        # Iterative DFS: stack of iterators over each path cell's neighbours
+        path = [start]
+        on_path = {start, kitty_index}
+        stack = [iter(neighbours[start])]
+        while stack and steps < budget:
+            steps += 1
+            best = max(best, len(path))
+            for neighbour in stack[-1]:
+                if (neighbour not in on_path and cells[neighbour] == food
+                        and len(path) + reachable(cells, neighbours, neighbour, on_path) > best):
+                    path.append(neighbour)
+                    on_path.add(neighbour)
+                    stack.append(iter(neighbours[neighbour]))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(path.pop())
+    return best
+
+
+def reachable(cells, neighbours, start, blocked):
+    # Cells of start's food reachable from start without crossing blocked
+    food = cells[start]
+    seen = set(blocked)
+    seen.add(start)
+    group = [start]
+    for index in group:
+        for neighbour in neighbours[index]:
+            if neighbour not in seen and cells[neighbour] == food:
+                seen.add(neighbour)
+                group.append(neighbour)
+    return len(group)
+
+
+def build(boards_per_tier, seed):
+    rules = main.get_game_rules("classic")
+    grid_size = rules["grid_size"]
+    food_count = rules["food_items"]
+    kitty_pos = (grid_size // 2, grid_size // 2)
+    kitty_index = kitty_pos[0] * grid_size + kitty_pos[1]
+    rng = random.Random(seed)
+
+    tiers = [(name, min_chain, max_chain, []) for name, min_chain, max_chain in main.OPENING_TIERS]
+    seen = set()
+    drawn = 0
+    while any(len(boards) < boards_per_tier for name, min_chain, max_chain, boards in tiers):
+        codes = [rng.randrange(food_count) for _ in range(grid_size * grid_size)]
+        codes[kitty_index] = main.OPENING_EMPTY_CODE
+        drawn += 1
+        key = tuple(codes)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        cells = [None if code == main.OPENING_EMPTY_CODE else code for code in codes]
+        chain = best_chain(cells, grid_size, kitty_pos)
+        for name, min_chain, max_chain, boards in tiers:
+            if min_chain <= chain <= max_chain and len(boards) < boards_per_tier:
+                boards.append((chain, codes))
+    return tiers, grid_size, drawn
+
+
+def main_build():
+    parser = argparse.ArgumentParser(description="Build the opening board library")
+    parser.add_argument("--boards", type=int, default=DEFAULT_BOARDS, help="boards per difficulty tier")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=main.OPENING_LIBRARY_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tiers, grid_size, drawn = build(args.boards, args.seed)
+    main.save_opening_library(tiers, grid_size, args.output)
+
+    print(f"Analysed {drawn} boards in {time.perf_counter() - start:.1f}s")
+    for name, min_chain, max_chain, boards in tiers:
+        average = sum(chain for chain, codes in boards) / len(boards)
+        print(f"{name:<8} best chain {min_chain}-{max_chain}: {len(boards)} boards, average {average:.1f}")
+    print(f"Written to {args.output} ({os.path.getsize(args.output)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_build())
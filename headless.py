@@ -0,0 +1,177 @@
+"""Headless SDL harness that drives real game frames.
+
+Selects the SDL dummy video/audio drivers before pygame starts, injects
+synthetic events, advances frames one step() at a time on a simulated
+game clock and captures the rendered surfaces, so end-to-end and performance
+tests run in CI without a display:
+
+    with HeadlessHarness(data_dir=tmp) as harness:
+        game = harness.create_game(seed=1)
+        harness.click_cell(2, 3)
+        harness.key(pygame.K_SPACE)
+        harness.advance(game, frames=120)
+        harness.save_frame("frame.png")
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import atexit
+import shutil
+import tempfile
+
+# main loads the settings and fills its sound cache on import, before any
+# harness can redirect files, so point its data directory somewhere temporary
+if "KSS_DATA_DIR" not in os.environ:
+    os.environ["KSS_DATA_DIR"] = tempfile.mkdtemp(prefix="kss-headless-")
+    atexit.register(shutil.rmtree, os.environ["KSS_DATA_DIR"], ignore_errors=True)
+
+import time
+import random
+from unittest.mock import patch
+
+import pygame
+
+import main
+
+FRAME_TIME = 1 / 60  # Simulated seconds per frame
+
+# Files the game reads and writes, redirected when the harness has a data directory
+DATA_FILES = ("SETTINGS_FILE", "HISTORY_FILE", "HISTORY_SUMMARY_FILE", "LEGACY_HISTORY_FILE",
+              "PROFILE_TRACE_FILE", "SOUND_CACHE_DIR")
+
+
+class HeadlessHarness:
+    def __init__(self, frame_time=FRAME_TIME, data_dir=None, keep_frames=False, time_scale=1.0):
+        self.frame_time = frame_time
+        self.time_scale = time_scale  # Game seconds per simulated second (fast-forward)
+        self.now = 0.0                # Simulated seconds, the source of every game clock
+        self.pointer = (0, 0)
+        self.game = None       # Last game created, used to locate cells
+        self.keep_frames = keep_frames
+        self.frames = []       # Captured surfaces, one per step (if keep_frames)
+        self.step_times = []   # Real seconds spent in each step
+        self.patches = [
+            patch("pygame.mouse.get_pos", self.get_pointer)
+        ]
+        if data_dir:
+            for name in DATA_FILES:
+                path = os.path.join(data_dir, os.path.basename(getattr(main, name)))
+                self.patches.append(patch.object(main, name, path))
+            # The shared sound manager was built with the import-time cache directory
+            cache_dir = os.path.join(data_dir, os.path.basename(main.SOUND_CACHE_DIR))
+            self.patches.append(patch.object(main.SOUNDS, "cache_dir", cache_dir))
+
+    def __enter__(self):
+        for active_patch in self.patches:
+            active_patch.start()
+        pygame.event.clear()
+        return self
+
+    def __exit__(self, *exc_info):
+        for active_patch in reversed(self.patches):
+            active_patch.stop()
+
+    @property
+    def screen(self):
+        screen = pygame.display.get_surface()
+        if screen is None:
+            screen = pygame.display.set_mode((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+        return screen
+
+    # Screens
+
+    def create_game(self, seed=None, variant="classic"):
+        if seed is not None:
+            random.seed(seed)
+        clock = main.GameClock(source=self.get_time, time_scale=self.time_scale)
+        self.game = main.Game(main.get_game_rules(variant), clock)
+        return self.game
+
+    def create_menu(self):
+        return main.MainMenu(self.screen)
+
+    def create_records(self):
+        return main.Records(self.screen)
+
+    def create_settings(self, main_menu=None):
+        return main.Settings(self.screen, main_menu)
+
+    def get_time(self):
+        return self.now
+
+    # Input
+
+    def get_pointer(self):
+        return self.pointer
+
+    def post(self, event_type, **attributes):
+        pygame.event.post(pygame.event.Event(event_type, attributes))
+
+    def move(self, pos):
+        self.pointer = pos
+        self.post(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+    # pygame.mouse.get_pos() reports the last injected position, so step a
+    # frame between clicks for screens that read the pointer instead of event.pos
+    def click(self, pos, button=1):
+        self.press(pos, button)
+        self.release(pos, button)
+
+    def press(self, pos, button=1):
+        self.pointer = pos
+        self.post(pygame.MOUSEBUTTONDOWN, pos=pos, button=button)
+
+    def release(self, pos, button=1):
+        self.pointer = pos
+        self.post(pygame.MOUSEBUTTONUP, pos=pos, button=button)
+
+    def drag(self, pos):
+        # Move the pointer with the left button held down
+        rel = (pos[0] - self.pointer[0], pos[1] - self.pointer[1])
+        self.pointer = pos
+        self.post(pygame.MOUSEMOTION, pos=pos, rel=rel, buttons=(1, 0, 0))
+
+    def click_cell(self, row, col):
+        self.click(self.cell_center(row, col))
+
+    def cell_center(self, row, col):
+        return self.game.cell_center(row, col)
+
+    def key(self, key):
+        self.post(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0)
+        self.post(pygame.KEYUP, key=key, mod=0, unicode="", scancode=0)
+
+    # Frames
+
+    def step(self, screen):
+        # Run one frame of the screen, then move the simulated clock on
+        start = time.perf_counter()
+        screen.step()
+        self.step_times.append(time.perf_counter() - start)
+        self.now += self.frame_time
+        if self.keep_frames:
+            self.frames.append(self.capture())
+        return screen.running
+
+    def advance(self, screen, frames=1):
+        # Step up to the given number of frames; stops early if the screen exits
+        for frame in range(frames):
+            if not self.step(screen):
+                return frame + 1
+        return frames
+
+    def run_until(self, screen, condition, max_frames=600):
+        # Step until condition() is true; returns the number of frames it took
+        for frame in range(max_frames):
+            if condition():
+                return frame
+            self.step(screen)
+        raise TimeoutError(f"Condition not met after {max_frames} frames")
+
+    def capture(self):
+        return self.screen.copy()
+
+    def save_frame(self, path):
+        pygame.image.save(self.screen, path)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Binary columnar export of the game history, for analysis tools.
+
+The game never imports this module, and importing it has no side effects.
+The JSON history is converted into one packed column per field, and
+HistoryColumns maps the result read-only, so scripts can aggregate a long
+history without building a dict per game:
+
+    python history_columns.py                       # game_history.json -> game_history.bin
+    python history_columns.py --history old.json --output old.bin
+
+    with HistoryColumns("game_history.bin") as columns:
+        best = max(columns.score)
+"""
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+import argparse
+from datetime import datetime
+
+HISTORY_FILE = "game_history.json"  # The game's JSON history (main.HISTORY_FILE)
+COLUMNS_FILE = "game_history.bin"   # Default export
+
+# Binary columnar history: a header followed by one packed little-endian column
+# per field. Columns are ordered widest first so each one stays aligned.
+HISTORY_COLUMNS_MAGIC = b"KSSH"
+HISTORY_COLUMNS_VERSION = 1
+HISTORY_COLUMNS_HEADER = struct.Struct("<4sHxxQ")  # magic, version, record count
+HISTORY_COLUMNS = (
+    ("timestamp", "d"),
+    ("time", "d"),
+    ("score", "i"),
+    ("moves", "i"),
+    ("stars", "b")
+)
+
+
+# Write the history as a binary columnar file. Errors are raised once the
+# partial file is removed, so an earlier export at path is left intact
+def save_history_columns(history, path=COLUMNS_FILE):
+    temp_file = path + ".tmp"
+    try:
+        with open(temp_file, "wb") as file:
+            file.write(HISTORY_COLUMNS_HEADER.pack(HISTORY_COLUMNS_MAGIC, HISTORY_COLUMNS_VERSION, len(history)))
+            for name, typecode in HISTORY_COLUMNS:
+                convert = float if typecode == "d" else int
+                column = array.array(typecode, (convert(game[name]) for game in history))
+                if sys.byteorder == "big":
+                    column.byteswap()
+                column.tofile(file)
+        os.replace(temp_file, path)
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
+
+
+# Read-only, memory-mapped view of a binary columnar history file.
+# Each column (e.g. columns.score) is an array-like of all games, so
+# aggregates can scan the history without building a dict per game.
+class HistoryColumns:
+    def __init__(self, path=COLUMNS_FILE):
+        self.file = open(path, "rb")
+        self.views = []
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.count = HISTORY_COLUMNS_HEADER.unpack_from(self.map)
+            if magic != HISTORY_COLUMNS_MAGIC or version != HISTORY_COLUMNS_VERSION:
+                raise ValueError(f"{path} is not a version {HISTORY_COLUMNS_VERSION} history file")
+            
+            offset = HISTORY_COLUMNS_HEADER.size
+            for name, typecode in HISTORY_COLUMNS:
+                size = array.array(typecode).itemsize * self.count
+                if offset + size > len(self.map):
+                    raise ValueError(f"{path} is truncated")
+                view = memoryview(self.map)[offset:offset + size]
+                self.views.append(view)
+                if sys.byteorder == "little":
+                    column = view.cast(typecode)  # Zero-copy
+                    self.views.append(column)
+                else:
+                    column = array.array(typecode, view.tobytes())
+                    column.byteswap()
+                setattr(self, name, column)
+                offset += size
+        except Exception:
+            self.close()
+            raise
+    
+    def __len__(self):
+        return self.count
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def records(self):
+        # Build game dicts on demand (for tools that need the JSON shape)
+        for i in range(self.count):
+            timestamp = self.timestamp[i]
+            yield {
+                "timestamp": timestamp,
+                "date": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+                "score": self.score[i],
+                "moves": self.moves[i],
+                "time": self.time[i],
+                "stars": self.stars[i]
+            }
+    
+    def close(self):
+        # Views must be released before the map can be closed
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+def main_export():
+    parser = argparse.ArgumentParser(description="Export the game history as binary columns")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSON history to read")
+    parser.add_argument("--output", default=COLUMNS_FILE)
+    args = parser.parse_args()
+
+    try:
+        with open(args.history, "r") as file:
+            history = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error reading {args.history}: {e}")
+        return 1
+    try:
+        save_history_columns(history, args.output)
+    except (OSError, KeyError, TypeError, ValueError, OverflowError) as e:
+        print(f"Error saving history columns to {args.output}: {e}")
+        return 1
+
+    with HistoryColumns(args.output) as columns:
+        print(f"Exported {len(columns)} games to {args.output} ({os.path.getsize(args.output)} bytes)")
+        if len(columns):
+            print(f"Best score {max(columns.score)}, average {sum(columns.score) / len(columns):.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_export())
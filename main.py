@@ -1,15 +1,59 @@
 import pygame
+import pygame.gfxdraw
 import sys
 import random
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import math
 import json
+import re
+import threading
+import asyncio
+import concurrent.futures
+import struct
+import itertools
+from collections import deque
+from contextlib import contextmanager
+
+# Startup timings: (step, start, duration) on the system-wide monotonic clock,
+# so profile_startup.py can line them up with the time it spawned the process
+STARTUP_STEPS = []
+# When set, the timings are written to this file after the first menu frame and the game exits
+STARTUP_PROFILE_FILE = os.environ.get("KSS_STARTUP_PROFILE")
+
+# Time one module-level startup step
+@contextmanager
+def startup_step(name):
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        STARTUP_STEPS.append((name, start, time.monotonic() - start))
+
+# Write the startup timings and exit (only when startup profiling is on)
+def finish_startup_profile():
+    global STARTUP_PROFILE_FILE
+    if not STARTUP_PROFILE_FILE:
+        return
+    report = {
+        "steps": [{"step": name, "start": start, "duration": duration} for name, start, duration in STARTUP_STEPS],
+        "first_frame": time.monotonic()
+    }
+    try:
+        with open(STARTUP_PROFILE_FILE, "w") as file:
+            json.dump(report, file, indent=4)
+    except Exception as e:
+        print(f"Error saving startup profile: {e}")
+    STARTUP_PROFILE_FILE = None
+    pygame.quit()
+    sys.exit()
 
 # Initialize pygame
-pygame.init()
-pygame.mixer.init()  # Initialize the mixer module for sound playback
+with startup_step("pygame.init"):
+    pygame.init()
+with startup_step("mixer.init"):
+    pygame.mixer.init()  # Initialize the mixer module for sound playback
 
 # Constants
 GRID_SIZE = 7
@@ -29,14 +73,233 @@ LIGHT_GREEN = (100, 255, 100)
 GOLD = (255, 215, 0)
 LIGHT_BLUE = (100, 100, 255)
 DARK_BLUE = (50, 50, 200)
+LEGAL_TARGET = (180, 200, 235)  # Subtle tint for cells that can extend the chain
 ORANGE = (255, 165, 0)
 
 # Game parameters
 MAX_MOVES = 10
 FOOD_GOAL = 75
 FOOD_ITEMS_PER_GAME = 3  # Number of food types to use in each game
-SETTINGS_FILE = "game_settings.json"  # File to store settings
-HISTORY_FILE = "game_history.json"   # File to store game history
+# Directory of the files the game writes (default: the working directory);
+# tools that run the game in a subprocess point it somewhere temporary
+DATA_DIR = os.environ.get("KSS_DATA_DIR", "")
+SETTINGS_FILE = os.path.join(DATA_DIR, "game_settings.json")  # File to store settings
+HISTORY_FILE = os.path.join(DATA_DIR, "game_history.json")   # File to store game history
+HISTORY_SUMMARY_FILE = os.path.join(DATA_DIR, "game_history_daily.json")  # Per-day summaries of compacted games
+LEGACY_HISTORY_FILE = os.path.join(DATA_DIR, "game_history.txt")  # Plain-text history written by old versions
+PROFILE_TRACE_FILE = os.path.join(DATA_DIR, "frame_trace.json")  # Trace written by the frame profiler
+HISTORY_COMPACT_SLACK = 50  # Extra raw records allowed before compaction runs again
+
+# Frames per second of every screen
+FRAME_RATE = 60
+
+# Game state advances in fixed steps, independent of the frame rate
+UPDATE_STEP = 1 / 120
+MAX_FRAME_TIME = 0.25  # Longer frames are clamped so a hitch can't snowball
+
+# Key that toggles the performance overlay on every screen
+PERF_OVERLAY_KEY = pygame.K_F3
+# Seconds between refreshes of the overlay's text
+PERF_OVERLAY_REFRESH = 0.25
+
+# Rules for each game variant; "classic" matches the constants above. Game
+# records keep their variant and goal, and stars scale with the goal
+GAME_VARIANTS = {
+    "classic": {
+        "grid_size": GRID_SIZE,
+        "max_moves": MAX_MOVES,
+        "food_goal": FOOD_GOAL,
+        "food_items": FOOD_ITEMS_PER_GAME,
+        "hazard_interval": 2,   # Moves between mouse and bone spawns
+        "max_mice": 3,
+        "bones_per_spawn": 2,
+        "chain_range": (10, 22),   # Accepted size of the best food group next to the kitty
+        # Share of random boards inside chain_range, by where the kitty is:
+        # the worst position of each kind, measured over 3000 boards, less 0.03
+        "chain_acceptance": {"corner": 0.52, "edge": 0.65, "interior": 0.73}
+    },
+    "large": {
+        "grid_size": 15,
+        "max_moves": 20,
+        "food_goal": 200,
+        "food_items": 4,
+        "hazard_interval": 2,
+        "max_mice": 8,
+        "bones_per_spawn": 4,
+        "chain_range": (10, 35),
+        "chain_acceptance": {"corner": 0.20, "edge": 0.28, "interior": 0.39}
+    },
+    "huge": {
+        "grid_size": 25,
+        "max_moves": 30,
+        "food_goal": 360,
+        "food_items": 5,
+        "hazard_interval": 2,
+        "max_mice": 16,
+        "bones_per_spawn": 8,
+        "chain_range": (8, 30),
+        "chain_acceptance": {"corner": 0.11, "edge": 0.19, "interior": 0.27}
+    }
+}
+
+def get_game_rules(variant=None):
+    # Rules for the given variant (or the one chosen in the settings), with its name
+    variant = variant or SETTINGS.get("game_variant", "classic")
+    if variant not in GAME_VARIANTS:
+        variant = "classic"
+    rules = dict(GAME_VARIANTS[variant])
+    rules["variant"] = variant
+    return rules
+
+# Chance of giving up on the board quality check and using the last board
+BOARD_QUALITY_FAILURE_ODDS = 1e-6
+
+# Neighbour lists of flat cell indices, per grid size
+GRID_NEIGHBOURS = {}
+
+def get_grid_neighbours(grid_size):
+    if grid_size not in GRID_NEIGHBOURS:
+        GRID_NEIGHBOURS[grid_size] = [
+            [(row + row_offset) * grid_size + col + col_offset
+             for row_offset in (-1, 0, 1) for col_offset in (-1, 0, 1)
+             if (row_offset or col_offset)
+             and 0 <= row + row_offset < grid_size and 0 <= col + col_offset < grid_size]
+            for row in range(grid_size) for col in range(grid_size)
+        ]
+    return GRID_NEIGHBOURS[grid_size]
+
+def chain_potential(cells, grid_size, kitty_pos, limit=None):
+    # Size of the largest same-food group touching the kitty, from a flat
+    # list of cells. Chains are paths through such a group, so this bounds
+    # the longest chain available on the first move. Stops early once a
+    # group is bigger than limit
+    neighbours = get_grid_neighbours(grid_size)
+    kitty_index = kitty_pos[0] * grid_size + kitty_pos[1]
+    seen = {kitty_index}
+    best = 0
+    for start in neighbours[kitty_index]:
+        food = cells[start]
+        if start in seen or food is None:
+            continue
+        seen.add(start)
+        group = [start]
+        for index in group:
+            for neighbour in neighbours[index]:
+                if neighbour not in seen and cells[neighbour] == food:
+                    seen.add(neighbour)
+                    group.append(neighbour)
+            if limit is not None and len(group) > limit:
+                return len(group)
+        best = max(best, len(group))
+    return best
+
+def kitty_placement(kitty_pos, grid_size):
+    # "corner", "edge" or "interior": how much room the kitty's groups have to grow
+    on_edge = sum(coordinate in (0, grid_size - 1) for coordinate in kitty_pos)
+    return ("interior", "edge", "corner")[on_edge]
+
+def generate_board(foods, rules, kitty_pos):
+    # Random board whose best group next to the kitty falls in the rules'
+    # chain_range. Rejection sampling: the acceptance rate measured for the
+    # kitty's placement sets how many tries keep the odds of giving up
+    # below BOARD_QUALITY_FAILURE_ODDS
+    grid_size = rules["grid_size"]
+    low, high = rules["chain_range"]
+    acceptance = rules["chain_acceptance"][kitty_placement(kitty_pos, grid_size)]
+    attempts = max(1, math.ceil(math.log(BOARD_QUALITY_FAILURE_ODDS) / math.log(1 - acceptance)))
+    kitty_index = kitty_pos[0] * grid_size + kitty_pos[1]
+    for _ in range(attempts):
+        cells = random.choices(foods, k=grid_size * grid_size)
+        cells[kitty_index] = None
+        if low <= chain_potential(cells, grid_size, kitty_pos, limit=high) <= high:
+            break
+    return [cells[row * grid_size:(row + 1) * grid_size] for row in range(grid_size)]
+
+# Library of pre-analysed classic opening boards, built offline by
+# build_opening_library.py. After a header and a tier table, every board
+# is stored as its best chain (1 byte) followed by the cells packed 2 bits
+# each: a food index into the game's foods, or OPENING_EMPTY_CODE
+OPENING_LIBRARY_FILE = os.path.join('assets', 'opening_boards.bin')
+OPENING_LIBRARY_MAGIC = b"KSSO"
+OPENING_LIBRARY_VERSION = 1
+OPENING_LIBRARY_HEADER = struct.Struct("<4sHBB")  # magic, version, grid size, tier count
+OPENING_TIER_HEADER = struct.Struct("<8sBBI")     # name, min chain, max chain, board count
+OPENING_EMPTY_CODE = 3
+
+# Difficulty tiers by best chain on the first move
+OPENING_TIERS = (
+    ("easy", 18, 48),
+    ("normal", 13, 17),
+    ("hard", 8, 12)
+)
+
+def opening_board_size(grid_size):
+    return 1 + (grid_size * grid_size * 2 + 7) // 8
+
+def pack_opening_board(best_chain, codes):
+    packed = 0
+    for index, code in enumerate(codes):
+        packed |= code << (2 * index)
+    return bytes([best_chain]) + packed.to_bytes(opening_board_size(int(math.isqrt(len(codes)))) - 1, "little")
+
+def save_opening_library(tiers, grid_size, path=OPENING_LIBRARY_FILE):
+    # tiers: [(name, min_chain, max_chain, [(best_chain, codes), ...]), ...]
+    temp_file = path + ".tmp"
+    with open(temp_file, "wb") as file:
+        file.write(OPENING_LIBRARY_HEADER.pack(OPENING_LIBRARY_MAGIC, OPENING_LIBRARY_VERSION, grid_size, len(tiers)))
+        for name, min_chain, max_chain, boards in tiers:
+            file.write(OPENING_TIER_HEADER.pack(name.encode("ascii"), min_chain, max_chain, len(boards)))
+        for name, min_chain, max_chain, boards in tiers:
+            for best_chain, codes in boards:
+                file.write(pack_opening_board(best_chain, codes))
+    os.replace(temp_file, path)
+
+class OpeningLibrary:
+    # The whole file is small (tens of KB), so it is read once and every
+    # lookup is a slice at a computed offset
+    def __init__(self, path=OPENING_LIBRARY_FILE):
+        with open(path, "rb") as file:
+            self.data = file.read()
+        magic, version, self.grid_size, tier_count = OPENING_LIBRARY_HEADER.unpack_from(self.data)
+        if magic != OPENING_LIBRARY_MAGIC or version != OPENING_LIBRARY_VERSION:
+            raise ValueError(f"{path} is not a version {OPENING_LIBRARY_VERSION} opening library")
+        
+        self.board_size = opening_board_size(self.grid_size)
+        self.tiers = {}  # name -> (min chain, max chain, board count, offset)
+        offset = OPENING_LIBRARY_HEADER.size + tier_count * OPENING_TIER_HEADER.size
+        for tier in range(tier_count):
+            name, min_chain, max_chain, count = OPENING_TIER_HEADER.unpack_from(
+                self.data, OPENING_LIBRARY_HEADER.size + tier * OPENING_TIER_HEADER.size)
+            self.tiers[name.rstrip(b"\0").decode("ascii")] = (min_chain, max_chain, count, offset)
+            offset += count * self.board_size
+        if offset > len(self.data):
+            raise ValueError(f"{path} is truncated")
+    
+    def board(self, tier, index):
+        # (best chain, cell codes) of board index % count in the tier
+        min_chain, max_chain, count, offset = self.tiers[tier]
+        start = offset + (index % count) * self.board_size
+        best_chain = self.data[start]
+        packed = int.from_bytes(self.data[start + 1:start + self.board_size], "little")
+        codes = [(packed >> (2 * cell)) & 3 for cell in range(self.grid_size * self.grid_size)]
+        return best_chain, codes
+
+OPENING_LIBRARY = None
+
+def get_opening_library():
+    # Loaded on first use; False remembers that it could not be loaded
+    global OPENING_LIBRARY
+    if OPENING_LIBRARY is None:
+        try:
+            OPENING_LIBRARY = OpeningLibrary()
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Error loading opening library: {e}")
+            OPENING_LIBRARY = False
+    return OPENING_LIBRARY or None
+
+# Size of the end-of-game results panel
+RESULTS_PANEL_WIDTH = 400
+RESULTS_PANEL_HEIGHT = 300
 
 # Star rating thresholds
 STAR_THRESHOLDS = [
@@ -52,7 +315,14 @@ DEFAULT_SETTINGS = {
     "music_volume": 50,
     "collect_key": pygame.K_SPACE,
     "reload_key": pygame.K_r,
-    "graphics_mode": "food"
+    "graphics_mode": "food",
+    "game_variant": "classic",
+    "difficulty": "normal",  # Opening board tier for classic games
+    "legacy_history_imported": False,
+    "history_keep_top": 100,     # Best games kept as raw records
+    "history_keep_recent": 200,  # Latest games kept as raw records
+    "history_keep_days": 365,    # Days of summary rows kept for compacted games
+    "frame_profiling": False     # Time every phase of a game frame
 }
 
 # Load settings from file or use defaults
@@ -94,45 +364,741 @@ def save_settings(settings):
 
 
 
+# Guards read-modify-write of the history files (compaction runs in the background)
+HISTORY_LOCK = threading.Lock()
+history_compaction_thread = None
+
 # Load game history from file
 def load_game_history():
     try:
         with open(HISTORY_FILE, "r") as file:
-            return json.load(file)
+            history = json.load(file)
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error loading game history: {e}. Creating new history.")
         return []
+    
+    # Keep the file bounded: compact in the background once it grows past the policy
+    keep_top, keep_recent, _ = get_history_retention()
+    if len(history) > keep_top + keep_recent + HISTORY_COMPACT_SLACK:
+        start_history_compaction()
+    return history
 
-# Save game history to file
-def save_game_history(history):
+# Save game history to file; returns whether it was saved. The history can
+# be any iterable of games: they are written one at a time, so a generator
+# never has to be held in memory as a whole. Background saves pass quiet
+# so only errors are printed
+def save_game_history(history, quiet=False):
     try:
-        with open(HISTORY_FILE, "w") as file:
-            json.dump(history, file, indent=4)
+        # Write to a temporary file first so a crash never leaves a truncated history
+        temp_file = HISTORY_FILE + ".tmp"
+        with open(temp_file, "w") as file:
+            file.write("[")
+            for index, game in enumerate(history):
+                file.write(",\n    " if index else "\n    ")
+                json.dump(game, file)
+            file.write("\n]\n")
+        os.replace(temp_file, HISTORY_FILE)
+        if not quiet:
             print("Game history saved successfully")
+        return True
     except Exception as e:
         print(f"Error saving game history: {e}")
+        return False
+
+# Modification time of a file, or None if it doesn't exist
+def get_file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+# Add one game to the history file
+def append_game_record(game_record):
+    # Don't interleave with a background compaction of the same file
+    with HISTORY_LOCK:
+        history = load_game_history()
+        history.append(game_record)
+        save_game_history(history)
+
+# Load per-day summaries of compacted games
+def load_history_summaries():
+    try:
+        with open(HISTORY_SUMMARY_FILE, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+# Save per-day summaries of compacted games
+def save_history_summaries(summaries):
+    try:
+        temp_file = HISTORY_SUMMARY_FILE + ".tmp"
+        with open(temp_file, "w") as file:
+            json.dump(summaries, file, indent=4)
+        os.replace(temp_file, HISTORY_SUMMARY_FILE)
+    except Exception as e:
+        print(f"Error saving history summaries: {e}")
+
+# Get the retention policy (top-N, last-N raw records and days of summaries) from settings
+def get_history_retention():
+    return (
+        SETTINGS.get("history_keep_top", DEFAULT_SETTINGS["history_keep_top"]),
+        SETTINGS.get("history_keep_recent", DEFAULT_SETTINGS["history_keep_recent"]),
+        SETTINGS.get("history_keep_days", DEFAULT_SETTINGS["history_keep_days"])
+    )
+
+# Variant of a game record or summary row and goal of a game record (rows
+# saved before variants were recorded are classic games)
+def record_variant(game):
+    return game.get("variant", "classic")
+
+def record_goal(game):
+    return game.get("food_goal", FOOD_GOAL)
+
+# Keep the top-N games of each variant and the last-N games (plus the fastest
+# win of each variant) as raw records and fold every other game into its day's
+# summary row for its variant. Summary rows are kept for the last keep_days
+# calendar days up to today (a datetime.date)
+def compact_history(history, summaries, keep_top, keep_recent, keep_days, today=None):
+    history = sorted(history, key=lambda game: game["timestamp"])
+    
+    kept = set()
+    for variant in set(record_variant(game) for game in history):
+        variant_games = [i for i, game in enumerate(history) if record_variant(game) == variant]
+        best_games = sorted(variant_games, key=lambda i: history[i]["score"], reverse=True)
+        kept.update(best_games[:keep_top])
+        
+        # The fastest win feeds the best time shown in game, so it always stays
+        winning_games = [i for i in variant_games if history[i]["score"] >= record_goal(history[i])]
+        if winning_games:
+            kept.add(min(winning_games, key=lambda i: history[i]["time"]))
+    if keep_recent > 0:
+        kept.update(range(max(0, len(history) - keep_recent), len(history)))
+    
+    summaries_by_day = {(row["date"], record_variant(row)): row for row in summaries}
+    for i, game in enumerate(history):
+        if i in kept:
+            continue
+        date = datetime.fromtimestamp(game["timestamp"]).strftime("%Y-%m-%d")
+        row = summaries_by_day.setdefault((date, record_variant(game)), {
+            "date": date,
+            "variant": record_variant(game),
+            "games": 0,
+            "wins": 0,
+            "total_score": 0,
+            "best_score": game["score"],
+            "best_time": None
+        })
+        row["games"] += 1
+        row["total_score"] += game["score"]
+        row["best_score"] = max(row["best_score"], game["score"])
+        if game["score"] >= record_goal(game):
+            row["wins"] += 1
+            if row["best_time"] is None or game["time"] < row["best_time"]:
+                row["best_time"] = game["time"]
+    
+    compacted = [game for i, game in enumerate(history) if i in kept]
+    summaries = sorted(summaries_by_day.values(), key=lambda row: (row["date"], record_variant(row)))
+    if keep_days > 0:
+        today = today or datetime.now().date()
+        first_kept = (today - timedelta(days=keep_days - 1)).strftime("%Y-%m-%d")
+        summaries = [row for row in summaries if row["date"] >= first_kept]
+    return compacted, summaries
+
+# Apply the retention policy to the history files
+def compact_history_file():
+    with HISTORY_LOCK:
+        try:
+            with open(HISTORY_FILE, "r") as file:
+                history = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        
+        keep_top, keep_recent, keep_days = get_history_retention()
+        if len(history) <= keep_top + keep_recent:
+            return
+        
+        history, summaries = compact_history(history, load_history_summaries(),
+                                             keep_top, keep_recent, keep_days)
+        # Save summaries first: a crash in between may double count a day, but never loses games
+        save_history_summaries(summaries)
+        save_game_history(history, quiet=True)
+
+# Run compaction on a background thread (at most one at a time)
+def start_history_compaction():
+    global history_compaction_thread
+    if history_compaction_thread and history_compaction_thread.is_alive():
+        return
+    history_compaction_thread = threading.Thread(target=compact_history_file, daemon=True)
+    history_compaction_thread.start()
 
-# Get best score from history
-def get_best_score():
-    history = load_game_history()
+# Get best score and time of a variant from history
+def get_best_score(variant="classic"):
+    history = [game for game in load_game_history() if record_variant(game) == variant]
     if not history:
         return 0, float('inf')
     
     best_score = max([game["score"] for game in history])
     
     # Find best time for winning games
-    winning_games = [game for game in history if game["score"] >= FOOD_GOAL]
+    winning_games = [game for game in history if game["score"] >= record_goal(game)]
     best_time = min([game["time"] for game in winning_games]) if winning_games else float('inf')
     
     return best_score, best_time
 
+# Minimum score of each star rating for a goal: the thresholds are set for
+# the classic goal and scale with other goals, rounded up to whole points
+def star_thresholds(food_goal=FOOD_GOAL):
+    return [(-(-threshold * food_goal // FOOD_GOAL), stars) for threshold, stars in STAR_THRESHOLDS]
+
+# Get the number of stars for a final score
+def stars_for_score(score, food_goal=FOOD_GOAL):
+    if score < food_goal:
+        # Game lost, no stars
+        return 0
+    stars_earned = 0
+    for threshold, stars in star_thresholds(food_goal):
+        if score >= threshold:
+            stars_earned = stars
+    return stars_earned
+
+# Score ranges of the star ratings for a goal, e.g.
+# "0★: 0-74 | 1★: 75-95 | 2★: 96-125 | 3★: 126+" for the classic goal
+def star_ranges_text(food_goal=FOOD_GOAL):
+    thresholds = star_thresholds(food_goal)
+    ranges = []
+    for i, (threshold, stars) in enumerate(thresholds):
+        if i + 1 < len(thresholds):
+            ranges.append(f"{stars}★: {threshold}-{thresholds[i + 1][0] - 1}")
+        else:
+            ranges.append(f"{stars}★: {threshold}+")
+    return " | ".join(ranges)
+
+# One line of the legacy text history, e.g.
+# "Date: 2024-05-01 12:00:00, Score: 80, Moves: 10, Time: 1:23"
+LEGACY_HISTORY_PATTERN = re.compile(
+    r"^(?:[^:,]*: )?(?P<date>[^,]*), [^:,]*: (?P<score>-?\d+), "
+    r"(?:[^:,]*: )?(?P<moves>\d+)?[^,]*, [^:,]*: (?P<time>\d+(?::\d+)*(?:\.\d+)?)"
+)
+LEGACY_DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+# Parse the legacy text history line by line into game records
+def parse_legacy_history(file, fallback_timestamp=0):
+    for line in file:
+        match = LEGACY_HISTORY_PATTERN.match(line)
+        if not match:
+            continue
+        
+        # Time is stored as [[h:]m:]s
+        time_val = 0.0
+        for part in match.group("time").split(":"):
+            time_val = time_val * 60 + float(part)
+        
+        timestamp = fallback_timestamp
+        date_str = match.group("date").strip()
+        for date_format in LEGACY_DATE_FORMATS:
+            try:
+                timestamp = datetime.strptime(date_str, date_format).timestamp()
+                break
+            except ValueError:
+                continue
+        
+        score = int(match.group("score"))
+        yield {
+            "timestamp": timestamp,
+            "date": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+            "score": score,
+            "moves": int(match.group("moves") or 0),
+            "time": time_val,
+            "stars": stars_for_score(score)
+        }
+
+# Move the legacy text history into the JSON history (only done once)
+def import_legacy_history():
+    if SETTINGS.get("legacy_history_imported"):
+        return 0
+    imported_count = 0
+    
+    def counted(games):
+        nonlocal imported_count
+        for game in games:
+            imported_count += 1
+            yield game
+    
+    try:
+        fallback_timestamp = os.path.getmtime(LEGACY_HISTORY_FILE)
+        with HISTORY_LOCK, open(LEGACY_HISTORY_FILE, "r", errors="replace") as file:
+            # Legacy games go straight from the text file into the saved
+            # history, after the games already there
+            legacy_games = counted(parse_legacy_history(file, fallback_timestamp))
+            first_game = next(legacy_games, None)
+            if first_game is not None:
+                history = itertools.chain(load_game_history(), [first_game], legacy_games)
+                if not save_game_history(history):
+                    return 0  # Try again next time
+    except FileNotFoundError:
+        return 0  # Nothing to import
+    except OSError as e:
+        print(f"Error reading legacy game history: {e}")
+        return 0
+    
+    # Remember the import so the text file is never parsed again
+    SETTINGS["legacy_history_imported"] = True
+    save_settings(SETTINGS)
+    print(f"Imported {imported_count} games from {LEGACY_HISTORY_FILE}")
+    return imported_count
+
+# Font of all text, and the sizes the screens use
+FONT_NAME = "Arial"
+FONT_SIZES = (16, 18, 24, 36, 64)
+
+# Process-wide fonts. SysFont scans the system font list on every call,
+# which is slow with fontconfig; here the font file is matched once and one
+# Font is kept per size. get() is thread safe, so the sizes in use can be
+# opened on a background thread while the rest of startup runs
+class FontRegistry:
+    def __init__(self, name=FONT_NAME):
+        self.name = name
+        self.path = None  # None until matched, then the file ("" if not found)
+        self.fonts = {}
+        self.lock = threading.Lock()
+        self.preload_thread = None
+    
+    def get(self, size):
+        with self.lock:
+            font = self.fonts.get(size)
+            if font is None:
+                if self.path is None:
+                    self.path = pygame.font.match_font(self.name) or ""
+                # Like SysFont, fall back to pygame's default font
+                font = self.fonts[size] = pygame.font.Font(self.path or None, size)
+            return font
+    
+    def preload(self, sizes=FONT_SIZES):
+        def load():
+            for size in sizes:
+                self.get(size)
+        self.preload_thread = threading.Thread(target=load, daemon=True)
+        self.preload_thread.start()
+
+FONTS = FontRegistry()
+with startup_step("fonts.preload"):
+    FONTS.preload()
+
 # Game settings (load from file or use defaults)
-SETTINGS = load_settings()
+with startup_step("load_settings"):
+    SETTINGS = load_settings()
+
+# Game time from a monotonic source, immune to wall-clock jumps. It is
+# sampled once per frame so every animation and the HUD see the same
+# time; pause() stops it and time_scale speeds it up (e.g. in tests)
+class GameClock:
+    def __init__(self, source=None, time_scale=1.0):
+        self.source = source or time.perf_counter
+        self.time_scale = time_scale
+        self.now = 0.0         # Game seconds at the last sample
+        self.frame_time = 0.0  # Game seconds between the last two samples
+        self.paused = False
+        self.last_sample = None
+    
+    def sample(self):
+        # Call once per frame; returns the game time that passed since the last call
+        raw = self.source()
+        if self.last_sample is None or self.paused:
+            self.frame_time = 0.0
+        else:
+            self.frame_time = (raw - self.last_sample) * self.time_scale
+        self.last_sample = raw
+        self.now += self.frame_time
+        return self.frame_time
+    
+    def pause(self):
+        self.paused = True
+    
+    def resume(self):
+        # Time spent paused is dropped, even if no frame sampled it
+        if self.paused:
+            self.paused = False
+            self.last_sample = self.source()
+
+# Blocking file I/O (history, settings) runs on a single worker thread, so
+# writes keep their order and never hold up a frame
+IO_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="kss-io")
+IO_TASKS = set()
+
+# Run a blocking function off the frame path when the scene loop is running;
+# returns a future to await. When a screen is stepped on its own (tests, the
+# headless harness) there is no loop and the function runs inline
+def run_io(function, *args):
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return function(*args)
+    future = loop.run_in_executor(IO_EXECUTOR, function, *args)
+    IO_TASKS.add(future)
+    future.add_done_callback(IO_TASKS.discard)
+    return future
+
+# Wait for every pending I/O call, e.g. before the process exits
+async def flush_io():
+    while IO_TASKS:
+        await asyncio.gather(*IO_TASKS, return_exceptions=True)
+
+# Runs the screens as coroutine scenes on one asyncio loop. A scene is a
+# screen with step() and running; it opens another scene by setting
+# next_scene (a scene or the name of one) and may define async enter() and
+# leave(), called on every visit, to resume and suspend. Named scenes are
+# built once and kept, unless they report themselves expired. A scene sets
+# quit_requested to end the whole loop: every scene on the way out still
+# leaves and pending I/O is flushed before run() returns. Frames are
+# paced with asyncio.sleep instead of clock.tick, so background tasks (I/O,
+# hint search, telemetry) run in the idle part of each frame
+class SceneManager:
+    def __init__(self, factories=None, frame_rate=FRAME_RATE):
+        self.factories = dict(factories or {})  # Scene name -> callable that builds it
+        self.scenes = {}  # Scenes built so far, by name
+        self.frame_time = 1 / frame_rate
+        self.next_frame = None
+        self.tasks = set()
+        self.quitting = False
+    
+    def get_scene(self, name):
+        scene = self.scenes.get(name)
+        if scene is None or getattr(scene, "expired", False):
+            scene = self.scenes[name] = self.factories[name]()
+        return scene
+    
+    def run(self, scene):
+        self.quitting = False
+        asyncio.run(self.main(scene))
+    
+    async def main(self, scene):
+        try:
+            await self.run_scene(scene)
+        finally:
+            for task in list(self.tasks):
+                task.cancel()
+            await flush_io()
+    
+    def start_task(self, coroutine):
+        # Background work sharing the loop with the scenes
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+    
+    async def run_scene(self, scene):
+        if isinstance(scene, str):
+            scene = self.get_scene(scene)
+        scene.running = True
+        if hasattr(scene, "enter"):
+            await scene.enter()
+        try:
+            while scene.running and not self.quitting:
+                scene.step()
+                if getattr(scene, "quit_requested", False):
+                    self.quitting = True
+                    break
+                next_scene = getattr(scene, "next_scene", None)
+                if next_scene is not None:
+                    scene.next_scene = None
+                    await self.run_scene(next_scene)
+                await self.wait_frame()
+        finally:
+            if hasattr(scene, "leave"):
+                await scene.leave()
+    
+    async def wait_frame(self):
+        # Sleep out the rest of the frame; after a long hitch start afresh
+        # rather than running frames back to back to catch up
+        now = time.perf_counter()
+        if self.next_frame is None or now - self.next_frame > self.frame_time:
+            self.next_frame = now
+        self.next_frame += self.frame_time
+        await asyncio.sleep(max(self.next_frame - now, 0))
+
+# Rolling window of samples with percentiles. The sorted window is kept
+# until the next sample, so several percentiles cost one sort
+class RollingStats:
+    def __init__(self, size=600):
+        self.samples = deque(maxlen=size)
+        self.ordered = None
+        
+    def add(self, value):
+        self.samples.append(value)
+        self.ordered = None
+        
+    def percentile(self, percent):
+        if not self.samples:
+            return 0.0
+        if self.ordered is None:
+            self.ordered = sorted(self.samples)
+        index = round(percent / 100 * (len(self.ordered) - 1))
+        return self.ordered[index]
+
+# Opt-in frame profiler. Each mark() charges the time since the previous mark
+# to the named phase, so the hot path only pays for perf_counter() calls and
+# nothing at all while profiling is disabled.
+class FrameProfiler:
+    def __init__(self, enabled=False, window=600, trace_size=100000):
+        self.enabled = enabled
+        self.window = window
+        self.phases = {}  # Phase name -> RollingStats of milliseconds
+        self.trace = deque(maxlen=trace_size)  # (phase, start, duration) in seconds
+        self.frame_start = None
+        self.last_mark = None
+        
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last_mark = time.perf_counter()
+        
+    def mark(self, phase):
+        if not self.enabled or self.frame_start is None:
+            return
+        now = time.perf_counter()
+        self.record(phase, self.last_mark, now - self.last_mark)
+        self.last_mark = now
+        
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        self.record("frame", self.frame_start, time.perf_counter() - self.frame_start)
+        self.frame_start = None
+        
+    def record(self, phase, start, duration):
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = RollingStats(self.window)
+        stats.add(duration * 1000)
+        self.trace.append((phase, start, duration))
+        
+    def summary(self):
+        # Phase name -> (p50, p99, max) in milliseconds
+        return {
+            phase: (stats.percentile(50), stats.percentile(99), max(stats.samples))
+            for phase, stats in self.phases.items()
+        }
+        
+    def print_summary(self):
+        print(f"{'phase':<12}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for phase, (p50, p99, worst) in self.summary().items():
+            print(f"{phase:<12}{p50:>10.3f}{p99:>10.3f}{worst:>10.3f}")
+            
+    def dump_trace(self, path=PROFILE_TRACE_FILE):
+        # Chrome trace event format (open in chrome://tracing or Perfetto)
+        events = [
+            {"name": phase, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6,
+             "pid": 0, "tid": 0 if phase == "frame" else 1}
+            for phase, start, duration in self.trace
+        ]
+        try:
+            with open(path, "w") as file:
+                json.dump({"traceEvents": events, "otherData": {"summary": self.summary()}}, file)
+            print(f"Frame trace saved to {path}")
+        except Exception as e:
+            print(f"Error saving frame trace: {e}")
+
+# Frame profiler shared by all screens
+PROFILER = FrameProfiler(enabled=SETTINGS.get("frame_profiling", False))
+
+# Shared registry of per-frame counters, gauges and rolling samples.
+# Any subsystem can publish to it; the performance overlay shows it.
+class MetricsRegistry:
+    def __init__(self):
+        self.counters = {}    # Counters of the frame in progress
+        self.last_frame = {}  # Counters of the last completed frame
+        self.gauges = {}
+        self.stats = {}       # Name -> RollingStats
+        
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+        
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+        
+    def observe(self, name, value, window=120):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = RollingStats(window)
+        stats.add(value)
+        
+    def end_frame(self):
+        self.last_frame = self.counters
+        self.counters = {}
+
+METRICS = MetricsRegistry()
+
+# Count texts rendered and blitted: each render makes a new surface
+def count_text(amount=1):
+    METRICS.count("text_renders", amount)
+    METRICS.count("blits", amount)
+    METRICS.count("surfaces", amount)
+
+# Resident set size of this process in bytes (0 if unknown)
+def get_rss():
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak RSS: kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return 0
+
+# Toggleable performance overlay, drawn last on every screen. Blits, text
+# renders and surfaces are counted with METRICS.count (or count_text) where
+# each screen and widget draws them. The text is rendered again every PERF_OVERLAY_REFRESH seconds,
+# so the overlay adds little to the frame times it shows
+class PerfOverlay:
+    STANDARD_COUNTERS = ("blits", "text_renders", "surfaces")
+    
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.visible = False
+        self.font = None
+        self.last_frame_time = None
+        self.rss = 0
+        self.rss_time = 0
+        self.background = None
+        self.text = []  # Rendered lines, refreshed every PERF_OVERLAY_REFRESH
+        self.text_time = None
+        
+    def toggle(self):
+        self.visible = not self.visible
+        self.last_frame_time = None
+        self.text_time = None
+            
+    def handle_event(self, event):
+        # Returns True if the event toggled the overlay
+        if event.type == pygame.KEYDOWN and event.key == PERF_OVERLAY_KEY:
+            self.toggle()
+            return True
+        return False
+        
+    def draw(self, screen):
+        # Called once per frame, so this is also where the frame ends
+        frame_counters = self.metrics.counters
+        self.metrics.end_frame()
+        if not self.visible:
+            return
+        
+        now = time.perf_counter()
+        if self.last_frame_time is not None:
+            self.metrics.observe("frame_ms", (now - self.last_frame_time) * 1000)
+        self.last_frame_time = now
+        
+        if self.text_time is None or now - self.text_time >= PERF_OVERLAY_REFRESH:
+            self.text = self.render_text(frame_counters, now)
+            self.text_time = now
+        
+        line_height = 18
+        width, height = 230, len(self.text) * line_height + 10
+        if self.background is None or self.background.get_size() != (width, height):
+            self.background = pygame.Surface((width, height))
+            self.background.fill(BLACK)
+            self.background.set_alpha(170)
+        screen.blit(self.background, (5, 5))
+        for i, text in enumerate(self.text):
+            screen.blit(text, (10, 10 + i * line_height))
+    
+    def render_text(self, frame_counters, now):
+        # Reading RSS is a syscall, once per second is plenty
+        if now - self.rss_time > 1.0:
+            self.rss = get_rss()
+            self.rss_time = now
+            
+        frame_stats = self.metrics.stats.get("frame_ms")
+        if frame_stats and frame_stats.samples:
+            fps = 1000 * len(frame_stats.samples) / sum(frame_stats.samples)
+            p50, p99 = frame_stats.percentile(50), frame_stats.percentile(99)
+        else:
+            fps = p50 = p99 = 0.0
+            
+        lines = [
+            f"FPS: {fps:.1f}",
+            f"Frame p50/p99: {p50:.1f}/{p99:.1f} ms",
+            f"Blits: {frame_counters.get('blits', 0)}  Text: {frame_counters.get('text_renders', 0)}",
+            f"Surfaces: {frame_counters.get('surfaces', 0)}",
+            f"RSS: {self.rss / (1024 * 1024):.1f} MB"
+        ]
+        # Counters and gauges published by other subsystems
+        for name, value in frame_counters.items():
+            if name not in self.STANDARD_COUNTERS:
+                lines.append(f"{name}: {value}")
+        for name, value in self.metrics.gauges.items():
+            lines.append(f"{name}: {value}")
+            
+        if self.font is None:
+            self.font = FONTS.get(16)
+        return [self.font.render(line, True, LIGHT_GREEN) for line in lines]
+
+PERF_OVERLAY = PerfOverlay(METRICS)
+
+# Reads each frame's events for the game. Every event is stamped with the
+# time it was read (read_time) and the earliest time it can have arrived
+# (arrival_time): the end of the previous frame, as any event queued before
+# that would have been read then. Runs of mouse motion are merged into one
+# event with the latest position, so a fast drag costs one hit test per
+# frame. The screen marks the events it acted on; after the flip, the time
+# from their arrival bound to showing their result is recorded as
+# input-to-photon latency (shown on the performance overlay). It includes
+# the time spent in the event queue, so it is an upper bound
+class InputLayer:
+    def __init__(self, metrics, clock=None):
+        self.metrics = metrics
+        self.clock = clock or time.perf_counter
+        self.acted_on = []  # Arrival bounds of the events acted on this frame
+        self.frame_end = None  # Time of the last flip
+    
+    def reset(self):
+        # Forget the last frame when a screen starts or stops reading input,
+        # so the time spent elsewhere isn't counted as queueing
+        self.acted_on = []
+        self.frame_end = None
+    
+    def poll(self):
+        now = self.clock()
+        arrival_time = self.frame_end if self.frame_end is not None else now
+        events = []
+        for event in pygame.event.get():
+            if event.type == pygame.MOUSEMOTION and events and events[-1].type == pygame.MOUSEMOTION:
+                previous = events.pop()
+                rel = (previous.rel[0] + event.rel[0], previous.rel[1] + event.rel[1])
+                event = pygame.event.Event(pygame.MOUSEMOTION, pos=event.pos, rel=rel, buttons=event.buttons)
+                self.metrics.count("coalesced_motion")
+            event.read_time = now
+            event.arrival_time = arrival_time
+            events.append(event)
+        return events
+    
+    def mark(self, event):
+        # The event changed what the next frame shows
+        self.acted_on.append(event.arrival_time)
+    
+    def presented(self):
+        # Call right after every flip; records the latency of the events
+        # whose results it shows
+        now = self.clock()
+        self.frame_end = now
+        if not self.acted_on:
+            return
+        for arrival_time in self.acted_on:
+            self.metrics.observe("input_latency_ms", (now - arrival_time) * 1000)
+        self.acted_on = []
+        stats = self.metrics.stats["input_latency_ms"]
+        self.metrics.set_gauge("Input p50/p99", f"{stats.percentile(50):.1f}/{stats.percentile(99):.1f} ms")
+
+INPUT = InputLayer(METRICS)
 
 # Game instructions in English
-def get_instructions(is_fruits_mode=False):
+def get_instructions(is_fruits_mode=False, rules=None):
     penalty_item = "Rocks" if is_fruits_mode else "Bones"
     food_type = "fruits" if is_fruits_mode else "food"
+    rules = rules or GAME_VARIANTS["classic"]
     
     return [
         "How to play:",
@@ -140,12 +1106,12 @@ def get_instructions(is_fruits_mode=False):
         f"1. Connect the same types of {food_type} to make the cat eat them.",
         "2. Mice give 5 points each.",
         f"3. {penalty_item} take away 10 points each.",
-        "4. Collect 75 points to win.",
-        "5. You have only 10 moves.",
+        f"4. Collect {rules['food_goal']} points to win.",
+        f"5. You have only {rules['max_moves']} moves.",
         "6. You can reload the field once per game.",
         "",
         "Control:",
-        "- Click on the food to select it.",
+        "- Click or drag across the food to select it.",
         "- Press the 'Collect' button or Space key to collect the food.",
         "- Press the 'Reload' button or R key to refresh the field.",
         "- Press ESC to return to the menu."
@@ -209,12 +1175,15 @@ def load_all_foods():
     return all_foods
 
 # Load all available foods
-ALL_FOOD_IMAGES = load_all_foods()
+with startup_step("load_all_foods"):
+    ALL_FOOD_IMAGES = load_all_foods()
+    ALL_FOOD_MODE = SETTINGS.get("graphics_mode")  # Graphics mode the images are for
 
 # Mouse and kitty images
-MOUSE_IMAGE = load_image('mouse.png')
-KITTY_IMAGE = load_image('kitty.png')
-ARROW_IMAGE = load_image('arrow_right.png')
+with startup_step("load_images"):
+    MOUSE_IMAGE = load_image('mouse.png')
+    KITTY_IMAGE = load_image('kitty.png')
+    ARROW_IMAGE = load_image('arrow_right.png')
 
 # Load penalty item image based on graphics mode
 if SETTINGS.get("graphics_mode") == "fruits":
@@ -222,38 +1191,148 @@ if SETTINGS.get("graphics_mode") == "fruits":
 else:
     PENALTY_IMAGE = load_image('bones.png')  # Use bones for food mode
 
-# Load sound effects
-def load_sound(filename):
-    path = os.path.join('assets', 'sounds', filename)
-    try:
+# Sounds
+SOUND_DIR = os.path.join('assets', 'sounds')
+BACKGROUND_MUSIC = os.path.join(SOUND_DIR, 'background_sound.mp3')
+SOUND_CACHE_DIR = os.path.join(DATA_DIR, "sound_cache")  # Decoded PCM of the sound effects
+# Sound effects: name -> (file, category)
+SOUND_EFFECTS = {
+    "tap": ("tap_sound.mp3", "ui"),
+    "meow": ("cat_meow.mp3", "cat"),
+    "purr": ("cat_purr.mp3", "cat"),
+    "bone": ("bone_sound.mp3", "hazard"),
+    "mouse": ("mouse_sound.mp3", "hazard")
+}
+# Mixer channels reserved for each category
+SOUND_CHANNELS = {"ui": 2, "cat": 2, "hazard": 3}
+# Shortest time between two plays of a sound (seconds); plays in between are dropped
+SOUND_MIN_INTERVAL = {"tap": 0.05}
+
+# Plays the sound effects on a small pool of channels per category, so
+# rapid clicks and hover changes can't pile up mixer voices: a full pool
+# cuts off its oldest sound. MP3s are decoded once and the PCM is cached
+# on disk for the next start; the background music is only loaded when
+# first played, and a missing file is reported once
+class SoundManager:
+    def __init__(self, cache_dir=SOUND_CACHE_DIR, clock=None):
+        self.cache_dir = cache_dir
+        self.clock = clock or time.perf_counter
+        self.sounds = {}        # Name -> Sound (None if it couldn't be loaded)
+        self.pools = {}         # Category -> channels, least recently started first
+        self.last_played = {}   # Name -> clock time of the last play
+        self.music_loaded = False
+        self.music_failed = False
+    
+    def load_all(self):
+        # Without an audio device the game runs silently
+        if pygame.mixer.get_init():
+            self.setup_channels()
+        else:
+            print("Sound disabled: the mixer is not initialised")
+        for name, (filename, category) in SOUND_EFFECTS.items():
+            with startup_step(f"load_sound:{filename}"):
+                self.load(name)
+    
+    def setup_channels(self):
+        # Reserved channels are never picked for sounds played outside the pools
+        total = sum(SOUND_CHANNELS.values())
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), total))
+        pygame.mixer.set_reserved(total)
+        first = 0
+        for category, count in SOUND_CHANNELS.items():
+            self.pools[category] = [pygame.mixer.Channel(first + i) for i in range(count)]
+            first += count
+    
+    def load(self, name):
+        filename, category = SOUND_EFFECTS[name]
+        sound = None
+        if self.pools:
+            try:
+                sound = self.load_cached(os.path.join(SOUND_DIR, filename))
+            except (pygame.error, OSError) as e:
+                print(f"Error loading sound {filename}: {e}")
+        self.sounds[name] = sound
+        return sound
+    
+    def cache_path(self, path):
+        # The cache key covers the source file and the mixer's output format
+        stat = os.stat(path)
+        frequency, size, channels = pygame.mixer.get_init()
+        name = f"{os.path.basename(path)}-{stat.st_size}-{stat.st_mtime_ns}-{frequency}-{size}-{channels}.pcm"
+        return os.path.join(self.cache_dir, name)
+    
+    def load_cached(self, path):
+        cache_path = self.cache_path(path)
+        try:
+            with open(cache_path, "rb") as file:
+                return pygame.mixer.Sound(buffer=file.read())
+        except FileNotFoundError:
+            pass
+        
         sound = pygame.mixer.Sound(path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Drop the cache of older versions of the file
+            prefix = os.path.basename(path) + "-"
+            for old_file in os.listdir(self.cache_dir):
+                if old_file.startswith(prefix):
+                    os.remove(os.path.join(self.cache_dir, old_file))
+            temp_file = cache_path + ".tmp"
+            with open(temp_file, "wb") as file:
+                file.write(sound.get_raw())
+            os.replace(temp_file, cache_path)
+        except OSError as e:
+            print(f"Error caching sound {path}: {e}")
         return sound
-    except pygame.error as e:
-        print(f"Error loading sound {filename}: {e}")
-        return None
+    
+    def play(self, name):
+        # Returns the channel the sound plays on, or None if it was dropped
+        sound = self.sounds.get(name)
+        if sound is None:
+            return None
+        
+        now = self.clock()
+        last_played = self.last_played.get(name)
+        if last_played is not None and now - last_played < SOUND_MIN_INTERVAL.get(name, 0):
+            return None
+        self.last_played[name] = now
+        
+        # A free channel of the category, or else the one started longest ago
+        pool = self.pools[SOUND_EFFECTS[name][1]]
+        channel = next((channel for channel in pool if not channel.get_busy()), pool[0])
+        pool.remove(channel)
+        pool.append(channel)
+        channel.play(sound)
+        return channel
+    
+    def set_volume(self, volume):
+        for sound in self.sounds.values():
+            if sound:
+                sound.set_volume(volume)
+    
+    def play_music(self):
+        # Keeps playing if it already is; the file is streamed by the mixer
+        if self.music_failed:
+            return
+        try:
+            if pygame.mixer.music.get_busy():
+                return
+            if not self.music_loaded:
+                pygame.mixer.music.load(BACKGROUND_MUSIC)
+                self.music_loaded = True
+            # Volume is already set by apply_sound_settings
+            pygame.mixer.music.play(-1)  # -1 means loop indefinitely
+        except pygame.error as e:
+            print(f"Error playing background music: {e}")
+            self.music_failed = True
 
-# Background music
-BACKGROUND_MUSIC = os.path.join('assets', 'sounds', 'background_sound.mp3')
-TAP_SOUND = load_sound('tap_sound.mp3')
-MEOW_SOUND = load_sound('cat_meow.mp3')
-PURR_SOUND = load_sound('cat_purr.mp3')
-BONE_SOUND = load_sound('bone_sound.mp3')
-MOUSE_SOUND = load_sound('mouse_sound.mp3')
+SOUNDS = SoundManager()
+SOUNDS.load_all()
 
 # Apply sound settings from the SETTINGS dictionary
 def apply_sound_settings():
     # Apply sound volume to all sound effects
-    volume = SETTINGS["sound_volume"] / 100
-    if TAP_SOUND:
-        TAP_SOUND.set_volume(volume)
-    if MEOW_SOUND:
-        MEOW_SOUND.set_volume(volume)
-    if PURR_SOUND:
-        PURR_SOUND.set_volume(volume)
-    if BONE_SOUND:
-        BONE_SOUND.set_volume(volume)
-    if MOUSE_SOUND:
-        MOUSE_SOUND.set_volume(volume)
+    SOUNDS.set_volume(SETTINGS["sound_volume"] / 100)
     
     # Apply music volume
     pygame.mixer.music.set_volume(SETTINGS["music_volume"] / 100)
@@ -261,32 +1340,77 @@ def apply_sound_settings():
     print("Sound settings applied successfully")
 
 # Apply sound settings at startup
-apply_sound_settings()
+with startup_step("apply_sound_settings"):
+    apply_sound_settings()
 
 # Create star images
 def create_star_image(filled=True, size=50):
-    surface = pygame.Surface((size, size), pygame.SRCALPHA)
     if filled:
         color = GOLD
     else:
         color = (100, 100, 100)  # Gray for empty star
     
-    # Draw a simple star
+    # Transparent pixels get the star's colour, so its antialiased edges don't darken
+    surface = pygame.Surface((size, size), pygame.SRCALPHA)
+    surface.fill((*color, 0))
+    
+    # Draw a simple star, inside the pixel centres of the first and last rows and columns
+    center = (size - 1) / 2
     points = []
     for i in range(5):
         # Outer point
         angle = math.pi * 2 * i / 5 - math.pi / 2
-        points.append((size/2 + size/2 * math.cos(angle), size/2 + size/2 * math.sin(angle)))
+        points.append((round(center + center * math.cos(angle)), round(center + center * math.sin(angle))))
         # Inner point
         angle += math.pi / 5
-        points.append((size/2 + size/4 * math.cos(angle), size/2 + size/4 * math.sin(angle)))
+        points.append((round(center + center / 2 * math.cos(angle)), round(center + center / 2 * math.sin(angle))))
     
-    pygame.draw.polygon(surface, color, points)
+    # Antialiased outline first, then the solid shape over its inner half
+    pygame.gfxdraw.aapolygon(surface, points, color)
+    pygame.gfxdraw.filled_polygon(surface, points, color)
     return surface
 
+# Star sprites by (size, filled), each drawn once at its own size
+STAR_IMAGES = {}
+
+def get_star_image(size, filled=True):
+    image = STAR_IMAGES.get((size, filled))
+    if image is None:
+        image = STAR_IMAGES[(size, filled)] = create_star_image(filled, size)
+    return image
+
+# Star sizes of the results panel and the records table
+RESULTS_STAR_SIZE = 50
+RECORDS_STAR_SIZE = 20
+
 # Star images
-EMPTY_STAR = create_star_image(filled=False)
-FILLED_STAR = create_star_image(filled=True)
+with startup_step("create_star_image"):
+    for star_size in (RESULTS_STAR_SIZE, RECORDS_STAR_SIZE):
+        get_star_image(star_size, filled=False)
+        get_star_image(star_size, filled=True)
+
+# Share of a cell's size ignored on each side when a drag hit-tests cells,
+# so a diagonal sweep through a corner doesn't touch the neighbouring cells
+DRAG_HIT_INSET = 0.2
+
+# Cells on the straight line from start to end, excluding start: Bresenham's
+# line algorithm over the grid, so every cell is a neighbour of the one before
+def grid_line(start, end):
+    row, col = start
+    end_row, end_col = end
+    row_distance, col_distance = abs(end_row - row), abs(end_col - col)
+    row_step = 1 if end_row > row else -1
+    col_step = 1 if end_col > col else -1
+    error = col_distance - row_distance
+    while (row, col) != (end_row, end_col):
+        double_error = 2 * error
+        if double_error > -row_distance:
+            error -= row_distance
+            col += col_step
+        if double_error < col_distance:
+            error += col_distance
+            row += row_step
+        yield row, col
 
 # Calculate angle between two points
 def calculate_angle(start_pos, end_pos):
@@ -313,6 +1437,7 @@ class Button:
         pygame.draw.rect(screen, color, self.rect, border_radius=10)
         pygame.draw.rect(screen, BLACK, self.rect, 2, border_radius=10)
         screen.blit(self.text_surf, self.text_rect)
+        METRICS.count("blits")
         
     def check_hover(self, pos):
         # Check if mouse is over button and update hover state
@@ -372,6 +1497,7 @@ class ToggleSwitch:
             option_text = self.font.render(option, True, text_color)
             text_rect = option_text.get_rect(center=button_rect.center)
             screen.blit(option_text, text_rect)
+        count_text(1 + len(self.buttons))
         
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -402,7 +1528,7 @@ class CircleButton:
         self.hover_text = hover_text
         self.hover_text_surf = None
         if hover_text:
-            small_font = pygame.font.SysFont("Arial", 18)
+            small_font = FONTS.get(18)
             self.hover_text_surf = small_font.render(hover_text, True, BLACK, WHITE)
         
     def draw(self, screen):
@@ -411,6 +1537,7 @@ class CircleButton:
         pygame.draw.circle(screen, color, (self.x, self.y), self.radius)
         pygame.draw.circle(screen, BLACK, (self.x, self.y), self.radius, 2)
         screen.blit(self.text_surf, self.text_rect)
+        METRICS.count("blits")
         
         # Draw hover text if hovered
         if self.is_hovered and self.hover_text_surf:
@@ -432,6 +1559,7 @@ class CircleButton:
             pygame.draw.rect(screen, BLACK, bg_rect, 1)
             
             screen.blit(self.hover_text_surf, hover_rect)
+            METRICS.count("blits")
         
     def check_hover(self, pos):
         # Check if mouse is over button and update hover state
@@ -484,6 +1612,7 @@ class Slider:
         label_text = self.font.render(f"{self.label}: {self.value}", True, BLACK)
         label_rect = label_text.get_rect(bottomleft=(self.rect.x, self.rect.y - 10))
         screen.blit(label_text, label_rect)
+        count_text()
         
         # Draw tick marks
         num_ticks = (self.max_val - self.min_val) // self.step + 1
@@ -542,6 +1671,7 @@ class KeyBindControl:
         key_text = self.font.render(self.key_name, True, BLACK)
         key_rect = key_text.get_rect(center=self.rect.center)
         screen.blit(key_text, key_rect)
+        count_text(2)  # Label and key
         
         # Draw instruction if listening
         if self.is_listening:
@@ -549,6 +1679,7 @@ class KeyBindControl:
             # Position the instruction 20px above the Back button
             instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 80))
             screen.blit(instruction_text, instruction_rect)
+            count_text()
         
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -571,13 +1702,13 @@ class Settings:
         self.screen = screen
         self.main_menu = main_menu  # Reference to the main menu for updating
         self.running = True
-        self.font = pygame.font.SysFont("Arial", 24)
-        self.title_font = pygame.font.SysFont("Arial", 36)
+        self.font = FONTS.get(24)
+        self.title_font = FONTS.get(36)
         
         # Create controls
         slider_width = 300
         slider_height = 20
-        control_spacing = 80
+        control_spacing = 70
         # Move start_y 15px lower to prevent covering the Settings header
         start_y = SCREEN_HEIGHT // 3 - 80 + 15
         
@@ -635,6 +1766,30 @@ class Settings:
             SETTINGS["reload_key"]
         )
         
+        # Board size and rules used for new games
+        self.variant_toggle = ToggleSwitch(
+            SCREEN_WIDTH // 2 - slider_width // 2,
+            start_y + 5 * control_spacing,
+            slider_width,
+            40,
+            "Board",
+            self.font,
+            [variant.capitalize() for variant in GAME_VARIANTS],
+            SETTINGS.get("game_variant", "classic").capitalize()
+        )
+        
+        # Opening board difficulty for classic games
+        self.difficulty_toggle = ToggleSwitch(
+            SCREEN_WIDTH // 2 - slider_width // 2,
+            start_y + 6 * control_spacing,
+            slider_width,
+            40,
+            "Difficulty",
+            self.font,
+            [name.capitalize() for name, min_chain, max_chain in OPENING_TIERS],
+            SETTINGS.get("difficulty", "normal").capitalize()
+        )
+        
         # Create back button
         self.back_button = Button(
             SCREEN_WIDTH // 2 - 100,
@@ -644,85 +1799,101 @@ class Settings:
             "Back",
             self.font
         )
-        
-    def run(self):
-        clock = pygame.time.Clock()
-        
-        while self.running:
-            mouse_pos = pygame.mouse.get_pos()
-            
-            # Check for hover state changes
-            hover_changed = self.back_button.check_hover(mouse_pos)
-            hover_changed |= self.graphics_toggle.check_hover(mouse_pos)
-            
-            # Play sound on hover change
-            if hover_changed and TAP_SOUND:
-                TAP_SOUND.play()
-            
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    pygame.quit()
-                    sys.exit()
-                    
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE and not self.collect_key_control.is_listening and not self.reload_key_control.is_listening:
-                        self.save_settings()
-                        self.running = False
-                        return
-                        
-                # Handle slider and key bind events
-                sound_changed = self.sound_slider.handle_event(event)
-                music_changed = self.music_slider.handle_event(event)
-                graphics_changed = self.graphics_toggle.handle_event(event)
-                self.collect_key_control.handle_event(event)
-                self.reload_key_control.handle_event(event)
+    
+    async def enter(self):
+        # The screen is kept between visits: show the settings as they are now
+        self.sync_controls()
+    
+    def sync_controls(self):
+        self.sound_slider.value = SETTINGS["sound_volume"]
+        self.sound_slider.update_handle_position()
+        self.music_slider.value = SETTINGS["music_volume"]
+        self.music_slider.update_handle_position()
+        self.graphics_toggle.current_option = "Cat Food" if SETTINGS["graphics_mode"] == "food" else "Fruits"
+        self.variant_toggle.current_option = SETTINGS.get("game_variant", "classic").capitalize()
+        self.difficulty_toggle.current_option = SETTINGS.get("difficulty", "normal").capitalize()
+        for control, key in ((self.collect_key_control, SETTINGS["collect_key"]),
+                             (self.reload_key_control, SETTINGS["reload_key"])):
+            control.key = key
+            control.key_name = pygame.key.name(key).upper()
+            control.is_listening = False
+        
+    def step(self):
+        # Handle events and draw one frame
+        mouse_pos = pygame.mouse.get_pos()
+        
+        # Check for hover state changes
+        hover_changed = self.back_button.check_hover(mouse_pos)
+        hover_changed |= self.graphics_toggle.check_hover(mouse_pos)
+        hover_changed |= self.variant_toggle.check_hover(mouse_pos)
+        hover_changed |= self.difficulty_toggle.check_hover(mouse_pos)
+        
+        # Play sound on hover change
+        if hover_changed:
+            SOUNDS.play("tap")
+        
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                # Quit the game once the scenes have left
+                self.running = False
+                self.quit_requested = True
+                return
                 
-                # Check back button
-                if self.back_button.is_clicked(mouse_pos, event):
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE and not self.collect_key_control.is_listening and not self.reload_key_control.is_listening:
                     self.save_settings()
                     self.running = False
                     return
+                elif not self.collect_key_control.is_listening and not self.reload_key_control.is_listening:
+                    PERF_OVERLAY.handle_event(event)
                     
-                # Apply sound changes in real-time
-                if sound_changed:
-                    self.apply_sound_settings()
-            
-            # Update music volume in real-time
-            pygame.mixer.music.set_volume(self.music_slider.value / 100)
-            
-            # Draw the settings screen
-            self.screen.fill(WHITE)
-            
-            # Draw title - position it higher to create more space
-            title_text = self.title_font.render("Settings", True, DARK_BLUE)
-            title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 6 - 15))
-            self.screen.blit(title_text, title_rect)
-            
-            # Draw controls
-            self.sound_slider.draw(self.screen)
-            self.music_slider.draw(self.screen)
-            self.graphics_toggle.draw(self.screen)
-            self.collect_key_control.draw(self.screen)
-            self.reload_key_control.draw(self.screen)
-            self.back_button.draw(self.screen)
-            
-            pygame.display.flip()
-            clock.tick(60)
+            # Handle slider and key bind events
+            sound_changed = self.sound_slider.handle_event(event)
+            music_changed = self.music_slider.handle_event(event)
+            graphics_changed = self.graphics_toggle.handle_event(event)
+            self.variant_toggle.handle_event(event)
+            self.difficulty_toggle.handle_event(event)
+            self.collect_key_control.handle_event(event)
+            self.reload_key_control.handle_event(event)
+            
+            # Check back button
+            if self.back_button.is_clicked(mouse_pos, event):
+                self.save_settings()
+                self.running = False
+                return
+                
+            # Apply sound changes in real-time
+            if sound_changed:
+                self.apply_sound_settings()
+        
+        # Update music volume in real-time
+        pygame.mixer.music.set_volume(self.music_slider.value / 100)
+        
+        # Draw the settings screen
+        self.screen.fill(WHITE)
+        
+        # Draw title - position it higher to create more space
+        title_text = self.title_font.render("Settings", True, DARK_BLUE)
+        title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 6 - 15))
+        self.screen.blit(title_text, title_rect)
+        count_text()
+        
+        # Draw controls
+        self.sound_slider.draw(self.screen)
+        self.music_slider.draw(self.screen)
+        self.graphics_toggle.draw(self.screen)
+        self.variant_toggle.draw(self.screen)
+        self.difficulty_toggle.draw(self.screen)
+        self.collect_key_control.draw(self.screen)
+        self.reload_key_control.draw(self.screen)
+        self.back_button.draw(self.screen)
+        
+        PERF_OVERLAY.draw(self.screen)
+        pygame.display.flip()
     
     def apply_sound_settings(self):
         # Apply sound volume to all sound effects
-        volume = self.sound_slider.value / 100
-        if TAP_SOUND:
-            TAP_SOUND.set_volume(volume)
-        if MEOW_SOUND:
-            MEOW_SOUND.set_volume(volume)
-        if PURR_SOUND:
-            PURR_SOUND.set_volume(volume)
-        if BONE_SOUND:
-            BONE_SOUND.set_volume(volume)
-        if MOUSE_SOUND:
-            MOUSE_SOUND.set_volume(volume)
+        SOUNDS.set_volume(self.sound_slider.value / 100)
     
     def save_settings(self):
         # Save settings to global settings dict
@@ -732,6 +1903,8 @@ class Settings:
         SETTINGS["reload_key"] = self.reload_key_control.key
         # Save graphics mode
         SETTINGS["graphics_mode"] = "food" if self.graphics_toggle.current_option == "Cat Food" else "fruits"
+        SETTINGS["game_variant"] = self.variant_toggle.current_option.lower()
+        SETTINGS["difficulty"] = self.difficulty_toggle.current_option.lower()
         
         # Apply sound settings
         apply_sound_settings()
@@ -747,16 +1920,16 @@ class Settings:
             else:
                 PENALTY_IMAGE = load_image('bones.png')  # Use bones for food mode
         
-        # Save to file
-        save_settings(SETTINGS)
+        # Save to file (a copy, as the write may happen on the I/O thread)
+        run_io(save_settings, dict(SETTINGS))
 
 class Records:
     def __init__(self, screen):
         self.screen = screen
         self.running = True
-        self.font = pygame.font.SysFont("Arial", 24)
-        self.title_font = pygame.font.SysFont("Arial", 36)
-        self.small_font = pygame.font.SysFont("Arial", 18)
+        self.font = FONTS.get(24)
+        self.title_font = FONTS.get(36)
+        self.small_font = FONTS.get(18)
         
         # Create back button
         self.back_button = Button(
@@ -768,57 +1941,77 @@ class Records:
             self.font
         )
         
-        # Load game history
-        self.history = load_game_history()
-        
-    def run(self):
-        clock = pygame.time.Clock()
-        
-        while self.running:
-            mouse_pos = pygame.mouse.get_pos()
-            
-            # Check for hover state changes
-            hover_changed = self.back_button.check_hover(mouse_pos)
-            
-            # Play sound on hover change
-            if hover_changed and TAP_SOUND:
-                TAP_SOUND.play()
-            
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    pygame.quit()
-                    sys.exit()
-                    
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.running = False
-                        return
-                        
-                # Check back button
-                if self.back_button.is_clicked(mouse_pos, event):
+        # Game history of the chosen variant, loaded by enter() on the I/O thread
+        self.history_mtime = None
+        self.variant = None
+        self.food_goal = FOOD_GOAL
+        self.history = []
+    
+    async def enter(self):
+        # The screen is kept between visits; queued behind any pending
+        # history write on the I/O thread, so a just-finished game shows up
+        await run_io(self.reload_history)
+    
+    def reload_history(self):
+        # Reload only when the history file or the chosen variant changed since the last load
+        mtime = get_file_mtime(HISTORY_FILE)
+        rules = get_game_rules()
+        if mtime != self.history_mtime or rules["variant"] != self.variant:
+            self.history_mtime = mtime
+            self.variant = rules["variant"]
+            self.food_goal = rules["food_goal"]
+            self.history = [game for game in load_game_history() if record_variant(game) == self.variant]
+    
+    def step(self):
+        # Handle events and draw one frame
+        mouse_pos = pygame.mouse.get_pos()
+        
+        # Check for hover state changes
+        hover_changed = self.back_button.check_hover(mouse_pos)
+        
+        # Play sound on hover change
+        if hover_changed:
+            SOUNDS.play("tap")
+        
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                # Quit the game once the scenes have left
+                self.running = False
+                self.quit_requested = True
+                return
+                
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
                     self.running = False
                     return
-            
-            # Draw the records screen
-            self.screen.fill(WHITE)
-            
-            # Draw title
-            title_text = self.title_font.render("Game Records", True, DARK_BLUE)
-            title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 40))
-            self.screen.blit(title_text, title_rect)
-            
-            # Draw top-5 table
-            self.draw_top_records()
-            
-            # Draw bar chart
-            self.draw_bar_chart()
-            
-            # Draw back button
-            self.back_button.draw(self.screen)
-            
-            pygame.display.flip()
-            clock.tick(60)
+                PERF_OVERLAY.handle_event(event)
+                    
+            # Check back button
+            if self.back_button.is_clicked(mouse_pos, event):
+                self.running = False
+                return
+        
+        # Draw the records screen
+        self.screen.fill(WHITE)
+        
+        # Draw title
+        title = f"Game Records ({self.variant.capitalize()})" if self.variant else "Game Records"
+        title_text = self.title_font.render(title, True, DARK_BLUE)
+        title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 40))
+        self.screen.blit(title_text, title_rect)
+        count_text()
+        
+        # Draw top-5 table
+        self.draw_top_records()
+        
+        # Draw bar chart
+        self.draw_bar_chart()
+        
+        # Draw back button
+        self.back_button.draw(self.screen)
+        
+        PERF_OVERLAY.draw(self.screen)
+        pygame.display.flip()
     
     def draw_top_records(self):
         # Draw table header
@@ -846,6 +2039,7 @@ class Records:
             text = self.font.render(header, True, WHITE)
             text_rect = text.get_rect(center=(col_x + col_width/2, header_y))
             self.screen.blit(text, text_rect)
+        count_text(len(headers))
         
         # Draw separator line
         pygame.draw.line(self.screen, BLACK, (table_x, table_y + row_height), (table_x + table_width, table_y + row_height), 2)
@@ -885,21 +2079,23 @@ class Records:
             text_rect = text.get_rect(center=(col_x, row_y))
             self.screen.blit(text, text_rect)
             
+            count_text(4)  # Rank, date, score and time
+            
             # Stars
             stars_x = table_x + sum(col_widths[:4]) * table_width + col_widths[4] * table_width / 2
             self.draw_stars(stars_x, row_y, record["stars"])
     
     def draw_stars(self, x, y, stars_count):
-        star_size = 20
+        star_size = RECORDS_STAR_SIZE
         spacing = 5
         total_width = stars_count * star_size + (stars_count - 1) * spacing
         start_x = x - total_width / 2
+        star_image = get_star_image(star_size)
         
         for i in range(stars_count):
             star_x = start_x + i * (star_size + spacing)
-            star_rect = FILLED_STAR.get_rect(topleft=(star_x, y - star_size/2))
-            star_image = pygame.transform.scale(FILLED_STAR, (star_size, star_size))
-            self.screen.blit(star_image, star_rect)
+            self.screen.blit(star_image, (star_x, y - star_size/2))
+        METRICS.count("blits", stars_count)
     
     def draw_bar_chart(self):
         # Draw line graph of last 10 games
@@ -912,6 +2108,7 @@ class Records:
         title_text = self.font.render("Score History (Last 10 Games)", True, DARK_BLUE)
         title_rect = title_text.get_rect(midtop=(chart_x + chart_width/2, chart_y - 30))
         self.screen.blit(title_text, title_rect)
+        count_text()
         
         # Draw chart background
         pygame.draw.rect(self.screen, GRAY, (chart_x, chart_y, chart_width, chart_height), border_radius=5)
@@ -924,11 +2121,12 @@ class Records:
             no_data_text = self.font.render("No game history data available", True, BLACK)
             no_data_rect = no_data_text.get_rect(center=(chart_x + chart_width/2, chart_y + chart_height/2))
             self.screen.blit(no_data_text, no_data_rect)
+            count_text()
             return
         
         # Find max score for scaling
         max_score = max([game["score"] for game in recent_games])
-        max_score = max(max_score, FOOD_GOAL)  # Ensure goal line is visible
+        max_score = max(max_score, self.food_goal)  # Ensure goal line is visible
         # Round up max_score to nearest 30 for cleaner y-axis labels
         max_score = ((max_score + 29) // 30) * 30
         
@@ -955,6 +2153,7 @@ class Records:
             score_label = self.small_font.render(str(score_value), True, BLACK)
             label_rect = score_label.get_rect(midright=(chart_x + y_axis_padding, y_pos))
             self.screen.blit(score_label, label_rect)
+        count_text(grid_steps + 1)
         
         # Calculate positions for dots
         dot_radius = 6
@@ -982,7 +2181,7 @@ class Records:
         # Draw dots and score labels
         for x_pos, y_pos, score in dot_positions:
             # Draw dot with color based on whether goal was reached
-            dot_color = GREEN if score >= FOOD_GOAL else BLUE
+            dot_color = GREEN if score >= self.food_goal else BLUE
             pygame.draw.circle(self.screen, dot_color, (int(x_pos), int(y_pos)), dot_radius)
             pygame.draw.circle(self.screen, BLACK, (int(x_pos), int(y_pos)), dot_radius, 1)  # Outline
             
@@ -999,11 +2198,11 @@ class Records:
             self.screen.blit(score_text, score_rect)
         
         # Draw goal line
-        goal_y = bar_bottom - (FOOD_GOAL / max_score) * (chart_height - 50)
+        goal_y = bar_bottom - (self.food_goal / max_score) * (chart_height - 50)
         pygame.draw.line(self.screen, RED, (chart_x + y_axis_padding, goal_y), (chart_x + chart_width - 10, goal_y), 2)
         
         # Draw goal label
-        goal_text = self.small_font.render(f"Goal: {FOOD_GOAL}", True, RED)
+        goal_text = self.small_font.render(f"Goal: {self.food_goal}", True, RED)
         goal_rect = goal_text.get_rect(midright=(chart_x + chart_width - 15, goal_y - 5))
         
         # Add background to goal label for better visibility
@@ -1013,14 +2212,15 @@ class Records:
         pygame.draw.rect(self.screen, RED, bg_rect, 1)
         
         self.screen.blit(goal_text, goal_rect)
+        count_text(len(dot_positions) + 1)  # Score labels and the goal label
 
 class MainMenu:
     def __init__(self, screen):
         self.screen = screen
         self.running = True
-        self.font = pygame.font.SysFont("Arial", 36)
-        self.title_font = pygame.font.SysFont("Arial", 64)
-        self.small_font = pygame.font.SysFont("Arial", 18)
+        self.font = FONTS.get(36)
+        self.title_font = FONTS.get(64)
+        self.small_font = FONTS.get(18)
         
         # Get current graphics mode
         self.is_fruits_mode = SETTINGS.get("graphics_mode") == "fruits"
@@ -1082,11 +2282,26 @@ class MainMenu:
         # Instructions panel state
         self.show_instructions = False
         
+        # Name of the screen to open next, picked up by the scene manager
+        self.next_scene = None
+        
+        # Overlay and instructions panel, rendered once per graphics mode and variant
+        self.instructions_surface = None
+        self.instructions_mode = None
+        
     def draw_instructions(self):
-        # Draw semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))  # Semi-transparent black
-        self.screen.blit(overlay, (0, 0))
+        mode = (self.is_fruits_mode, SETTINGS.get("game_variant"))
+        if self.instructions_surface is None or self.instructions_mode != mode:
+            self.instructions_surface = self.render_instructions()
+            self.instructions_mode = mode
+        self.screen.blit(self.instructions_surface, (0, 0))
+        METRICS.count("blits")
+    
+    def render_instructions(self):
+        # Semi-transparent overlay with the panel on top, as one surface
+        surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        METRICS.count("surfaces")
+        surface.fill((0, 0, 0, 180))  # Semi-transparent black
         
         # Draw instructions panel
         # Original size: 500x400
@@ -1097,135 +2312,293 @@ class MainMenu:
         panel_y = (SCREEN_HEIGHT - panel_height) // 2
         
         # Draw panel background
-        pygame.draw.rect(self.screen, WHITE, (panel_x, panel_y, panel_width, panel_height), border_radius=10)
-        pygame.draw.rect(self.screen, BLACK, (panel_x, panel_y, panel_width, panel_height), 2, border_radius=10)
+        pygame.draw.rect(surface, WHITE, (panel_x, panel_y, panel_width, panel_height), border_radius=10)
+        pygame.draw.rect(surface, BLACK, (panel_x, panel_y, panel_width, panel_height), 2, border_radius=10)
         
         # Draw instructions title
         title_text = self.font.render("Instructions", True, DARK_BLUE)
         title_rect = title_text.get_rect(midtop=(panel_x + panel_width // 2, panel_y + 25))
-        self.screen.blit(title_text, title_rect)
+        surface.blit(title_text, title_rect)
         
-        # Get dynamic instructions based on current graphics mode
-        instructions = get_instructions(self.is_fruits_mode)
+        # Get dynamic instructions based on current graphics mode and variant
+        instructions = get_instructions(self.is_fruits_mode, get_game_rules())
         
         # Draw instructions text
         line_height = 26  # Slightly increased line height for better readability
         for i, line in enumerate(instructions):
             text = self.small_font.render(line, True, BLACK)
             rect = text.get_rect(topleft=(panel_x + 40, panel_y + 80 + i * line_height))
-            self.screen.blit(text, rect)
+            surface.blit(text, rect)
         
         # Draw close button
         close_text = self.small_font.render("Close (ESC or click)", True, BLUE)
         close_rect = close_text.get_rect(midbottom=(panel_x + panel_width // 2, panel_y + panel_height - 25))
-        self.screen.blit(close_text, close_rect)
+        surface.blit(close_text, close_rect)
+        count_text(len(instructions) + 2)  # Title, lines and close hint
+        return surface
     
-    def run(self):
+    async def enter(self):
         # Start background music
-        try:
-            pygame.mixer.music.load(BACKGROUND_MUSIC)
-            # Volume is already set by apply_sound_settings
-            pygame.mixer.music.play(-1)  # -1 means loop indefinitely
-        except pygame.error as e:
-            print(f"Error playing background music: {e}")
-            
-        clock = pygame.time.Clock()
+        SOUNDS.play_music()
+    
+    def step(self):
+        # Handle events and draw one frame
+        mouse_pos = pygame.mouse.get_pos()
         
-        while self.running:
-            mouse_pos = pygame.mouse.get_pos()
-            
-            # Check for hover state changes
-            hover_changed = False
+        # Check for hover state changes
+        hover_changed = False
+        
+        if not self.show_instructions:
+            hover_changed |= self.play_button.check_hover(mouse_pos)
+            hover_changed |= self.records_button.check_hover(mouse_pos)
+            hover_changed |= self.settings_button.check_hover(mouse_pos)
+            hover_changed |= self.quit_button.check_hover(mouse_pos)
+            hover_changed |= self.help_button.check_hover(mouse_pos)
             
-            if not self.show_instructions:
-                hover_changed |= self.play_button.check_hover(mouse_pos)
-                hover_changed |= self.records_button.check_hover(mouse_pos)
-                hover_changed |= self.settings_button.check_hover(mouse_pos)
-                hover_changed |= self.quit_button.check_hover(mouse_pos)
-                hover_changed |= self.help_button.check_hover(mouse_pos)
+            # Play sound on hover change
+            if hover_changed:
+                SOUNDS.play("tap")
+        
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                # Quit the game once the scenes have left
+                self.running = False
+                self.quit_requested = True
+                return
                 
-                # Play sound on hover change
-                if hover_changed and TAP_SOUND:
-                    TAP_SOUND.play()
-            
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    pygame.quit()
-                    sys.exit()
-                    
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE and self.show_instructions:
-                        self.show_instructions = False
-                    
-                # Check button clicks if not showing instructions
-                elif not self.show_instructions:
-                    if self.play_button.is_clicked(mouse_pos, event):
-                        # Start the game
-                        game = Game()
-                        game.run()
-                        # When game exits, we're back at the menu
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE and self.show_instructions:
+                    self.show_instructions = False
+                else:
+                    PERF_OVERLAY.handle_event(event)
+                
+            # Check button clicks if not showing instructions
+            elif not self.show_instructions:
+                if self.play_button.is_clicked(mouse_pos, event):
+                    # Start or resume the game; when it exits, we're back at the menu
+                    self.next_scene = "game"
+                
+                elif self.records_button.is_clicked(mouse_pos, event):
+                    # Show records screen
+                    self.next_scene = "records"
                     
-                    elif self.records_button.is_clicked(mouse_pos, event):
-                        # Show records screen
-                        records_screen = Records(self.screen)
-                        records_screen.run()
-                        
-                    elif self.settings_button.is_clicked(mouse_pos, event):
-                        # Open settings screen - pass self reference for hot reload
-                        settings_screen = Settings(self.screen, self)
-                        settings_screen.run()
-                            
-                    elif self.help_button.is_clicked(mouse_pos, event):
-                        # Show instructions
-                        self.show_instructions = True
-                        if TAP_SOUND:
-                            TAP_SOUND.play()
+                elif self.settings_button.is_clicked(mouse_pos, event):
+                    # Open settings screen
+                    self.next_scene = "settings"
                         
-                    elif self.quit_button.is_clicked(mouse_pos, event):
-                        self.running = False
-                        pygame.quit()
-                        sys.exit()
-                
-                # Close instructions panel on click
-                elif self.show_instructions and event.type == pygame.MOUSEBUTTONDOWN:
-                    self.show_instructions = False
-            
-            # Draw the menu
-            self.screen.fill(WHITE)
-            
-            # Draw title
-            title_text = self.title_font.render("Kitty Snack Sprint", True, DARK_BLUE)
-            title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4))
-            self.screen.blit(title_text, title_rect)
-            
-            # Draw buttons if not showing instructions
-            if not self.show_instructions:
-                self.play_button.draw(self.screen)
-                self.records_button.draw(self.screen)
-                self.settings_button.draw(self.screen)
-                self.quit_button.draw(self.screen)
-                self.help_button.draw(self.screen)
-            else:
-                # Draw instructions panel
-                self.draw_instructions()
+                elif self.help_button.is_clicked(mouse_pos, event):
+                    # Show instructions
+                    self.show_instructions = True
+                    SOUNDS.play("tap")
+                    
+                elif self.quit_button.is_clicked(mouse_pos, event):
+                    # Leaving the root scene ends the scene loop
+                    self.running = False
             
-            pygame.display.flip()
-            clock.tick(60)
+            # Close instructions panel on click
+            elif self.show_instructions and event.type == pygame.MOUSEBUTTONDOWN:
+                self.show_instructions = False
+        
+        # Draw the menu
+        self.screen.fill(WHITE)
+        
+        # Draw title
+        title_text = self.title_font.render("Kitty Snack Sprint", True, DARK_BLUE)
+        title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4))
+        self.screen.blit(title_text, title_rect)
+        count_text()
+        
+        # Draw buttons if not showing instructions
+        if not self.show_instructions:
+            self.play_button.draw(self.screen)
+            self.records_button.draw(self.screen)
+            self.settings_button.draw(self.screen)
+            self.quit_button.draw(self.screen)
+            self.help_button.draw(self.screen)
+        else:
+            # Draw instructions panel
+            self.draw_instructions()
+        
+        PERF_OVERLAY.draw(self.screen)
+        pygame.display.flip()
+        finish_startup_profile()
+
+class FreeCellIndex:
+    # Cells without a mouse, bone or the kitty, kept in a list for O(1) random
+    # sampling plus a dict of cell -> list index for O(1) swap-remove
+    def __init__(self, cells=()):
+        self.cells = []
+        self.positions = {}
+        for cell in cells:
+            self.add(cell)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.positions
+
+    def add(self, cell):
+        if cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def remove(self, cell):
+        # Move the last cell into the removed slot so nothing has to shift
+        index = self.positions.pop(cell, None)
+        if index is None:
+            return
+        last = self.cells.pop()
+        if index < len(self.cells):
+            self.cells[index] = last
+            self.positions[last] = index
+
+    def sample(self):
+        return random.choice(self.cells) if self.cells else None
+
+class ChainSelection:
+    # The selected chain plus running tallies of the food, mice and bones on
+    # it, updated as cells are appended or the chain is truncated. on_change
+    # is called after every change so dependent caches can be invalidated
+    def __init__(self, cells=(), mice=(), bones=(), foods=None, on_change=None):
+        self.cells = []
+        self.foods = []  # Food on each selected cell when it was selected
+        self.members = set()
+        self.mice = mice
+        self.bones = bones
+        self.food_count = 0
+        self.mice_count = 0
+        self.bones_count = 0
+        self.first_food = None  # Food type the rest of the chain has to match
+        self.first_food_index = None
+        self.on_change = None
+        for index, cell in enumerate(cells):
+            self.append(cell, foods[index] if foods else None)
+        self.on_change = on_change
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __getitem__(self, index):
+        return self.cells[index]
+
+    def __contains__(self, cell):
+        return cell in self.members
+
+    def __eq__(self, other):
+        if isinstance(other, ChainSelection):
+            return self.cells == other.cells
+        return self.cells == other
+
+    def __repr__(self):
+        return f"ChainSelection({self.cells!r})"
+
+    def index(self, cell):
+        return self.cells.index(cell)
+
+    def copy(self):
+        return list(self.cells)
+
+    def tally(self, cell, amount):
+        if cell in self.mice:
+            self.mice_count += amount
+        elif cell in self.bones:
+            self.bones_count += amount
+        else:
+            self.food_count += amount
+
+    def changed(self):
+        if self.on_change:
+            self.on_change()
+
+    def find_first_food(self, start=0):
+        # First selected cell holding food (mice and bones don't count)
+        self.first_food = self.first_food_index = None
+        for index in range(start, len(self.cells)):
+            cell, food = self.cells[index], self.foods[index]
+            if food is not None and cell not in self.mice and cell not in self.bones:
+                self.first_food, self.first_food_index = food, index
+                return
+
+    def append(self, cell, food=None):
+        self.cells.append(cell)
+        self.foods.append(food)
+        self.members.add(cell)
+        self.tally(cell, 1)
+        if self.first_food is None and food is not None and cell not in self.mice and cell not in self.bones:
+            self.first_food, self.first_food_index = food, len(self.cells) - 1
+        self.changed()
+
+    def truncate(self, index):
+        # Drop the cell at index and every cell after it
+        for cell in self.cells[index:]:
+            self.members.discard(cell)
+            self.tally(cell, -1)
+        del self.cells[index:]
+        del self.foods[index:]
+        if self.first_food_index is not None and self.first_food_index >= index:
+            self.first_food = self.first_food_index = None
+        self.changed()
+
+    def clear(self):
+        self.truncate(0)
+
+    def recount(self, mice, bones):
+        # Needed when mice or bones change under the selected cells
+        self.mice = mice
+        self.bones = bones
+        self.food_count = self.mice_count = self.bones_count = 0
+        for cell in self.cells:
+            self.tally(cell, 1)
+        self.find_first_food()
+        self.changed()
+
+    @property
+    def result(self):
+        if len(self.cells) < 2:
+            return 0
+        food_points = self.food_count
+        mouse_points = self.mice_count * 4
+        bones_penalty = self.bones_count * -10  # -10 points per bone
+        return food_points + mouse_points + bones_penalty
 
 class Game:
-    def __init__(self):
+    def __init__(self, rules=None, game_clock=None):
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Kitty Snack Sprint")
         
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("Arial", 24)
-        self.small_font = pygame.font.SysFont("Arial", 18)
-        self.large_font = pygame.font.SysFont("Arial", 36)
+        # Game time for the timer and animations (injectable for tests)
+        self.game_clock = game_clock or GameClock()
         
-        # Reload food images based on current settings
-        global ALL_FOOD_IMAGES
-        ALL_FOOD_IMAGES = load_all_foods()
+        # Board size, move limit, goal and hazard cadence for this game
+        self.rules = rules or get_game_rules()
+        self.variant = self.rules.get("variant", "classic")
+        self.grid_size = self.rules["grid_size"]
+        self.max_moves = self.rules["max_moves"]
+        self.food_goal = self.rules["food_goal"]
+        
+        # Fit the board into the fixed window: bigger boards get smaller cells
+        if self.grid_size <= GRID_SIZE:
+            self.margin = MARGIN
+        else:
+            self.margin = max(2, MARGIN * GRID_SIZE // self.grid_size)
+        self.cell_size = (SCREEN_WIDTH - (self.grid_size + 1) * self.margin) // self.grid_size
+        self.board_offset = (SCREEN_WIDTH - self.grid_size * (self.cell_size + self.margin) - self.margin) // 2
+        
+        self.running = True
+        self.font = FONTS.get(24)
+        self.small_font = FONTS.get(18)
+        self.large_font = FONTS.get(36)
+        self.dim_overlay = None  # Black overlay of the results screen, alpha set per frame
+        
+        # Sprites sized for this board
+        self.mouse_image = self.fit_sprite(MOUSE_IMAGE)
+        self.kitty_image = self.fit_sprite(KITTY_IMAGE)
+        self.penalty_image = self.fit_sprite(PENALTY_IMAGE)
+        self.arrow_image = self.fit_sprite(ARROW_IMAGE)
         
         # Set appropriate terminology based on graphics mode
         self.is_fruits_mode = SETTINGS.get("graphics_mode") == "fruits"
@@ -1247,40 +2620,71 @@ class Game:
             40
         )
         
-        # Load best score and time
-        self.best_score, self.best_time = get_best_score()
-        
-        # Start background music
-        self.start_background_music()
+        # Best score and time, and the food images for the graphics mode,
+        # are read from disk by the first enter()
+        self.best_score, self.best_time = 0, float('inf')
+        self.assets_loaded = False
         
         self.reset_game()
         
-    def start_background_music(self):
-        try:
-            # If music is already playing, no need to restart it
-            if not pygame.mixer.music.get_busy():
-                pygame.mixer.music.load(BACKGROUND_MUSIC)
-                # Volume is already set by apply_sound_settings
-                pygame.mixer.music.play(-1)  # -1 means loop indefinitely
-        except pygame.error as e:
-            print(f"Error playing background music: {e}")
-        
+    def fit_sprite(self, image):
+        # Scale a cell image to this board's cell size and convert it to the
+        # display format once, so the per-cell blits stay cheap on big boards
+        size = self.cell_size - 10 * self.cell_size // CELL_SIZE
+        if image.get_size() != (size, size):
+            image = pygame.transform.smoothscale(image, (size, size))
+        return image.convert_alpha()
+    
+    def cell_origin(self, row, col):
+        # Top-left pixel of a cell
+        return (self.board_offset + col * (self.cell_size + self.margin) + self.margin,
+                self.board_offset + row * (self.cell_size + self.margin) + self.margin)
+    
+    def cell_center(self, row, col):
+        # Accepts fractional rows and columns for animated positions
+        x = self.board_offset + col * (self.cell_size + self.margin) + self.margin + self.cell_size // 2
+        y = self.board_offset + row * (self.cell_size + self.margin) + self.margin + self.cell_size // 2
+        return x, y
+    
+    def cell_at(self, pos, inset=0):
+        # Grid cell under a screen position, or None outside the board. A
+        # positive inset shrinks each cell's hit area by that many pixels a side
+        pitch = self.cell_size + self.margin
+        x = pos[0] - self.board_offset - self.margin
+        y = pos[1] - self.board_offset - self.margin
+        row, col = y // pitch, x // pitch
+        if not (0 <= row < self.grid_size and 0 <= col < self.grid_size):
+            return None
+        if inset and not all(inset <= offset % pitch < self.cell_size - inset for offset in (x, y)):
+            return None
+        return row, col
+    
     def reset_game(self):
         # Select random food types for this game
         self.select_game_foods()
         
         # Initialize game state
-        self.board = [[random.choice(self.foods) for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.mice = []  # List to store mouse positions [(x, y), ...]
-        self.bones = []  # List to store bone positions [(x, y), ...]
+        # Opening board from the library for the chosen difficulty, or a
+        # generated board with a decent food group next to the kitty
+        self.board_seed = random.getrandbits(32)
+        self.board = self.opening_board(self.board_seed)
+        if self.board is None:
+            self.board = generate_board(self.foods, self.rules, (self.grid_size // 2, self.grid_size // 2))
+        self._mice = set()  # Set of mouse positions {(x, y), ...}
+        self._bones = set()  # Set of bone positions {(x, y), ...}
+        self._legal_cells = None  # Cached legal next cells, see legal_cells
         self.selected_cells = []  # List to store selected cells
+        self.dragging = False  # Left button held down after pressing it on the board
+        self.drag_cell = None  # Cell the dragging pointer was last seen in
         self.score = 0
         self.fruits_collected = 0
         self.moves = 0
         self.game_over = False
         self.game_won = False
         self.final_move = False  # Flag to track if this is the final move
-        self.start_time = time.time()
+        self.start_time = self.game_clock.now
+        self.sim_time = 0.0  # Seconds of simulated game time, drives all animations
+        self.accumulator = 0.0  # Frame time not yet simulated
         self.elapsed_time = 0
         self.stars_earned = 0
         self.show_results = False
@@ -1291,6 +2695,9 @@ class Game:
         
         # Animation variables
         self.dim_alpha = 0  # Opacity of the dim overlay (0-180)
+        self.results_panel_base = None  # Results panel without score and stars, rendered once per game
+        self.results_panel = None
+        self.results_panel_key = None  # (score, stars) shown on results_panel
         self.panel_y_offset = -400  # Start position off-screen
         self.animation_start_time = 0
         self.animation_in_progress = False
@@ -1307,6 +2714,7 @@ class Game:
         self.kitty_start_pos = None
         self.kitty_target_pos = None
         self.kitty_current_pos = None  # Floating point position for smooth animation
+        self.kitty_previous_pos = None  # Position before the last update step, for interpolation
         self.animation_path = []  # Path of cells for kitty to follow
         self.current_path_index = 0  # Current position in the animation path
         
@@ -1325,49 +2733,154 @@ class Game:
         self.points_popup_time = 0
         
         # Place kitty in the middle of the board
-        self.kitty_pos = (GRID_SIZE // 2, GRID_SIZE // 2)  # (3,3) for a 7x7 grid
+        self._kitty_pos = (self.grid_size // 2, self.grid_size // 2)  # (3,3) for a 7x7 grid
+        self.rebuild_free_cells()
         
         # Remove food from kitty's position
         kitty_row, kitty_col = self.kitty_pos
         self.board[kitty_row][kitty_col] = None
     
+    # Mice, bones and the kitty position keep the free cell index in sync when
+    # they are replaced; in-place changes must update self.free_cells too.
+    # Mice and bones are stored as sets, whatever collection is assigned
+    @property
+    def mice(self):
+        return self._mice
+
+    @mice.setter
+    def mice(self, mice):
+        self._mice = set(mice)
+        self.rebuild_free_cells()
+        self._selected_cells.recount(self._mice, self._bones)
+
+    @property
+    def bones(self):
+        return self._bones
+
+    @bones.setter
+    def bones(self, bones):
+        self._bones = set(bones)
+        self.rebuild_free_cells()
+        self._selected_cells.recount(self._mice, self._bones)
+
+    @property
+    def selected_cells(self):
+        return self._selected_cells
+
+    @selected_cells.setter
+    def selected_cells(self, cells):
+        foods = [self.board[row][col] for row, col in cells]
+        self._selected_cells = ChainSelection(cells, self._mice, self._bones, foods,
+                                              on_change=self.invalidate_legal_cells)
+        self.invalidate_legal_cells()
+
+    @property
+    def kitty_pos(self):
+        return self._kitty_pos
+
+    @kitty_pos.setter
+    def kitty_pos(self, pos):
+        old_pos = self._kitty_pos
+        self._kitty_pos = pos
+        if old_pos not in self._mice and old_pos not in self._bones:
+            self.free_cells.add(old_pos)
+        self.free_cells.remove(pos)
+        self.invalidate_legal_cells()
+
+    # Cells that can legally extend the current chain, recomputed from the
+    # last selected cell's neighbours only after the chain or board changed.
+    # Code that writes to self.board must call invalidate_legal_cells()
+    @property
+    def legal_cells(self):
+        if self._legal_cells is None:
+            self._legal_cells = self.find_legal_cells()
+        return self._legal_cells
+
+    def invalidate_legal_cells(self):
+        self._legal_cells = None
+
+    def find_legal_cells(self):
+        # Nothing can be selected while the kitty moves and the eaten cells
+        # are refilled: the board holds None there, so the chain's food type
+        # would be read from cells that are about to change
+        if self.kitty_animation_active or self.fruit_replacement_active:
+            return set()
+        chain = self.selected_cells
+        anchor_row, anchor_col = chain.cells[-1] if chain.cells else self.kitty_pos
+        legal = set()
+        for row in range(max(anchor_row - 1, 0), min(anchor_row + 2, self.grid_size)):
+            for col in range(max(anchor_col - 1, 0), min(anchor_col + 2, self.grid_size)):
+                cell = (row, col)
+                if cell == self.kitty_pos or cell in chain.members:
+                    continue
+                # The first cell only has to be next to the kitty; after that
+                # mice and bones always fit and food has to match the chain
+                if (not chain.cells or chain.first_food is None
+                        or cell in self.mice or cell in self.bones
+                        or self.board[row][col] is None or self.board[row][col] == chain.first_food):
+                    legal.add(cell)
+        return legal
+
+    def rebuild_free_cells(self):
+        occupied = set(self._mice) | set(self._bones) | {self._kitty_pos}
+        self.free_cells = FreeCellIndex((x, y) for x in range(self.grid_size) for y in range(self.grid_size)
+                                        if (x, y) not in occupied)
+    
+    def opening_board(self, seed):
+        # O(1) pick from the opening library; None when it doesn't apply
+        library = get_opening_library()
+        if (library is None or self.grid_size != library.grid_size
+                or len(self.foods) != self.rules["food_items"] or self.rules["food_items"] > OPENING_EMPTY_CODE):
+            return None
+        difficulty = SETTINGS.get("difficulty", "normal")
+        if difficulty not in library.tiers:
+            return None
+        best_chain, codes = library.board(difficulty, seed)
+        cells = [None if code == OPENING_EMPTY_CODE else self.foods[code] for code in codes]
+        return [cells[row * self.grid_size:(row + 1) * self.grid_size] for row in range(self.grid_size)]
+    
     def select_game_foods(self):
         # Select random food types for this game
         all_food_names = list(ALL_FOOD_IMAGES.keys())
         # Ensure we have enough foods to choose from
-        if len(all_food_names) <= FOOD_ITEMS_PER_GAME:
+        food_items = self.rules["food_items"]
+        if len(all_food_names) <= food_items:
             self.foods = all_food_names
         else:
-            self.foods = random.sample(all_food_names, FOOD_ITEMS_PER_GAME)
+            self.foods = random.sample(all_food_names, food_items)
         
         # Create a dictionary of food images for this game
-        self.food_images = {food: ALL_FOOD_IMAGES[food] for food in self.foods}
+        self.food_images = {food: self.fit_sprite(ALL_FOOD_IMAGES[food]) for food in self.foods}
         
         print(f"Selected foods for this game: {self.foods}")
         
     def add_mouse(self):
-        # Add a mouse to a random empty cell if there are fewer than 3 mice
-        if len(self.mice) < 3:
-            empty_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) 
-                          if (x, y) not in self.mice and (x, y) not in self.bones and (x, y) != self.kitty_pos]
-            if empty_cells:
-                pos = random.choice(empty_cells)
-                self.mice.append(pos)
+        # Add a mouse to a random empty cell if there are fewer than the maximum
+        if len(self.mice) < self.rules["max_mice"]:
+            pos = self.free_cells.sample()
+            if pos:
+                self.mice.add(pos)
+                self.free_cells.remove(pos)
+                if pos in self.selected_cells:
+                    self.selected_cells.recount(self.mice, self.bones)
                 # Remove food under mouse
                 row, col = pos
                 self.board[row][col] = None
+                self.invalidate_legal_cells()
     
     def add_bones(self):
-        # Add 2 bones to random empty cells
-        for _ in range(2):
-            empty_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) 
-                          if (x, y) not in self.mice and (x, y) not in self.bones and (x, y) != self.kitty_pos]
-            if empty_cells:
-                pos = random.choice(empty_cells)
-                self.bones.append(pos)
+        # Add bones to random empty cells
+        for _ in range(self.rules["bones_per_spawn"]):
+            pos = self.free_cells.sample()
+            if pos:
+                self.bones.add(pos)
+                self.free_cells.remove(pos)
+                if pos in self.selected_cells:
+                    self.selected_cells.recount(self.mice, self.bones)
                 # Remove food under bone
                 row, col = pos
                 self.board[row][col] = None
+                self.invalidate_legal_cells()
 
     def is_adjacent_to_kitty(self, row, col):
         # Check if the cell is adjacent to the kitty (including diagonals)
@@ -1376,85 +2889,52 @@ class Game:
     
     def calculate_chain_result(self):
         """Calculate the potential result of collecting the current chain"""
-        if len(self.selected_cells) < 2:
-            return 0
-            
-        # Count regular food cells (not mice or bones)
-        regular_food_cells = sum(1 for cell in self.selected_cells 
-                               if cell not in self.mice and cell not in self.bones)
-        mice_caught = sum(1 for mouse in self.mice if mouse in self.selected_cells)
-        bones_caught = sum(1 for bone in self.bones if bone in self.selected_cells)
-        
-        food_points = regular_food_cells
-        mouse_points = mice_caught * 4
-        bones_penalty = bones_caught * -10  # -10 points per bone
-        
-        return food_points + mouse_points + bones_penalty
+        # The selection keeps its food, mouse and bone tallies up to date
+        return self.selected_cells.result
 
     def is_valid_selection(self, row, col):
-        # Check if the cell can be selected
-        
-        # Never allow selecting the kitty's current position
-        if (row, col) == self.kitty_pos:
+        # Check if the cell can be selected: a lookup in the cached legal cells
+        return (row, col) in self.legal_cells
+        
+    def drag_to(self, pos):
+        # Follow a dragging pointer; returns True if the chain changed. Cells
+        # a fast sweep skipped between motion events are filled in along a
+        # straight line from the cell the pointer was last seen in. Each step
+        # out of the end of the chain adds a legal cell, and a step back onto
+        # the cell before the end (or the kitty) drops the end
+        cell = self.cell_at(pos, int(self.cell_size * DRAG_HIT_INSET))
+        if cell is None or self.drag_cell is None or cell == self.drag_cell:
             return False
         
-        # If this is the first selection, it must be adjacent to the kitty
-        if not self.selected_cells:
-            return self.is_adjacent_to_kitty(row, col)
-            
-        # For subsequent selections, check if it's adjacent to the last selected cell
-        last_row, last_col = self.selected_cells[-1]
-        
-        # Check if it's adjacent to the last selected cell (including diagonals)
-        if abs(row - last_row) <= 1 and abs(col - last_col) <= 1:
-            # Check if it's a mouse or bone (can always be selected)
-            if (row, col) in self.mice or (row, col) in self.bones:
-                return (row, col) not in self.selected_cells  # Just make sure we haven't selected it already
-                
-            # If not a mouse or bone, check if it's the same food type as the first selection
-            if (row, col) not in self.selected_cells:  # Make sure it's not already selected
-                # Get the first food in the chain (skip mice and bones)
-                first_food = None
-                for cell_row, cell_col in self.selected_cells:
-                    if (cell_row, cell_col) not in self.mice and (cell_row, cell_col) not in self.bones and self.board[cell_row][cell_col] is not None:
-                        first_food = self.board[cell_row][cell_col]
-                        break
-                
-                # If we couldn't find a food in the chain yet, this is the first food
-                if first_food is None:
-                    return True
-                    
-                current_food = self.board[row][col]
-                # Make sure it's the same food type (if it's not None)
-                return current_food is None or current_food == first_food
-            
-        return False
-        
+        changed = False
+        pointer = self.drag_cell
+        for row, col in grid_line(self.drag_cell, cell):
+            chain = self.selected_cells
+            end = chain[-1] if chain else self.kitty_pos
+            before_end = (chain[-2] if len(chain) > 1 else self.kitty_pos) if chain else None
+            if pointer == end:
+                if (row, col) == before_end:
+                    chain.truncate(len(chain) - 1)
+                    changed = True
+                elif self.is_valid_selection(row, col):
+                    chain.append((row, col), self.board[row][col])
+                    changed = True
+            pointer = (row, col)
+        self.drag_cell = cell
+        return changed
+    
     def is_mouse_on_path(self):
         # Check if the selected path goes through any mice
-        for mouse in self.mice:
-            if mouse in self.selected_cells:
-                return True
-        return False
+        return self.selected_cells.mice_count > 0
         
     def collect_foods(self):
         # Collect selected foods, remove mice on path, and update score
         if len(self.selected_cells) > 1:  # Need at least 2 foods to collect
-            # Calculate points to add
-            # Count regular food cells (not mice or bones)
-            regular_food_cells = sum(1 for cell in self.selected_cells 
-                                   if cell not in self.mice and cell not in self.bones)
-            mice_caught = sum(1 for mouse in self.mice if mouse in self.selected_cells)
-            bones_caught = sum(1 for bone in self.bones if bone in self.selected_cells)
-            
-            food_points = regular_food_cells
-            mouse_points = mice_caught * 4
-            bones_penalty = bones_caught * -10  # -10 points per bone
-            self.total_points_to_add = food_points + mouse_points + bones_penalty
+            # Calculate points to add from the selection's running tallies
+            self.total_points_to_add = self.selected_cells.result
             
             # Play meow sound at the start of the chain
-            if MEOW_SOUND:
-                MEOW_SOUND.play()
+            SOUNDS.play("meow")
             
             # Set up score animation
             self.score_animation_active = True
@@ -1466,7 +2946,7 @@ class Game:
             else:
                 self.points_popup_text = f"+{self.total_points_to_add}"
             self.points_popup_alpha = 255
-            self.points_popup_time = time.time()
+            self.points_popup_time = self.sim_time
             
             # Store old kitty position to fill with food later
             self.old_kitty_pos = self.kitty_pos
@@ -1474,15 +2954,16 @@ class Game:
             # Start kitty movement animation through the selected path
             if self.selected_cells:
                 # Create animation path starting from kitty's current position
-                self.animation_path = [self.kitty_pos] + self.selected_cells
+                self.animation_path = [self.kitty_pos] + self.selected_cells.copy()
                 self.current_path_index = 0  # Start at the beginning of the path
                 
                 # Set up initial animation segment
                 self.kitty_start_pos = self.animation_path[0]
                 self.kitty_target_pos = self.animation_path[1]
                 self.kitty_current_pos = list(self.kitty_start_pos)  # Convert to list for floating point
+                self.kitty_previous_pos = list(self.kitty_start_pos)
                 self.kitty_animation_active = True
-                self.kitty_animation_start_time = time.time()
+                self.kitty_animation_start_time = self.sim_time
                 
                 # Store cells that need to be replaced with new foods later
                 self.cells_to_replace = self.selected_cells.copy()
@@ -1492,111 +2973,112 @@ class Game:
             
             # We'll add a mouse after the animation completes, not here
             # Store if we need to add a mouse
-            self.should_add_mouse = (self.moves % 2 == 0)
+            self.should_add_mouse = (self.moves % self.rules["hazard_interval"] == 0)
             
-            # Add bones every 2 steps
-            self.should_add_bones = (self.moves % 2 == 0)
+            # Add bones every few steps
+            self.should_add_bones = (self.moves % self.rules["hazard_interval"] == 0)
                 
             # Check if this is the final move (but don't end the game yet)
-            if self.moves >= MAX_MOVES:
-                self.elapsed_time = time.time() - self.start_time
+            if self.moves >= self.max_moves:
+                self.elapsed_time = self.game_clock.now - self.start_time
                 # Set a flag to indicate this is the final move
                 # We'll handle the game over state after the animation completes
                 self.final_move = True
                 
         # Clear selection
-        self.selected_cells = []
+        self.selected_cells.clear()
     
     def calculate_stars(self):
         # Calculate stars based on score
-        self.stars_earned = 0
-        if self.fruits_collected < FOOD_GOAL:
-            # Game lost, no stars
-            self.stars_earned = 0
-        else:
-            # Game won, calculate stars based on score
-            for threshold, stars in STAR_THRESHOLDS:
-                if self.fruits_collected >= threshold:
-                    self.stars_earned = stars
+        self.stars_earned = stars_for_score(self.fruits_collected, self.food_goal)
         
     def draw_board(self):
         # Fill the background
         self.screen.fill(WHITE)
         
-        # Draw the grid and fruits
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
+        # Draw the cells and pick their fruits, mice and bones in one pass
+        # over the grid. The sprites are blitted afterwards in one batch:
+        # SDL is faster filling all the cells and then blending all the
+        # sprites than alternating between the two
+        show_targets = not self.game_over and not self.kitty_animation_active
+        legal_cells = self.legal_cells if show_targets else ()
+        cell_size = self.cell_size
+        screen = self.screen
+        selected = self.selected_cells
+        last_selected = selected[-1] if selected else None
+        mice, bones, kitty_pos = self.mice, self.bones, self.kitty_pos
+        half_cell = cell_size // 2
+        sprites = []
+        for row in range(self.grid_size):
+            board_row = self.board[row]
+            for col in range(self.grid_size):
                 # Calculate position
-                x = col * (CELL_SIZE + MARGIN) + MARGIN
-                y = row * (CELL_SIZE + MARGIN) + MARGIN
+                cell = (row, col)
+                x, y = self.cell_origin(row, col)
                 
                 # Draw cell background
                 cell_color = GRAY
                 
                 # Highlight selected cells
-                if (row, col) in self.selected_cells:
-                    if (row, col) == self.selected_cells[-1]:
+                if cell in selected:
+                    if cell == last_selected:
                         cell_color = (100, 100, 255)  # Light blue for most recent
                     else:
                         cell_color = BLUE
+                # Hint at the cells that can extend the chain
+                elif show_targets and cell in legal_cells:
+                    cell_color = LEGAL_TARGET
                         
-                pygame.draw.rect(self.screen, cell_color, (x, y, CELL_SIZE, CELL_SIZE))
-                
-                # Draw food image (if there is one and no mouse, bone, or kitty)
-                food_type = self.board[row][col]
-                if food_type is not None and (row, col) not in self.mice and (row, col) not in self.bones and (row, col) != self.kitty_pos:
-                    food_image = self.food_images[food_type]
-                    food_rect = food_image.get_rect(center=(x + CELL_SIZE // 2, y + CELL_SIZE // 2))
-                    self.screen.blit(food_image, food_rect)
-                
-                # Draw mouse if present
-                if (row, col) in self.mice:
-                    mouse_rect = MOUSE_IMAGE.get_rect(center=(x + CELL_SIZE // 2, y + CELL_SIZE // 2))
-                    self.screen.blit(MOUSE_IMAGE, mouse_rect)
+                pygame.draw.rect(screen, cell_color, (x, y, cell_size, cell_size))
                 
-                # Draw bone if present
-                if (row, col) in self.bones:
-                    bones_rect = PENALTY_IMAGE.get_rect(center=(x + CELL_SIZE // 2, y + CELL_SIZE // 2))
-                    self.screen.blit(PENALTY_IMAGE, bones_rect)
+                # Mouse or bone if present, otherwise the food image (if
+                # there is one and the kitty isn't there)
+                if cell in mice:
+                    image = self.mouse_image
+                elif cell in bones:
+                    image = self.penalty_image
+                elif board_row[col] is not None and cell != kitty_pos:
+                    image = self.food_images[board_row[col]]
+                else:
+                    continue
+                sprites.append((image, image.get_rect(center=(x + half_cell, y + half_cell))))
+        PROFILER.mark("grid")
         
-        # Update kitty animation if active
-        if self.kitty_animation_active:
-            self.update_kitty_animation()
+        # Draw fruits, mice and bones
+        screen.blits(sprites, doreturn=False)
+        METRICS.count("blits", len(sprites))
+        PROFILER.mark("sprites")
         
-        # Update fruit replacement animation if active
-        if self.fruit_replacement_active:
-            self.update_fruit_replacement()
-            
-        # Update score animation if active
-        if self.score_animation_active:
-            self.update_score_animation()
-            
         # Draw kitty at its current position (animated or static)
         if self.kitty_animation_active:
-            # Draw kitty at animated position
-            row, col = self.kitty_current_pos
-            x = col * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-            y = row * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-            kitty_rect = KITTY_IMAGE.get_rect(center=(x, y))
-            self.screen.blit(KITTY_IMAGE, kitty_rect)
+            # Draw kitty between its last two update steps
+            alpha = self.accumulator / UPDATE_STEP
+            previous_row, previous_col = self.kitty_previous_pos
+            current_row, current_col = self.kitty_current_pos
+            row = previous_row + (current_row - previous_row) * alpha
+            col = previous_col + (current_col - previous_col) * alpha
+            kitty_rect = self.kitty_image.get_rect(center=self.cell_center(row, col))
+            self.screen.blit(self.kitty_image, kitty_rect)
         else:
             # Draw kitty at static position
             row, col = self.kitty_pos
-            x = col * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-            y = row * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-            kitty_rect = KITTY_IMAGE.get_rect(center=(x, y))
-            self.screen.blit(KITTY_IMAGE, kitty_rect)
+            kitty_rect = self.kitty_image.get_rect(center=self.cell_center(row, col))
+            self.screen.blit(self.kitty_image, kitty_rect)
+        METRICS.count("blits")
+        PROFILER.mark("kitty")
         
         # Draw direction arrows between selected cells
         self.draw_direction_arrows()
+        PROFILER.mark("arrows")
         
         # Draw UI elements
-        current_time = time.time() - self.start_time if not self.game_over else self.elapsed_time
+        current_time = self.game_clock.now - self.start_time if not self.game_over else self.elapsed_time
         
         # Draw score and goal
-        score_text = self.font.render(f"Score: {self.displayed_score}/{FOOD_GOAL}", True, BLACK)
+        score_text = self.font.render(f"Score: {self.displayed_score}/{self.food_goal}", True, BLACK)
         score_rect = score_text.get_rect(topleft=(20, SCREEN_HEIGHT - 80))
         self.screen.blit(score_text, score_rect)
+        texts = 1
         
         # Draw points popup if active
         if self.score_animation_active and self.points_popup_alpha > 0:
@@ -1608,6 +3090,7 @@ class Game:
             # Position next to score
             popup_rect = popup_text.get_rect(left=score_rect.right + 10, centery=score_rect.centery)
             self.screen.blit(popup_text, popup_rect)
+            texts += 1
             
         # Draw chain result preview if there are selected cells
         elif len(self.selected_cells) >= 2 and not self.kitty_animation_active:
@@ -1619,6 +3102,7 @@ class Game:
             preview_text = self.font.render(f"({chain_result:+d})", True, preview_color)
             preview_rect = preview_text.get_rect(left=score_rect.right + 10, centery=score_rect.centery)
             self.screen.blit(preview_text, preview_rect)
+            texts += 1
         
         # Draw timer
         minutes = int(current_time) // 60
@@ -1627,14 +3111,15 @@ class Game:
         self.screen.blit(time_text, (SCREEN_WIDTH - 150, SCREEN_HEIGHT - 80))
         
         # Draw moves
-        moves_text = self.small_font.render(f"Moves: {self.moves}/{MAX_MOVES}", True, 
-                                          RED if self.moves >= MAX_MOVES - 2 else BLACK)
+        moves_text = self.small_font.render(f"Moves: {self.moves}/{self.max_moves}", True, 
+                                          RED if self.moves >= self.max_moves - 2 else BLACK)
         self.screen.blit(moves_text, (20, SCREEN_HEIGHT - 40))
         
         # Draw best score/time
         if self.best_score > 0:
             best_score_text = self.small_font.render(f"Best: {self.best_score} points", True, BLUE)
             self.screen.blit(best_score_text, (SCREEN_WIDTH - 150, SCREEN_HEIGHT - 40))
+            texts += 1
         
         # Draw collect button
         button_color = LIGHT_GREEN if len(self.selected_cells) > 1 else GRAY
@@ -1653,16 +3138,49 @@ class Game:
         reload_text = self.font.render(f"Reload ({self.reload_count})", True, BLACK)
         reload_text_rect = reload_text.get_rect(center=self.reload_button_rect.center)
         self.screen.blit(reload_text, reload_text_rect)
+        texts += 4  # Timer, moves and the two buttons
+        count_text(texts)
+        PROFILER.mark("hud")
         
         # Draw results screen if game is over
+        if self.game_over:
+            self.draw_results_screen()
+            PROFILER.mark("results")
+        
+        # Draw the performance overlay on top of everything
+        PERF_OVERLAY.draw(self.screen)
+    
+    def advance(self, frame_time):
+        # Run as many fixed update steps as the frame time covers; the
+        # remainder carries over and is used to interpolate the render
+        self.accumulator += min(frame_time, MAX_FRAME_TIME)
+        while self.accumulator >= UPDATE_STEP:
+            self.update(UPDATE_STEP)
+            self.accumulator -= UPDATE_STEP
+    
+    def update(self, dt):
+        # Advance the game state by one fixed step
+        self.sim_time += dt
+        
+        if self.kitty_animation_active:
+            self.kitty_previous_pos = list(self.kitty_current_pos)
+            self.update_kitty_animation()
+        
+        if self.fruit_replacement_active:
+            self.update_fruit_replacement()
+            
+        if self.score_animation_active:
+            self.update_score_animation()
+        
         if self.game_over:
             if self.animation_in_progress:
                 self.update_animation()
-            self.draw_results_screen()
+            if self.counter_animation_active:
+                self.update_counter_animation()
     
     def update_animation(self):
         # Update animation values based on time elapsed since animation started
-        elapsed = time.time() - self.animation_start_time
+        elapsed = self.sim_time - self.animation_start_time
         
         # Dim animation duration: 0.7 seconds (30% faster than 1 second)
         dim_duration = 0.7
@@ -1682,7 +3200,7 @@ class Game:
             panel_elapsed = elapsed - panel_delay
             if panel_elapsed < panel_duration:
                 # Calculate target y position (centered vertically)
-                panel_height = 300
+                panel_height = RESULTS_PANEL_HEIGHT
                 target_y = (SCREEN_HEIGHT - panel_height) // 2
                 
                 # Ease-out function for smoother deceleration
@@ -1693,7 +3211,7 @@ class Game:
                 self.panel_y_offset = -400 + (target_y + 400) * ease_factor
             else:
                 # Animation complete
-                panel_height = 300
+                panel_height = RESULTS_PANEL_HEIGHT
                 self.panel_y_offset = (SCREEN_HEIGHT - panel_height) // 2
                 self.animation_in_progress = False
                 self.show_results = True
@@ -1701,7 +3219,7 @@ class Game:
                 # Start counter animation
                 if not self.counter_animation_active:
                     self.counter_animation_active = True
-                    self.counter_start_time = time.time()
+                    self.counter_start_time = self.sim_time
                     self.displayed_score = 0
                     self.stars_shown = 0
     
@@ -1711,7 +3229,7 @@ class Game:
             
         # Duration for counter animation (2 seconds)
         counter_duration = 2.0
-        elapsed = time.time() - self.counter_start_time
+        elapsed = self.sim_time - self.counter_start_time
         
         if elapsed < counter_duration:
             # Calculate current score to display (with easing)
@@ -1725,11 +3243,8 @@ class Game:
             # Animate from start_score to target_score
             self.displayed_score = int(start_score + (target_score - start_score) * ease_factor)
             
-            # Calculate stars to show based on thresholds
-            self.stars_shown = 0
-            for threshold, stars in STAR_THRESHOLDS:
-                if self.displayed_score >= threshold:
-                    self.stars_shown = stars
+            # Calculate stars to show based on this game's thresholds
+            self.stars_shown = stars_for_score(self.displayed_score, self.food_goal)
         else:
             # Animation complete
             self.displayed_score = self.fruits_collected
@@ -1737,88 +3252,103 @@ class Game:
             self.counter_animation_active = False
     
     def draw_results_screen(self):
-        # Create a semi-transparent overlay with current alpha
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, self.dim_alpha))  # Variable opacity black
-        self.screen.blit(overlay, (0, 0))
-        
-        # Create results panel
-        panel_width = 400
-        panel_height = 300
-        panel_x = (SCREEN_WIDTH - panel_width) // 2
-        panel_y = self.panel_y_offset
-        
-        # Draw panel background
-        pygame.draw.rect(self.screen, WHITE, (panel_x, panel_y, panel_width, panel_height), border_radius=10)
-        pygame.draw.rect(self.screen, BLACK, (panel_x, panel_y, panel_width, panel_height), 2, border_radius=10)
-        
-        # Draw game result
-        if self.fruits_collected >= FOOD_GOAL:
-            result_text = self.large_font.render("VICTORY!", True, GREEN)
-        else:
-            result_text = self.large_font.render("GAME OVER", True, RED)
-        
-        result_rect = result_text.get_rect(center=(panel_x + panel_width // 2, panel_y + 40))
-        self.screen.blit(result_text, result_rect)
-        
-        # Update counter animation if active
-        if self.counter_animation_active:
-            self.update_counter_animation()
+        # The overlay is one opaque black surface; only its alpha changes per frame
+        if self.dim_overlay is None:
+            self.dim_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            METRICS.count("surfaces")
+            self.dim_overlay.fill(BLACK)
+        self.dim_overlay.set_alpha(self.dim_alpha)
+        self.screen.blit(self.dim_overlay, (0, 0))
+        METRICS.count("blits")
+        
+        # The panel is re-rendered only when the counted score or stars change;
+        # sliding it in just moves the blit
+        key = (self.displayed_score, self.stars_shown)
+        if self.results_panel is None or self.results_panel_key != key:
+            self.results_panel = self.render_results_panel()
+            self.results_panel_key = key
+        panel_x = (SCREEN_WIDTH - RESULTS_PANEL_WIDTH) // 2
+        self.screen.blit(self.results_panel, (panel_x, self.panel_y_offset))
+        METRICS.count("blits")
+    
+    def render_results_panel(self):
+        # Everything but the score line and the stars is fixed once the game is over
+        if self.results_panel_base is None:
+            self.results_panel_base = self.render_results_panel_base()
+        panel = self.results_panel_base.copy()
+        METRICS.count("surfaces")
+        center_x = RESULTS_PANEL_WIDTH // 2
         
         # Draw score with counter animation
         score_text = self.font.render(f"Food collected: {self.displayed_score}", True, BLACK)
-        score_rect = score_text.get_rect(center=(panel_x + panel_width // 2, panel_y + 80))
-        self.screen.blit(score_text, score_rect)
+        score_rect = score_text.get_rect(center=(center_x, 80))
+        panel.blit(score_text, score_rect)
         
         # Draw stars
-        star_y = panel_y + 130
+        star_y = 130
         star_spacing = 70
         
         # Draw 3 stars (filled or empty based on animated score)
         for i in range(3):
-            star_x = panel_x + panel_width // 2 - star_spacing + i * star_spacing
-            if i < self.stars_shown:
-                star_image = FILLED_STAR
-            else:
-                star_image = EMPTY_STAR
+            star_x = center_x - star_spacing + i * star_spacing
+            star_image = get_star_image(RESULTS_STAR_SIZE, filled=i < self.stars_shown)
             
             star_rect = star_image.get_rect(center=(star_x, star_y))
-            self.screen.blit(star_image, star_rect)
+            panel.blit(star_image, star_rect)
+        return panel
+    
+    def render_results_panel_base(self):
+        # Transparent outside the rounded corners
+        panel = pygame.Surface((RESULTS_PANEL_WIDTH, RESULTS_PANEL_HEIGHT), pygame.SRCALPHA)
+        METRICS.count("surfaces")
+        center_x = RESULTS_PANEL_WIDTH // 2
+        
+        # Draw panel background
+        pygame.draw.rect(panel, WHITE, (0, 0, RESULTS_PANEL_WIDTH, RESULTS_PANEL_HEIGHT), border_radius=10)
+        pygame.draw.rect(panel, BLACK, (0, 0, RESULTS_PANEL_WIDTH, RESULTS_PANEL_HEIGHT), 2, border_radius=10)
+        
+        # Draw game result
+        if self.fruits_collected >= self.food_goal:
+            result_text = self.large_font.render("VICTORY!", True, GREEN)
+        else:
+            result_text = self.large_font.render("GAME OVER", True, RED)
+        
+        result_rect = result_text.get_rect(center=(center_x, 40))
+        panel.blit(result_text, result_rect)
         
         # Draw star thresholds
-        threshold_text = self.small_font.render(
-            f"0★: 0-74 | 1★: 75-95 | 2★: 96-125 | 3★: 126+", 
-            True, BLACK
-        )
-        threshold_rect = threshold_text.get_rect(center=(panel_x + panel_width // 2, panel_y + 180))
-        self.screen.blit(threshold_text, threshold_rect)
+        threshold_text = self.small_font.render(star_ranges_text(self.food_goal), True, BLACK)
+        threshold_rect = threshold_text.get_rect(center=(center_x, 180))
+        panel.blit(threshold_text, threshold_rect)
         
         # Draw time
         minutes = int(self.elapsed_time) // 60
         seconds = int(self.elapsed_time) % 60
         time_text = self.font.render(f"Time: {minutes}:{seconds:02d}", True, BLACK)
-        time_rect = time_text.get_rect(center=(panel_x + panel_width // 2, panel_y + 220))
-        self.screen.blit(time_text, time_rect)
+        time_rect = time_text.get_rect(center=(center_x, 220))
+        panel.blit(time_text, time_rect)
         
         # Draw restart instruction
         restart_text = self.font.render("Press C to restart", True, BLUE)
-        restart_rect = restart_text.get_rect(center=(panel_x + panel_width // 2, panel_y + 260))
-        self.screen.blit(restart_text, restart_rect)
+        restart_rect = restart_text.get_rect(center=(center_x, 260))
+        panel.blit(restart_text, restart_rect)
+        return panel
     
     def draw_direction_arrows(self):
         # Draw arrows showing the direction between consecutive selected cells
         if not self.selected_cells:
             return
+        # One rotated copy of the arrow per link, from the kitty on
+        METRICS.count("blits", len(self.selected_cells))
+        METRICS.count("surfaces", len(self.selected_cells))
             
         # First, draw an arrow from kitty's position to the first selected cell
         start_cell = self.kitty_pos
         end_cell = self.selected_cells[0]
         
         # Calculate center positions of cells
-        start_x = start_cell[1] * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-        start_y = start_cell[0] * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-        end_x = end_cell[1] * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-        end_y = end_cell[0] * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
+        start_x, start_y = self.cell_center(*start_cell)
+        end_x, end_y = self.cell_center(*end_cell)
         
         # Calculate midpoint between cells for arrow placement
         mid_x = (start_x + end_x) // 2
@@ -1828,7 +3358,7 @@ class Game:
         angle = calculate_angle(start_cell, end_cell)
         
         # Rotate arrow image
-        rotated_arrow = pygame.transform.rotate(ARROW_IMAGE, -angle)  # Negative for clockwise rotation
+        rotated_arrow = pygame.transform.rotate(self.arrow_image, -angle)  # Negative for clockwise rotation
         arrow_rect = rotated_arrow.get_rect(center=(mid_x, mid_y))
         
         # Draw arrow
@@ -1843,10 +3373,8 @@ class Game:
             end_cell = self.selected_cells[i + 1]
             
             # Calculate center positions of cells
-            start_x = start_cell[1] * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-            start_y = start_cell[0] * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-            end_x = end_cell[1] * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
-            end_y = end_cell[0] * (CELL_SIZE + MARGIN) + MARGIN + CELL_SIZE // 2
+            start_x, start_y = self.cell_center(*start_cell)
+            end_x, end_y = self.cell_center(*end_cell)
             
             # Calculate midpoint between cells for arrow placement
             mid_x = (start_x + end_x) // 2
@@ -1856,55 +3384,41 @@ class Game:
             angle = calculate_angle(start_cell, end_cell)
             
             # Rotate arrow image
-            rotated_arrow = pygame.transform.rotate(ARROW_IMAGE, -angle)  # Negative for clockwise rotation
+            rotated_arrow = pygame.transform.rotate(self.arrow_image, -angle)  # Negative for clockwise rotation
             arrow_rect = rotated_arrow.get_rect(center=(mid_x, mid_y))
             
             # Draw arrow
             self.screen.blit(rotated_arrow, arrow_rect)
     
     def load_best_score(self):
-        try:
-            with open("game_history.txt", "r") as file:
-                lines = file.readlines()
-                for line in lines:
-                    parts = line.strip().split(", ")
-                    if len(parts) >= 4:  # Ensure we have enough parts
-                        try:
-                            score = int(parts[1].split(": ")[1])
-                            time_str = parts[3].split(": ")[1]
-                            time_val = sum(float(x) * 60 ** i for i, x in enumerate(reversed(time_str.split(":"))))
-                            
-                            # Update best score if higher
-                            if score > self.best_score:
-                                self.best_score = score
-                                
-                            # Update best time if this score is >= goal and time is better
-                            if score >= FOOD_GOAL and time_val < self.best_time:
-                                self.best_time = time_val
-                        except (ValueError, IndexError):
-                            continue
-        except FileNotFoundError:
-            pass  # No history file yet
+        # Bring old text history into the JSON history first (no-op after the first run)
+        import_legacy_history()
+        self.best_score, self.best_time = get_best_score(self.variant)
+    
+    def load_assets(self):
+        # Disk work of the first visit, run on the I/O thread: food images
+        # when the graphics mode changed since they were loaded, and the best score
+        global ALL_FOOD_IMAGES, ALL_FOOD_MODE
+        if ALL_FOOD_MODE != SETTINGS.get("graphics_mode"):
+            ALL_FOOD_IMAGES = load_all_foods()
+            ALL_FOOD_MODE = SETTINGS.get("graphics_mode")
+        self.load_best_score()
     
     def save_game_history(self):
-        # Load existing history
-        history = load_game_history()
-        
-        # Create new game record
+        # Create new game record; records and best scores are kept per variant
         game_record = {
             "timestamp": time.time(),
             "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "variant": self.variant,
+            "food_goal": self.food_goal,
             "score": self.fruits_collected,
             "moves": self.moves,
             "time": self.elapsed_time,
             "stars": self.stars_earned
         }
         
-        # Add to history
-        history.append(game_record)
-        
-        # Save updated history
-        save_game_history(history)
+        # Append to the history file off the frame path
+        run_io(append_game_record, game_record)
         
         # Update best score and time
         if self.fruits_collected > self.best_score:
@@ -1919,7 +3433,7 @@ class Game:
             
         # Animation duration for each segment (0.2 seconds per cell)
         animation_duration = 0.2
-        elapsed = time.time() - self.kitty_animation_start_time
+        elapsed = self.sim_time - self.kitty_animation_start_time
         
         if elapsed < animation_duration:
             # Calculate progress with easing
@@ -1944,22 +3458,27 @@ class Game:
             # Only remove food if this is a selected cell (not the kitty's starting position)
             if cell_pos in self.cells_to_replace:
                 self.board[row][col] = None
+                self.invalidate_legal_cells()
                 
                 # Check if there's a mouse or bone at this position and remove it
                 if cell_pos in self.mice:
                     # Remove the mouse only when the kitty actually reaches it
                     self.mice.remove(cell_pos)
+                    self.free_cells.add(cell_pos)
+                    if cell_pos in self.selected_cells:
+                        self.selected_cells.recount(self.mice, self.bones)
                     points_for_this_cell = 4  # Mouse
                     # Play mouse sound
-                    if MOUSE_SOUND:
-                        MOUSE_SOUND.play()
+                    SOUNDS.play("mouse")
                 elif cell_pos in self.bones:
                     # Remove the bone when the kitty reaches it
                     self.bones.remove(cell_pos)
+                    self.free_cells.add(cell_pos)
+                    if cell_pos in self.selected_cells:
+                        self.selected_cells.recount(self.mice, self.bones)
                     points_for_this_cell = -10  # Bone penalty
                     # Play bone sound
-                    if BONE_SOUND:
-                        BONE_SOUND.play()
+                    SOUNDS.play("bone")
                 else:
                     points_for_this_cell = 1  # Regular food
                     
@@ -1991,7 +3510,7 @@ class Game:
                 
                 # Start food replacement animation with delay
                 self.fruit_replacement_active = True
-                self.fruit_replacement_start_time = time.time()
+                self.fruit_replacement_start_time = self.sim_time
                 
                 # Update actual score now
                 self.fruits_collected += self.total_points_to_add
@@ -2004,7 +3523,7 @@ class Game:
                 self.kitty_start_pos = self.animation_path[self.current_path_index]
                 self.kitty_target_pos = self.animation_path[self.current_path_index + 1]
                 self.kitty_current_pos = list(self.kitty_start_pos)  # Reset current position
-                self.kitty_animation_start_time = time.time()  # Reset timer for next segment
+                self.kitty_animation_start_time = self.sim_time  # Reset timer for next segment
     
     def update_fruit_replacement(self):
         if not self.fruit_replacement_active:
@@ -2012,12 +3531,11 @@ class Game:
             
         # Wait for 0.5 second after kitty reaches final position before replacing foods
         delay = 0.5
-        elapsed = time.time() - self.fruit_replacement_start_time
+        elapsed = self.sim_time - self.fruit_replacement_start_time
         
         if elapsed >= delay:
             # Play purr sound when the step is finished
-            if PURR_SOUND:
-                PURR_SOUND.play()
+            SOUNDS.play("purr")
                 
             # Add a mouse if needed (every 2 moves)
             if self.should_add_mouse and not self.game_over:
@@ -2038,6 +3556,7 @@ class Game:
             if self.old_kitty_pos and self.old_kitty_pos not in self.cells_to_replace:
                 old_row, old_col = self.old_kitty_pos
                 self.board[old_row][old_col] = random.choice(self.foods)
+            self.invalidate_legal_cells()
             
             # Score is already updated in update_kitty_animation, no need to update it again here
             
@@ -2045,13 +3564,13 @@ class Game:
             if self.final_move:
                 # Set game over state
                 self.game_over = True
-                self.game_won = self.fruits_collected >= FOOD_GOAL
+                self.game_won = self.fruits_collected >= self.food_goal
                 
                 # Calculate stars earned
                 self.calculate_stars()
                 
                 # Start the result animation
-                self.animation_start_time = time.time()
+                self.animation_start_time = self.sim_time
                 self.animation_in_progress = True
                 self.dim_alpha = 0
                 self.panel_y_offset = -400
@@ -2059,13 +3578,14 @@ class Game:
                 # Save game history with the final score
                 self.save_game_history()
             
-            # Animation complete
+            # Animation complete, cells can be selected again
             self.fruit_replacement_active = False
             self.cells_to_replace = []
             self.old_kitty_pos = None
+            self.invalidate_legal_cells()
             
             # End score animation after 2 more seconds
-            self.points_popup_time = time.time()
+            self.points_popup_time = self.sim_time
     
     def update_score_animation(self):
         if not self.score_animation_active:
@@ -2073,7 +3593,7 @@ class Game:
             
         # Keep the popup visible for 1.5 seconds after food replacement (50% faster than before)
         if not self.kitty_animation_active and not self.fruit_replacement_active:
-            elapsed = time.time() - self.points_popup_time
+            elapsed = self.sim_time - self.points_popup_time
             if elapsed > 1.0:  # Start fading after 1 second (was 2)
                 # Start fading out
                 fade_duration = 0.5  # Fade over 0.5 seconds (was 1.0)
@@ -2091,15 +3611,14 @@ class Game:
             return
             
         # Play sound effect
-        if TAP_SOUND:
-            TAP_SOUND.play()
+        SOUNDS.play("tap")
             
         # Regenerate the board but keep kitty position
-        self.board = [[random.choice(self.foods) for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+        self.board = generate_board(self.foods, self.rules, self.kitty_pos)
         
         # Clear mice and bones
-        self.mice = []
-        self.bones = []
+        self.mice = set()
+        self.bones = set()
         
         # Clear selected cells
         self.selected_cells = []
@@ -2107,82 +3626,155 @@ class Game:
         # Remove food from kitty's position
         kitty_row, kitty_col = self.kitty_pos
         self.board[kitty_row][kitty_col] = None
+        self.invalidate_legal_cells()
         
         # Decrement reload count
         self.reload_count -= 1
     
-    def run(self):
-        running = True
-        
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                    return  # Return to main menu instead of quitting
-                    
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_c and self.game_over:  # Restart game
-                        self.reset_game()
-                    elif event.key == pygame.K_ESCAPE:  # Return to main menu
-                        running = False
-                        return
-                    elif event.key == SETTINGS["collect_key"] and not self.game_over:  # Use custom collect key
-                        self.collect_foods()
-                    elif event.key == SETTINGS["reload_key"] and not self.game_over:  # Use custom reload key
-                        self.reload_field()
-                        
-                elif event.type == pygame.MOUSEBUTTONDOWN and not self.game_over:
-                    pos = pygame.mouse.get_pos()
+    @property
+    def expired(self):
+        # Board size and sprites are fixed at construction, so a kept game
+        # is replaced once the rules or graphics mode change in the settings
+        return (self.rules != get_game_rules()
+                or self.is_fruits_mode != (SETTINGS.get("graphics_mode") == "fruits"))
+    
+    async def enter(self):
+        # The game is kept between visits: an unfinished game carries on
+        # where it was left, a finished one is replaced by a new game
+        if not self.assets_loaded:
+            food_images = ALL_FOOD_IMAGES
+            await run_io(self.load_assets)
+            self.assets_loaded = True
+            if ALL_FOOD_IMAGES is not food_images:
+                self.reset_game()  # Deal the board again with the new foods
+        if self.game_over:
+            self.reset_game()
+        SOUNDS.play_music()
+        self.game_clock.resume()
+        # A drag doesn't carry over a visit to another screen
+        self.dragging = False
+        INPUT.reset()
+    
+    async def leave(self):
+        # No game time passes while the player is in the other screens
+        self.game_clock.pause()
+        self.dragging = False
+        INPUT.reset()
+        if PROFILER.enabled:
+            PROFILER.print_summary()
+            await run_io(PROFILER.dump_trace)
+    
+    def step(self):
+        # Handle events and draw one frame
+        PROFILER.begin_frame()
+        
+        for event in INPUT.poll():
+            if event.type == pygame.QUIT:
+                self.running = False
+                return  # Return to main menu instead of quitting
+                
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_c and self.game_over:  # Restart game
+                    self.reset_game()
+                elif event.key == pygame.K_ESCAPE:  # Return to main menu
+                    self.running = False
+                    return
+                elif event.key == SETTINGS["collect_key"] and not self.game_over:  # Use custom collect key
+                    self.collect_foods()
+                    INPUT.mark(event)
+                elif event.key == SETTINGS["reload_key"] and not self.game_over:  # Use custom reload key
+                    self.reload_field()
+                    INPUT.mark(event)
+                else:
+                    PERF_OVERLAY.handle_event(event)
+            
+            # Wheel turns are button events too; they select nothing and leave a drag going
+            elif (event.type == pygame.MOUSEBUTTONDOWN and not self.game_over
+                  and event.button not in (pygame.BUTTON_WHEELUP, pygame.BUTTON_WHEELDOWN)):
+                # The position the click happened at, not where the pointer is now
+                pos = event.pos
+                
+                # Check if collect button was clicked
+                if self.collect_button_rect.collidepoint(pos):
+                    self.collect_foods()
+                    INPUT.mark(event)
+                    continue
                     
-                    # Check if collect button was clicked
-                    if self.collect_button_rect.collidepoint(pos):
-                        self.collect_foods()
-                        continue
-                        
-                    # Check if reload button was clicked
-                    if self.reload_button_rect.collidepoint(pos):
-                        self.reload_field()
-                        continue
-                        
-                    # Convert position to grid coordinates
-                    col = (pos[0] - MARGIN) // (CELL_SIZE + MARGIN)
-                    row = (pos[1] - MARGIN) // (CELL_SIZE + MARGIN)
+                # Check if reload button was clicked
+                if self.reload_button_rect.collidepoint(pos):
+                    self.reload_field()
+                    INPUT.mark(event)
+                    continue
                     
-                    # Check if click is within the grid
-                    if 0 <= row < GRID_SIZE and 0 <= col < GRID_SIZE:
-                        # Check if cell is already selected
-                        if (row, col) in self.selected_cells:
-                            # Find the index of the clicked cell in the selection
-                            index = self.selected_cells.index((row, col))
-                            # Remove this cell and all cells after it
-                            self.selected_cells = self.selected_cells[:index]
-                            # Play tap sound
-                            if TAP_SOUND:
-                                TAP_SOUND.play()
-                        # Otherwise check if it's a valid selection
-                        elif self.is_valid_selection(row, col):
-                            self.selected_cells.append((row, col))
-                            # Play tap sound
-                            if TAP_SOUND:
-                                TAP_SOUND.play()
-            
-            # Draw the board
-            self.draw_board()
-            
-            # Update display
-            pygame.display.flip()
-            
-            # Cap the frame rate
-            self.clock.tick(60)
+                # Convert position to grid coordinates
+                cell = self.cell_at(pos)
+                
+                # Check if click is within the grid
+                if cell:
+                    row, col = cell
+                    # Holding the left button down drags the chain on
+                    self.dragging = event.button == 1
+                    self.drag_cell = cell
+                    # Check if cell is already selected
+                    if (row, col) in self.selected_cells:
+                        # Find the index of the clicked cell in the selection
+                        index = self.selected_cells.index((row, col))
+                        # Remove this cell and all cells after it
+                        self.selected_cells.truncate(index)
+                        # Play tap sound
+                        SOUNDS.play("tap")
+                        INPUT.mark(event)
+                    # Otherwise check if it's a valid selection
+                    elif self.is_valid_selection(row, col):
+                        self.selected_cells.append((row, col), self.board[row][col])
+                        # Play tap sound
+                        SOUNDS.play("tap")
+                        INPUT.mark(event)
+            
+            elif event.type == pygame.MOUSEMOTION and self.dragging and not self.game_over:
+                # A release outside the window is never seen, so the button
+                # state of the motion itself decides whether it's still a drag
+                if not event.buttons[0]:
+                    self.dragging = False
+                    continue
+                if self.drag_to(event.pos):
+                    SOUNDS.play("tap")
+                    INPUT.mark(event)
+            
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                self.dragging = False
+        
+        PROFILER.mark("events")
+        
+        # Advance the game state by this frame's sample of the game clock
+        self.advance(self.game_clock.sample())
+        PROFILER.mark("update")
+        
+        # Draw the board
+        self.draw_board()
+        
+        # Update display
+        pygame.display.flip()
+        INPUT.presented()
+        PROFILER.mark("flip")
+        PROFILER.end_frame()
 
 if __name__ == "__main__":
     # Initialize pygame window
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Kitty Snack Sprint")
+    with startup_step("display.set_mode"):
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Kitty Snack Sprint")
     
-    # Start with main menu
-    menu = MainMenu(screen)
-    menu.run()
+    # Start with main menu; every other screen is a scene opened from it,
+    # built on its first visit and kept for the next ones
+    with startup_step("MainMenu"):
+        menu = MainMenu(screen)
+    scenes = SceneManager({
+        "game": Game,
+        "records": lambda: Records(screen),
+        "settings": lambda: Settings(screen, menu)  # Menu reference for hot reload
+    })
+    scenes.run(menu)
     
     # Clean up
     pygame.quit()
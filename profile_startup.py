@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Measure the time from process start to the first main menu frame.
+
+Starts main.py several times under the SDL dummy drivers with
+KSS_STARTUP_PROFILE set, so each run writes its module-level step timings
+(pygame.init, mixer.init, load_settings, load_all_foods, each load_sound,
+apply_sound_settings, create_star_image, ...) and exits after the first
+MainMenu frame. Prints the median breakdown and appends it, tagged with
+the current git commit, to startup_history.json so the numbers can be
+tracked across commits.
+
+The game runs with KSS_DATA_DIR pointing at a temporary directory, so your
+settings and history are never read or written. One untimed warm-up run
+fills that directory's sound cache first, as it is on any install that has
+been started before.
+
+    python profile_startup.py              # 5 runs, record the result
+    python profile_startup.py --runs 10 --no-record
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+HISTORY_FILE = "startup_history.json"
+DEFAULT_RUNS = 5
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def profile_once(report_path, data_dir):
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    env["KSS_STARTUP_PROFILE"] = report_path
+    env["KSS_DATA_DIR"] = data_dir
+
+    # time.monotonic() is system-wide, so it lines up with the child's timings
+    spawn_time = time.monotonic()
+    subprocess.run([sys.executable, "main.py"], cwd=GAME_DIR, env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    with open(report_path, "r") as file:
+        report = json.load(file)
+
+    # Milliseconds per step, in startup order
+    steps = {}
+    steps["interpreter+imports"] = (report["steps"][0]["start"] - spawn_time) * 1000
+    last_end = report["steps"][0]["start"]
+    for step in report["steps"]:
+        gap = step["start"] - last_end
+        if gap > 0:
+            steps["other"] = steps.get("other", 0) + gap * 1000
+        steps[step["step"]] = steps.get(step["step"], 0) + step["duration"] * 1000
+        last_end = step["start"] + step["duration"]
+    steps["first_frame"] = (report["first_frame"] - last_end) * 1000
+    total = (report["first_frame"] - spawn_time) * 1000
+    return total, steps
+
+
+def current_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=GAME_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=GAME_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_history(path):
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile game startup time")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--history", default=os.path.join(GAME_DIR, HISTORY_FILE))
+    parser.add_argument("--no-record", action="store_true", help="don't append to the history file")
+    args = parser.parse_args()
+
+    totals = []
+    step_runs = {}
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = os.path.join(directory, "data")
+        os.mkdir(data_dir)
+        profile_once(os.path.join(directory, "warm_up.json"), data_dir)
+        for run in range(args.runs):
+            total, steps = profile_once(os.path.join(directory, f"startup_{run}.json"), data_dir)
+            totals.append(total)
+            for name, duration in steps.items():
+                step_runs.setdefault(name, []).append(duration)
+
+    total = statistics.median(totals)
+    steps = {name: statistics.median(durations) for name, durations in step_runs.items()}
+
+    history = load_history(args.history)
+    previous = history[-1] if history else None
+
+    print(f"Startup to first menu frame (median of {args.runs} runs)")
+    print(f"{'step':<32}{'ms':>10}{'previous':>12}")
+    for name, duration in steps.items():
+        before = previous["steps"].get(name) if previous else None
+        before_text = f"{before:.1f}" if before is not None else "-"
+        print(f"{name:<32}{duration:>10.1f}{before_text:>12}")
+    before_text = f"{previous['total_ms']:.1f}" if previous else "-"
+    print(f"{'total':<32}{total:>10.1f}{before_text:>12}")
+    if previous:
+        print(f"(previous: {previous['commit']} on {previous['date']})")
+
+    if not args.no_record:
+        history.append({
+            "commit": current_commit(),
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "runs": args.runs,
+            "total_ms": round(total, 2),
+            "steps": {name: round(duration, 2) for name, duration in steps.items()}
+        })
+        with open(args.history, "w") as file:
+            json.dump(history, file, indent=4)
+        print(f"Recorded in {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the game rules and rendering.
+
+Runs under the SDL dummy video/audio drivers, writes the results to
+benchmark_results.json and compares them with benchmark_baseline.json.
+Exits with a non-zero status when a benchmark got slower than its baseline
+by more than the tolerance.
+
+    python run_benchmarks.py                     # run and compare
+    python run_benchmarks.py --filter records    # only matching benchmarks
+    python run_benchmarks.py --update-baseline   # store the results as baseline
+"""
+import os
+import sys
+import json
+import random
+import timeit
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import main
+
+BASELINE_FILE = "benchmark_baseline.json"
+RESULTS_FILE = "benchmark_results.json"
+DEFAULT_TOLERANCE = 0.5  # Allowed slowdown (0.5 = 50%) before a benchmark fails
+REPEAT = 5
+
+# Straight chain from the kitty at the centre to the top edge and back down
+COLLECT_CHAIN = [(2, 3), (1, 3), (0, 3), (0, 4), (1, 4), (2, 4)]
+
+
+def prepare_board(game, food=None):
+    # Fill the board with a single food so every chain is valid
+    food = food or game.foods[0]
+    game.board = [[food for _ in range(game.grid_size)] for _ in range(game.grid_size)]
+    game.kitty_pos = (game.grid_size // 2, game.grid_size // 2)
+    game.board[game.kitty_pos[0]][game.kitty_pos[1]] = None
+    game.mice = []
+    game.bones = []
+    game.selected_cells = []
+    game.moves = 0
+    game.final_move = False
+    game.game_over = False
+
+
+def snake_chain(game, length):
+    # A chain that snakes through the board, row by row
+    cells = []
+    for row in range(game.grid_size):
+        cols = range(game.grid_size) if row % 2 == 0 else reversed(range(game.grid_size))
+        cells.extend((row, col) for col in cols if (row, col) != game.kitty_pos)
+    return cells[:length]
+
+
+def make_history(count):
+    rng = random.Random(count)
+    return [
+        {
+            "timestamp": 1700000000 + i * 600,
+            "date": "",
+            "score": rng.randint(-20, 140),
+            "moves": 10,
+            "time": rng.uniform(30, 300),
+            "stars": rng.randint(0, 3)
+        }
+        for i in range(count)
+    ]
+
+
+def bench_is_valid_selection(game):
+    prepare_board(game)
+    game.mice = [(0, 0), (6, 6)]
+    game.bones = [(0, 6)]
+    game.selected_cells = COLLECT_CHAIN[:4]
+    cells = [(row, col) for row in range(game.grid_size) for col in range(game.grid_size)]
+
+    def run():
+        for row, col in cells:
+            game.is_valid_selection(row, col)
+    return run
+
+
+def bench_calculate_chain_result(game):
+    prepare_board(game)
+    game.mice = [(1, 3), (6, 6), (5, 5)]
+    game.bones = [(0, 4), (6, 0)]
+    game.selected_cells = list(COLLECT_CHAIN)
+    return game.calculate_chain_result
+
+
+def bench_collect_animation_cycle(game):
+    # A whole collect, stepped through the fixed-timestep update alone
+    def run():
+        prepare_board(game)
+        game.selected_cells = list(COLLECT_CHAIN)
+        game.collect_foods()
+        while game.kitty_animation_active or game.fruit_replacement_active or game.score_animation_active:
+            game.update(main.UPDATE_STEP)
+    return run
+
+
+def bench_add_mouse_and_bones(game):
+    def run():
+        game.mice = []
+        game.bones = []
+        for _ in range(3):
+            game.add_mouse()
+            game.add_bones()
+    return run
+
+
+def make_generate_board_bench(variant):
+    # Board generation with the quality check, as used by reset_game
+    def bench(game):
+        rules = main.get_game_rules(variant)
+        kitty_pos = (rules["grid_size"] // 2, rules["grid_size"] // 2)
+        return lambda: main.generate_board(game.foods, rules, kitty_pos)
+    return bench
+
+
+def bench_opening_board(game):
+    seeds = iter(range(10 ** 9))
+    return lambda: game.opening_board(next(seeds))
+
+
+def bench_draw_board(game):
+    prepare_board(game)
+    game.mice = [(0, 0), (6, 6)]
+    game.bones = [(0, 6)]
+    game.selected_cells = list(COLLECT_CHAIN)
+    return game.draw_board
+
+
+def bench_draw_direction_arrows(game):
+    prepare_board(game)
+    game.selected_cells = snake_chain(game, 40)
+    return game.draw_direction_arrows
+
+
+def bench_draw_results_screen(game):
+    # A frame of the results panel sliding in over the dimmed board
+    prepare_board(game)
+    game.game_over = True
+    game.fruits_collected = 80
+    game.displayed_score = 0
+    game.stars_shown = 0
+    game.dim_alpha = 120
+    game.panel_y_offset = 100
+    return game.draw_results_screen
+
+
+def make_variant_draw_bench(variant):
+    # draw_board on a bigger board; the cost should grow with the board area
+    def bench(game):
+        game = main.Game(main.get_game_rules(variant))
+        prepare_board(game)
+        size = game.grid_size
+        game.mice = [(0, 0), (size - 1, size - 1)]
+        game.bones = [(row, size - 1) for row in range(0, size, 2)]
+        game.selected_cells = snake_chain(game, 12)
+        return game.draw_board
+    return bench
+
+
+def make_records_bench(count):
+    def bench(game):
+        records = main.Records(game.screen)
+        records.history = make_history(count)
+
+        def run():
+            records.draw_top_records()
+            records.draw_bar_chart()
+        return run
+    return bench
+
+
+BENCHMARKS = [
+    ("is_valid_selection", bench_is_valid_selection),
+    ("calculate_chain_result", bench_calculate_chain_result),
+    ("collect_animation_cycle", bench_collect_animation_cycle),
+    ("add_mouse_and_bones", bench_add_mouse_and_bones),
+    ("generate_board", make_generate_board_bench("classic")),
+    ("generate_board_huge", make_generate_board_bench("huge")),
+    ("opening_board", bench_opening_board),
+    ("draw_board", bench_draw_board),
+    ("draw_direction_arrows_40", bench_draw_direction_arrows),
+    ("draw_results_screen", bench_draw_results_screen),
+    ("draw_board_large", make_variant_draw_bench("large")),
+    ("draw_board_huge", make_variant_draw_bench("huge")),
+    ("records_10k", make_records_bench(10000)),
+    ("records_100k", make_records_bench(100000)),
+]
+
+
+def measure(run):
+    # Best time per call in microseconds (the minimum is the least noisy)
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    timings = timer.repeat(repeat=REPEAT, number=number)
+    return round(min(timings) / number * 1e6, 2)
+
+
+def load_json(path):
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def main_benchmarks():
+    parser = argparse.ArgumentParser(description="Run the game micro-benchmarks")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline (0.5 = 50%%)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    game = main.Game(main.get_game_rules("classic"))
+    results = {}
+    for name, setup in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        random.seed(0)
+        results[name] = measure(setup(game))
+
+    with open(args.results, "w") as file:
+        json.dump({"unit": "us_per_call", "results": results}, file, indent=4)
+
+    if args.update_baseline:
+        baseline = load_json(args.baseline) or {"unit": "us_per_call", "results": {}}
+        baseline["results"].update(results)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=4)
+        print(f"Baseline updated in {args.baseline}")
+
+    baseline = (load_json(args.baseline) or {}).get("results", {})
+    regressions = []
+    print(f"{'benchmark':<28}{'us/call':>12}{'baseline':>12}{'change':>10}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base:
+            change = value / base - 1
+            flag = "  REGRESSION" if change > args.tolerance else ""
+            print(f"{name:<28}{value:>12.1f}{base:>12.1f}{change:>+10.0%}{flag}")
+            if flag:
+                regressions.append(name)
+        else:
+            print(f"{name:<28}{value:>12.1f}{'-':>12}{'':>10}")
+
+    if regressions:
+        print(f"\nFAILED: {len(regressions)} benchmark(s) slower than baseline by more than "
+              f"{args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_benchmarks())
@@ -0,0 +1,98 @@
+import unittest
+import random
+
+import board_analysis
+from board_analysis import BoardArrays, EMPTY, HAVE_NUMPY
+
+if HAVE_NUMPY:
+    import numpy as np
+
+
+def flood_fill_sizes(board):
+    # Reference component sizes with a plain Python flood fill
+    size = len(board)
+    sizes = [[0] * size for _ in range(size)]
+    seen = set()
+    for row in range(size):
+        for col in range(size):
+            if board[row][col] is None or (row, col) in seen:
+                continue
+            component = [(row, col)]
+            seen.add((row, col))
+            for cell_row, cell_col in component:
+                for row_offset, col_offset in board_analysis.NEIGHBOURS:
+                    next_row, next_col = cell_row + row_offset, cell_col + col_offset
+                    if (0 <= next_row < size and 0 <= next_col < size and (next_row, next_col) not in seen
+                            and board[next_row][next_col] == board[row][col]):
+                        seen.add((next_row, next_col))
+                        component.append((next_row, next_col))
+            for cell_row, cell_col in component:
+                sizes[cell_row][cell_col] = len(component)
+    return sizes
+
+
+@unittest.skipUnless(HAVE_NUMPY, "NumPy is not installed")
+class TestBoardArrays(unittest.TestCase):
+    """Test the NumPy board representation"""
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.foods = ["ball", "milk", "can"]
+        self.board = [[rng.choice(self.foods) for _ in range(7)] for _ in range(7)]
+        self.board[3][3] = None
+
+    def test_round_trip(self):
+        """Test converting a Game.board to arrays and back"""
+        arrays = BoardArrays.from_board(self.board, self.foods, mice={(0, 0)}, bones={(6, 6), (0, 6)})
+
+        self.assertEqual(arrays.codes.dtype, np.int8)
+        self.assertEqual(arrays.codes[3, 3], EMPTY)
+        self.assertEqual(arrays.to_board(), self.board)
+        self.assertEqual(arrays.hazard_cells(), ({(0, 0)}, {(6, 6), (0, 6)}))
+
+    def test_components_match_flood_fill(self):
+        """Test the vectorised components against a flood fill"""
+        arrays = BoardArrays.from_board(self.board, self.foods)
+
+        self.assertEqual(arrays.component_sizes().tolist(), flood_fill_sizes(self.board))
+
+    def test_batch_analysis(self):
+        """Test analysing a stack of boards at once"""
+        codes = board_analysis.random_boards(50, 7, 3, rng=np.random.default_rng(1))
+        labels = board_analysis.component_labels(codes)
+        best = board_analysis.largest_component_near(codes, labels, (3, 3))
+
+        self.assertEqual(labels.shape, (50, 7, 7))
+        self.assertTrue((labels[:, 3, 3] == -1).all())
+        for index in range(5):
+            board = [[None if code == EMPTY else code for code in row] for row in codes[index].tolist()]
+            sizes = flood_fill_sizes(board)
+            expected = max(sizes[row][col] for row in range(2, 5) for col in range(2, 5))
+            self.assertEqual(best[index], expected)
+        self.assertTrue((board_analysis.legal_start_counts(codes, (3, 3)) == 8).all())
+
+    def test_legal_start_count_in_corner(self):
+        """Test counting start cells next to a kitty in the corner"""
+        self.board[0][0] = None
+        arrays = BoardArrays.from_board(self.board, self.foods, kitty_pos=(0, 0))
+
+        self.assertEqual(arrays.legal_start_count(), 3)
+
+    def test_expected_chain_result(self):
+        """Test the Monte Carlo chain result on boards with known answers"""
+        board = [["ball"] * 7 for _ in range(7)]
+        board[3][3] = None
+        arrays = BoardArrays.from_board(board, self.foods)
+        self.assertEqual(arrays.expected_chain_result(4, samples=200, rng=np.random.default_rng(0)), 4)
+
+        # Every cell around the kitty is a bone: the chain always starts with one
+        bones = {(row, col) for row in range(2, 5) for col in range(2, 5)} - {(3, 3)}
+        for row, col in bones:
+            board[row][col] = None
+        arrays = BoardArrays.from_board(board, self.foods, bones=bones)
+        result = arrays.expected_chain_result(2, samples=500, rng=np.random.default_rng(0))
+        self.assertTrue(-20 <= result <= -9)
+
+
+if __name__ == '__main__':
+    unittest.main()
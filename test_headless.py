@@ -0,0 +1,502 @@
+import unittest
+import os
+import sys
+import types
+import asyncio
+import tempfile
+import subprocess
+from unittest.mock import patch
+
+from headless import HeadlessHarness, pygame, main
+
+
+def pygame_is_mocked():
+    # test_main.py swaps pygame modules for MagicMock when it is imported
+    return not isinstance(pygame.display, types.ModuleType)
+
+
+class HeadlessTestCase(unittest.TestCase):
+    """Runs each test against real pygame, in a fresh interpreter if needed"""
+
+    def run(self, result=None):
+        if pygame_is_mocked():
+            setattr(self, self._testMethodName, self.run_isolated)
+        return super().run(result)
+
+    def setUp(self):
+        if pygame_is_mocked():
+            return
+        self.data_dir = tempfile.TemporaryDirectory()
+        self.harness = HeadlessHarness(data_dir=self.data_dir.name)
+        self.harness.__enter__()
+        self.saved_settings = dict(main.SETTINGS)
+
+    def tearDown(self):
+        if pygame_is_mocked():
+            return
+        main.SETTINGS.clear()
+        main.SETTINGS.update(self.saved_settings)
+        self.harness.__exit__(None, None, None)
+        self.data_dir.cleanup()
+
+    def run_isolated(self):
+        completed = subprocess.run(
+            [sys.executable, "-m", "unittest", self.id()],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            self.fail(f"Isolated run of {self.id()} failed:\n{completed.stderr[-2000:]}")
+
+
+class TestHeadlessGame(HeadlessTestCase):
+    """Test the game screen with real frames"""
+
+    def make_game(self, variant="classic"):
+        game = self.harness.create_game(seed=1, variant=variant)
+        # One food everywhere so any chain is valid
+        food = game.foods[0]
+        game.board = [[food for _ in range(game.grid_size)] for _ in range(game.grid_size)]
+        kitty_row, kitty_col = game.kitty_pos
+        game.board[kitty_row][kitty_col] = None
+        return game
+
+    def test_click_selects_cell(self):
+        """Test that clicking cells next to the kitty builds a chain"""
+        game = self.make_game()
+
+        self.harness.click_cell(2, 3)
+        self.harness.step(game)
+        self.harness.click_cell(1, 3)
+        self.harness.step(game)
+
+        self.assertEqual(game.selected_cells, [(2, 3), (1, 3)])
+
+        # The most recent cell is drawn light blue
+        frame = self.harness.capture()
+        x, y = self.harness.cell_center(1, 3)
+        self.assertEqual(tuple(frame.get_at((x - 38, y - 38)))[:3], (100, 100, 255))
+
+    def test_click_uses_event_position(self):
+        """Test that a click selects the cell it happened on, wherever the pointer is now"""
+        game = self.make_game()
+
+        self.harness.click_cell(2, 3)
+        self.harness.pointer = self.harness.cell_center(4, 4)
+        self.harness.click_cell(1, 3)
+        self.harness.pointer = (0, 0)
+        self.harness.step(game)
+
+        self.assertEqual(game.selected_cells, [(2, 3), (1, 3)])
+        self.assertIn("input_latency_ms", main.METRICS.stats)
+
+    def test_drag_selects_cells(self):
+        """Test chaining cells by dragging with the button held down"""
+        game = self.make_game()
+
+        self.harness.press(self.harness.cell_center(2, 3))
+        self.harness.step(game)
+        for cell in [(1, 3), (1, 4), (0, 5)]:
+            self.harness.drag(self.harness.cell_center(*cell))
+            self.harness.step(game)
+        self.harness.release(self.harness.cell_center(0, 5))
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3), (1, 3), (1, 4), (0, 5)])
+
+        # Moving without the button held doesn't select
+        self.harness.move(self.harness.cell_center(0, 6))
+        self.harness.step(game)
+        self.assertEqual(len(game.selected_cells), 4)
+
+    def test_drag_ends_with_screen_and_button(self):
+        """Test that leaving the game or motion without the button ends a drag, and the wheel doesn't"""
+        game = self.make_game()
+
+        self.harness.press(self.harness.cell_center(2, 3))
+        self.harness.step(game)
+        self.harness.press(self.harness.cell_center(0, 0), button=pygame.BUTTON_WHEELUP)
+        self.harness.drag(self.harness.cell_center(1, 3))
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3), (1, 3)])
+
+        # ESC mid-drag: the release happens in another screen
+        asyncio.run(game.leave())
+        asyncio.run(game.enter())
+        self.harness.move(self.harness.cell_center(0, 3))
+        self.harness.step(game)
+        self.assertEqual(len(game.selected_cells), 2)
+
+        # A release outside the window is never seen
+        self.harness.press(self.harness.cell_center(0, 3))
+        self.harness.step(game)
+        self.harness.move(self.harness.cell_center(0, 4))
+        self.harness.step(game)
+        self.harness.drag(self.harness.cell_center(0, 5))
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3), (1, 3), (0, 3)])
+
+    def test_fast_drag_fills_skipped_cells(self):
+        """Test that a sweep skipping cells fills them in up to the first illegal move, and dragging back undoes"""
+        game = self.make_game()
+        game.board[2][6] = game.foods[1]
+        game.invalidate_legal_cells()
+
+        self.harness.press(self.harness.cell_center(2, 3))
+        self.harness.step(game)
+        self.harness.drag(self.harness.cell_center(2, 4))
+        self.harness.drag(self.harness.cell_center(2, 6))
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3), (2, 4), (2, 5)])
+
+        # A sweep that doesn't start at the end of the chain leaves it alone
+        self.harness.drag(self.harness.cell_center(0, 3))
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3), (2, 4), (2, 5)])
+
+        self.harness.drag(self.harness.cell_center(2, 5))
+        self.harness.step(game)
+        self.harness.drag(self.harness.cell_center(1, 4))
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3), (2, 4), (2, 5), (1, 4)])
+
+        # Crossing an earlier cell of the chain doesn't cut it there
+        self.harness.drag(self.harness.cell_center(2, 3))
+        self.harness.step(game)
+        self.assertEqual(len(game.selected_cells), 4)
+
+        # Going back over the cell before the end drops the end, one step at a time
+        self.harness.drag(self.harness.cell_center(1, 4))
+        self.harness.step(game)
+        self.harness.drag(self.harness.cell_center(2, 5))
+        self.harness.step(game)
+        self.harness.drag(self.harness.cell_center(2, 3))
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3)])
+
+        self.harness.drag(self.harness.cell_center(3, 3))
+        self.harness.step(game)
+        self.assertEqual(len(game.selected_cells), 0)
+
+    def test_drag_ignores_cell_corners(self):
+        """Test that a diagonal drag through a corner doesn't pick up the cells beside it"""
+        game = self.make_game()
+
+        self.harness.press(self.harness.cell_center(2, 3))
+        self.harness.step(game)
+        x, y = self.harness.cell_center(2, 3)
+        # Just past the top right corner of (2, 3), inside (1, 4)'s corner
+        corner = game.cell_size // 2 + game.margin + 2
+        self.harness.drag((x + corner, y - corner))
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3)])
+
+        self.harness.drag(self.harness.cell_center(1, 4))
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3), (1, 4)])
+
+    def test_motion_events_coalesced(self):
+        """Test that a frame's run of motion events is read as one event"""
+        for x in range(10, 60, 10):
+            self.harness.drag((x, 20))
+        self.harness.key(pygame.K_SPACE)
+
+        events = main.INPUT.poll()
+
+        self.assertEqual([event.type for event in events], [pygame.MOUSEMOTION, pygame.KEYDOWN, pygame.KEYUP])
+        self.assertEqual(events[0].pos, (50, 20))
+        self.assertEqual(events[0].rel, (50, 20))
+        self.assertEqual(len({event.read_time for event in events}), 1)
+
+    def test_collect_runs_full_animation(self):
+        """Test collecting a chain until the board is refilled"""
+        game = self.make_game()
+
+        for cell in [(2, 3), (1, 3), (0, 3)]:
+            self.harness.click_cell(*cell)
+            self.harness.step(game)
+        self.harness.key(main.SETTINGS["collect_key"])
+        self.harness.step(game)
+
+        self.assertTrue(game.kitty_animation_active)
+
+        self.harness.run_until(game, lambda: not game.kitty_animation_active and not game.fruit_replacement_active)
+
+        self.assertEqual(game.kitty_pos, (0, 3))
+        self.assertEqual(game.fruits_collected, 3)
+        self.assertEqual(game.moves, 1)
+        self.assertIsNotNone(game.board[3][3])
+
+    def test_no_selection_during_collect_animation(self):
+        """Test that cells can't be selected until the eaten cells are refilled"""
+        game = self.make_game()
+
+        for cell in [(2, 3), (1, 3)]:
+            self.harness.click_cell(*cell)
+            self.harness.step(game)
+        self.harness.key(main.SETTINGS["collect_key"])
+        self.harness.step(game)
+        self.harness.run_until(game, lambda: game.fruit_replacement_active)
+
+        # The kitty is at (1, 3); (2, 3) is empty until the refill
+        self.harness.click_cell(2, 3)
+        self.harness.step(game)
+        self.assertEqual(len(game.selected_cells), 0)
+
+        self.harness.run_until(game, lambda: not game.fruit_replacement_active)
+        self.harness.click_cell(2, 3)
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(2, 3)])
+        self.assertIsNotNone(game.selected_cells.first_food)
+
+    def test_legal_cells_follow_chain(self):
+        """Test the legal next cells as the chain grows and shrinks"""
+        game = self.make_game()
+        other_food = game.foods[1]
+        game.board[1][2] = other_food
+        game.invalidate_legal_cells()
+        game.mice = [(1, 4)]
+
+        self.assertEqual(len(game.legal_cells), 8)
+
+        self.harness.click_cell(2, 3)
+        self.harness.step(game)
+        self.assertEqual(game.legal_cells, {(1, 3), (1, 4), (2, 2), (2, 4), (3, 2), (3, 4)})
+
+        self.harness.click_cell(1, 3)
+        self.harness.step(game)
+        self.assertNotIn((1, 2), game.legal_cells)
+        self.assertIn((1, 4), game.legal_cells)
+        self.assertFalse(game.is_valid_selection(1, 2))
+
+        # Clicking a selected cell truncates the chain there
+        self.harness.click_cell(2, 3)
+        self.harness.step(game)
+        self.assertEqual(len(game.selected_cells), 0)
+        self.assertEqual(len(game.legal_cells), 8)
+
+    def test_opening_board_from_library(self):
+        """Test that a classic game starts on a library board of the chosen difficulty"""
+        main.SETTINGS["difficulty"] = "hard"
+        game = self.harness.create_game(seed=4)
+
+        best_chain, codes = main.get_opening_library().board("hard", game.board_seed)
+        cells = [food for row in game.board for food in row]
+        self.assertEqual(cells, [None if code == main.OPENING_EMPTY_CODE else game.foods[code] for code in codes])
+
+    def test_hazards_placed_on_free_cells(self):
+        """Test that mice and bones never land on each other or the kitty"""
+        game = self.make_game()
+        game.kitty_pos = (0, 0)
+        game.mice = [(1, 1)]
+
+        for _ in range(10):
+            game.add_mouse()
+            game.add_bones()
+
+        occupied = list(game.mice) + list(game.bones) + [game.kitty_pos]
+        self.assertEqual(len(game.mice), 3)
+        self.assertEqual(len(game.bones), 20)
+        self.assertEqual(len(set(occupied)), len(occupied))
+        self.assertEqual(len(game.free_cells), main.GRID_SIZE * main.GRID_SIZE - len(occupied))
+
+    def test_large_board(self):
+        """Test a 15x15 game: cells fit the window and clicks hit the right cell"""
+        game = self.make_game(variant="large")
+        self.assertEqual(game.kitty_pos, (7, 7))
+
+        x, y = game.cell_origin(14, 14)
+        self.assertLessEqual(x + game.cell_size, main.SCREEN_WIDTH)
+        self.assertEqual(game.cell_at(game.cell_center(14, 0)), (14, 0))
+
+        self.harness.click_cell(6, 8)
+        self.harness.step(game)
+        self.assertEqual(game.selected_cells, [(6, 8)])
+
+        game.add_mouse()
+        game.add_bones()
+        self.assertEqual(len(game.bones), game.rules["bones_per_spawn"])
+
+    def test_update_runs_without_rendering(self):
+        """Test that drawing doesn't move the game on and updates alone finish a collect"""
+        game = self.make_game()
+        for cell in [(2, 3), (1, 3), (0, 3)]:
+            game.selected_cells.append(cell, game.board[cell[0]][cell[1]])
+        game.collect_foods()
+
+        for _ in range(5):
+            game.draw_board()
+        self.assertEqual(game.current_path_index, 0)
+
+        # A single long frame still walks the kitty through every cell
+        game.advance(main.MAX_FRAME_TIME)
+        self.assertEqual(game.current_path_index, 1)
+        while game.kitty_animation_active or game.fruit_replacement_active:
+            game.update(main.UPDATE_STEP)
+        self.assertEqual(game.kitty_pos, (0, 3))
+        self.assertEqual(game.fruits_collected, 3)
+
+    def test_paused_clock_freezes_game(self):
+        """Test that no game time passes while the game clock is paused"""
+        game = self.make_game()
+        for cell in [(2, 3), (1, 3)]:
+            game.selected_cells.append(cell, game.board[cell[0]][cell[1]])
+        game.collect_foods()
+
+        game.game_clock.pause()
+        self.harness.advance(game, frames=120)
+        self.assertEqual(game.current_path_index, 0)
+        self.assertEqual(game.sim_time, 0.0)
+
+        game.game_clock.resume()
+        self.harness.advance(game, frames=3)
+        self.assertAlmostEqual(game.game_clock.now - game.start_time, 2 * self.harness.frame_time)
+
+    def test_kept_game_resumes(self):
+        """Test that leaving and re-entering the game carries on the same game, unless it was over"""
+        game = self.make_game()
+        self.harness.click_cell(2, 3)
+        self.harness.advance(game, frames=10)
+        played = game.game_clock.now - game.start_time
+
+        asyncio.run(game.leave())
+        self.harness.now += 60  # Time spent in the menu
+        asyncio.run(game.enter())
+        self.harness.advance(game, frames=1)
+
+        self.assertEqual(game.selected_cells, [(2, 3)])
+        self.assertAlmostEqual(game.game_clock.now - game.start_time, played)
+
+        game.game_over = True
+        asyncio.run(game.leave())
+        asyncio.run(game.enter())
+        self.assertFalse(game.game_over)
+        self.assertEqual(len(game.selected_cells), 0)
+
+    def test_results_panel_rendered_on_change(self):
+        """Test that the results panel slides in without re-rendering and re-renders only as the score counts"""
+        game = self.make_game()
+        game.game_over = True
+        game.fruits_collected = 80
+        game.calculate_stars()
+        game.animation_in_progress = True
+
+        with patch.object(game, "render_results_panel", wraps=game.render_results_panel) as render:
+            self.harness.run_until(game, lambda: game.counter_animation_active)
+            self.assertEqual(render.call_count, 1)
+            overlay = game.dim_overlay
+
+            frames = self.harness.run_until(game, lambda: not game.counter_animation_active)
+            self.harness.advance(game, frames=5)
+        self.assertLess(render.call_count, frames)
+        self.assertIs(game.dim_overlay, overlay)
+        self.assertEqual(game.results_panel_key, (80, game.stars_earned))
+
+    def test_best_score_loaded_on_enter(self):
+        """Test that the best score is read from the history by the first visit, not on construction"""
+        main.append_game_record({"timestamp": 1.0, "date": "2024-01-01 00:00:00",
+                                 "score": 80, "moves": 9, "time": 50.0, "stars": 3})
+        game = self.make_game()
+        self.assertEqual(game.best_score, 0)
+
+        asyncio.run(game.enter())
+        self.assertEqual((game.best_score, game.best_time), (80, 50.0))
+
+    def test_variant_recorded(self):
+        """Test that games of other variants are saved with their goal and kept apart from classic games"""
+        game = self.make_game(variant="large")
+        game.fruits_collected = 260
+        game.calculate_stars()
+        game.save_game_history()
+
+        [record] = main.load_game_history()
+        self.assertEqual((record["variant"], record["food_goal"], record["stars"]), ("large", 200, 2))
+        self.assertEqual(main.get_best_score("large")[0], 260)
+        self.assertEqual(main.get_best_score("classic"), (0, float("inf")))
+
+        main.SETTINGS["game_variant"] = "large"
+        records = self.harness.create_records()
+        asyncio.run(records.enter())
+        self.assertEqual((len(records.history), records.food_goal), (1, 200))
+        main.SETTINGS["game_variant"] = "classic"
+        asyncio.run(records.enter())
+        self.assertEqual(records.history, [])
+
+    def test_escape_leaves_game(self):
+        """Test that ESC ends the game loop"""
+        game = self.make_game()
+
+        self.harness.key(pygame.K_ESCAPE)
+
+        self.assertEqual(self.harness.advance(game, frames=10), 1)
+        self.assertFalse(game.running)
+
+
+class TestHeadlessScreens(HeadlessTestCase):
+    """Test the menu, records and settings screens with real frames"""
+
+    def test_menu_instructions(self):
+        """Test opening and closing the instructions panel"""
+        menu = self.harness.create_menu()
+
+        self.harness.click((menu.help_button.x, menu.help_button.y))
+        self.harness.step(menu)
+        self.assertTrue(menu.show_instructions)
+
+        self.harness.key(pygame.K_ESCAPE)
+        self.harness.step(menu)
+        self.assertFalse(menu.show_instructions)
+
+    def test_records_back_button(self):
+        """Test leaving the records screen with the back button"""
+        records = self.harness.create_records()
+        self.harness.advance(records, frames=3)
+
+        self.harness.click(records.back_button.rect.center)
+
+        self.assertEqual(self.harness.advance(records, frames=10), 1)
+
+    def test_records_reload_changed_history(self):
+        """Test that a kept records screen reloads the history only after it changed"""
+        records = self.harness.create_records()
+        self.assertEqual(records.history, [])
+
+        main.append_game_record({"timestamp": 1.0, "date": "2024-01-01 00:00:00",
+                                 "score": 80, "moves": 9, "time": 50.0, "stars": 3})
+        asyncio.run(records.enter())
+        self.assertEqual(len(records.history), 1)
+
+        with patch.object(main, "load_game_history") as load:
+            asyncio.run(records.enter())
+        load.assert_not_called()
+
+    def test_screens_count_draws(self):
+        """Test that the menu, records and settings screens report their draws to the overlay"""
+        for screen in (self.harness.create_menu(), self.harness.create_records(), self.harness.create_settings()):
+            self.harness.step(screen)
+            counters = main.METRICS.last_frame
+            self.assertGreater(counters.get("blits", 0), 3, type(screen).__name__)
+            self.assertGreater(counters.get("text_renders", 0), 0, type(screen).__name__)
+
+    def test_star_image_antialiased(self):
+        """Test that star sprites are drawn at their own size with soft edges"""
+        image = main.create_star_image(True, main.RECORDS_STAR_SIZE)
+        self.assertEqual(image.get_size(), (main.RECORDS_STAR_SIZE, main.RECORDS_STAR_SIZE))
+
+        center = main.RECORDS_STAR_SIZE // 2
+        self.assertEqual(tuple(image.get_at((center, center))), (*main.GOLD, 255))
+        alphas = {image.get_at((x, y)).a for x in range(image.get_width()) for y in range(image.get_height())}
+        self.assertTrue(any(0 < alpha < 255 for alpha in alphas))
+
+    def test_settings_saved_on_escape(self):
+        """Test that leaving settings writes the settings file"""
+        settings = self.harness.create_settings()
+
+        self.harness.key(pygame.K_ESCAPE)
+        self.harness.advance(settings, frames=10)
+
+        self.assertFalse(settings.running)
+        self.assertTrue(os.path.exists(main.SETTINGS_FILE))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from history_columns import HistoryColumns, save_history_columns, main_export
+
+
+class TestHistoryColumns(unittest.TestCase):
+    """Test the binary columnar history format"""
+    
+    def test_round_trip(self):
+        """Test writing history columns and reading them back memory-mapped"""
+        history = [
+            {"timestamp": 1714564800.5, "date": "", "score": 130, "moves": 10, "time": 83.25, "stars": 3},
+            {"timestamp": 1714568400.0, "date": "", "score": -20, "moves": 7, "time": 95, "stars": 0}
+        ]
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.bin")
+            save_history_columns(history, path)
+            
+            with HistoryColumns(path) as columns:
+                self.assertEqual(len(columns), 2)
+                self.assertEqual(list(columns.score), [130, -20])
+                self.assertEqual(list(columns.moves), [10, 7])
+                self.assertEqual(list(columns.time), [83.25, 95.0])
+                self.assertEqual(list(columns.stars), [3, 0])
+                self.assertEqual(max(columns.score), 130)
+                
+                records = list(columns.records())
+                self.assertEqual(records[0]["timestamp"], 1714564800.5)
+                self.assertEqual(records[1]["score"], -20)
+    
+    def test_failed_export(self):
+        """Test that a failed export raises, leaves no partial file and keeps the old export"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.bin")
+            save_history_columns([], path)
+            history = [{"timestamp": 1.0, "date": "", "score": 80, "moves": 9, "time": 50.0}]
+            
+            with self.assertRaises(KeyError):
+                save_history_columns(history, path)
+            self.assertEqual(os.listdir(directory), ["history.bin"])
+            with HistoryColumns(path) as columns:
+                self.assertEqual(len(columns), 0)
+            
+            history_path = os.path.join(directory, "history.json")
+            with open(history_path, "w") as file:
+                json.dump(history, file)
+            argv = ["history_columns.py", "--history", history_path, "--output", path]
+            with patch("sys.argv", argv), patch("builtins.print"):
+                self.assertEqual(main_export(), 1)
+    
+    def test_rejects_other_files(self):
+        """Test that files without the history header are rejected"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.bin")
+            with open(path, "wb") as file:
+                file.write(b"not a history file")
+            
+            with self.assertRaises(ValueError):
+                HistoryColumns(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,19 +2,25 @@ import unittest
 import os
 import sys
 import pygame
+import io
+import tempfile
 import json
+import threading
 from unittest.mock import patch, MagicMock, mock_open, PropertyMock
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 pygame.init = MagicMock()
 pygame.mixer = MagicMock()
+pygame.mixer.get_init.return_value = None  # No audio device: sounds are skipped, nothing is cached
 pygame.display = MagicMock()
 pygame.font = MagicMock()
 pygame.image = MagicMock()
 pygame.transform = MagicMock()
 pygame.Surface = MagicMock()
 pygame.draw = MagicMock()
+import pygame.gfxdraw  # Loaded first, so main's import keeps the mock below
+pygame.gfxdraw = MagicMock()
 pygame.key = MagicMock()
 pygame.Rect = MagicMock()
 pygame.MOUSEBUTTONDOWN = 1
@@ -82,9 +88,687 @@ class TestGameSettings(unittest.TestCase):
         self.assertEqual(saved_settings["reload_key"], "114")
         self.assertEqual(saved_settings["graphics_mode"], "fruits")
 
+class TestLegacyHistoryImport(unittest.TestCase):
+    """Test importing the legacy text history"""
+    
+    def test_parse_legacy_history(self):
+        """Test parsing legacy history lines into game records"""
+        lines = io.StringIO(
+            "Date: 2024-05-01 12:00:00, Score: 130, Moves: 10, Time: 1:23\n"
+            "garbage line\n"
+            "2024-05-02 08:30, Score: 40, Moves: 7, Time: 95.5\n"
+        )
+        
+        records = list(main.parse_legacy_history(lines, fallback_timestamp=0))
+        
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["score"], 130)
+        self.assertEqual(records[0]["moves"], 10)
+        self.assertEqual(records[0]["time"], 83.0)
+        self.assertEqual(records[0]["stars"], 3)
+        self.assertEqual(records[0]["date"], "2024-05-01 12:00:00")
+        self.assertEqual(records[1]["time"], 95.5)
+        self.assertEqual(records[1]["stars"], 0)
+    
+    @patch('os.path.getmtime', return_value=0)
+    @patch('builtins.open', new_callable=mock_open, read_data="Date: 2024-05-01 12:00:00, Score: 80, Moves: 10, Time: 2:00\n")
+    def test_import_legacy_history_once(self, mock_file, mock_getmtime):
+        """Test that the legacy history is imported only once"""
+        saved = []
+        
+        with patch.dict(main.SETTINGS, {"legacy_history_imported": False}), \
+             patch('main.load_game_history', return_value=[{"score": 5}]), \
+             patch('main.save_game_history', side_effect=lambda history: saved.extend(history) or True) as mock_save_history, \
+             patch('main.save_settings') as mock_save_settings:
+            self.assertEqual(main.import_legacy_history(), 1)
+            self.assertEqual(main.import_legacy_history(), 0)
+            self.assertTrue(main.SETTINGS["legacy_history_imported"])
+        
+        mock_file.assert_called_once_with(main.LEGACY_HISTORY_FILE, "r", errors="replace")
+        mock_save_history.assert_called_once()
+        self.assertEqual([game["score"] for game in saved], [5, 80])
+        mock_save_settings.assert_called_once()
+    
+    @patch('os.path.getmtime', return_value=0)
+    @patch('builtins.open', new_callable=mock_open, read_data="Date: 2024-05-01 12:00:00, Score: 80, Moves: 10, Time: 2:00\n")
+    def test_import_legacy_history_failed_save(self, mock_file, mock_getmtime):
+        """Test that a failed save leaves the import to be done again"""
+        with patch.dict(main.SETTINGS, {"legacy_history_imported": False}), \
+             patch('main.load_game_history', return_value=[]), \
+             patch('main.save_game_history', return_value=False), \
+             patch('main.save_settings') as mock_save_settings:
+            self.assertEqual(main.import_legacy_history(), 0)
+            self.assertFalse(main.SETTINGS["legacy_history_imported"])
+        
+        mock_save_settings.assert_not_called()
+
+class TestHistoryRetention(unittest.TestCase):
+    """Test compacting the game history"""
+    
+    def make_game(self, day, score, game_time=60):
+        return {"timestamp": 1714564800 + day * 86400, "date": "", "score": score,
+                "moves": 10, "time": game_time, "stars": main.stars_for_score(score)}
+    
+    def test_compact_history(self):
+        """Test that top-N, last-N and the fastest win survive compaction"""
+        history = [self.make_game(day, score) for day, score in enumerate([90, 10, 20, 30, 40, 50])]
+        history.append(self.make_game(6, 80, game_time=10))
+        history.append(self.make_game(7, 5))
+        
+        today = main.datetime.fromtimestamp(history[-1]["timestamp"]).date()
+        compacted, summaries = main.compact_history(history, [], keep_top=1, keep_recent=2, keep_days=365, today=today)
+        
+        self.assertEqual([game["score"] for game in compacted], [90, 80, 5])
+        self.assertEqual(len(summaries), 5)
+        self.assertEqual(sum(row["games"] for row in summaries), 5)
+        self.assertEqual(summaries[0]["best_score"], 10)
+        self.assertIsNone(summaries[0]["best_time"])
+    
+    def test_compact_history_merges_summaries(self):
+        """Test that summary rows are merged by date and limited to the kept days"""
+        history = [self.make_game(1, 90, game_time=40), self.make_game(2, 10), self.make_game(3, 5)]
+        date = main.datetime.fromtimestamp(history[1]["timestamp"]).strftime("%Y-%m-%d")
+        today = main.datetime.fromtimestamp(history[2]["timestamp"]).date()
+        existing = [{"date": "2024-01-01", "games": 1, "wins": 0, "total_score": 3,
+                     "best_score": 3, "best_time": None},
+                    {"date": date, "games": 2, "wins": 1, "total_score": 100,
+                     "best_score": 80, "best_time": 50}]
+        
+        compacted, summaries = main.compact_history(history, existing, keep_top=0, keep_recent=0,
+                                                    keep_days=365, today=today)
+        
+        # Only the fastest win stays as a raw record
+        self.assertEqual([game["score"] for game in compacted], [90])
+        self.assertEqual(len(summaries), 3)
+        self.assertEqual(summaries[1]["date"], date)
+        self.assertEqual(summaries[1]["games"], 3)
+        self.assertEqual(summaries[1]["total_score"], 110)
+        self.assertEqual(summaries[1]["best_time"], 50)
+        
+        # Days are calendar days back from today, however many have games
+        _, summaries = main.compact_history(history, existing, keep_top=0, keep_recent=0, keep_days=2, today=today)
+        self.assertEqual([row["date"] for row in summaries], [date, today.strftime("%Y-%m-%d")])
+        
+        later = today + main.timedelta(days=5)
+        _, summaries = main.compact_history(history, existing, keep_top=0, keep_recent=0, keep_days=2, today=later)
+        self.assertEqual(summaries, [])
+    
+    def test_compact_history_per_variant(self):
+        """Test that each variant keeps its own top games, fastest win and summary rows"""
+        history = [self.make_game(1, 90), self.make_game(1, 80, game_time=30), self.make_game(1, 60)]
+        for day, score in enumerate([150, 210, 250]):
+            game = self.make_game(day, score, game_time=40 - day)
+            game.update(variant="large", food_goal=200)
+            history.append(game)
+        
+        today = main.datetime.fromtimestamp(history[0]["timestamp"]).date()
+        compacted, summaries = main.compact_history(history, [], keep_top=1, keep_recent=0,
+                                                    keep_days=365, today=today)
+        
+        # Classic: the best game and the fastest win; large: the best game, also its fastest win
+        self.assertEqual(sorted(game["score"] for game in compacted), [80, 90, 250])
+        rows = {(row["date"], row["variant"]): row for row in summaries}
+        self.assertEqual(len(rows), 3)
+        large_row = rows[(today.strftime("%Y-%m-%d"), "large")]
+        self.assertEqual((large_row["games"], large_row["wins"], large_row["best_time"]), (1, 1, 39))
+        self.assertEqual(rows[(today.strftime("%Y-%m-%d"), "classic")]["wins"], 0)
+
+class TestStarRatings(unittest.TestCase):
+    """Test star ratings scaled to each variant's goal"""
+    
+    def test_classic_thresholds(self):
+        """Test the classic ratings and their score ranges"""
+        self.assertEqual([main.stars_for_score(score) for score in [74, 75, 95, 96, 125, 126]],
+                         [0, 1, 1, 2, 2, 3])
+        self.assertEqual(main.star_ranges_text(), "0★: 0-74 | 1★: 75-95 | 2★: 96-125 | 3★: 126+")
+    
+    def test_scaled_thresholds(self):
+        """Test that ratings and ranges follow a variant's goal"""
+        self.assertEqual(main.star_ranges_text(200), "0★: 0-199 | 1★: 200-255 | 2★: 256-335 | 3★: 336+")
+        self.assertEqual([main.stars_for_score(score, 360) for score in [359, 360, 460, 461, 604, 605]],
+                         [0, 1, 1, 2, 2, 3])
+
+class TestFrameProfiler(unittest.TestCase):
+    """Test the frame profiler"""
+    
+    def test_rolling_stats_percentile(self):
+        """Test percentiles over the rolling window"""
+        stats = main.RollingStats(size=100)
+        self.assertEqual(stats.percentile(50), 0.0)
+        
+        for value in range(1, 201):
+            stats.add(value)
+        
+        self.assertEqual(len(stats.samples), 100)
+        self.assertEqual(stats.percentile(0), 101)
+        self.assertEqual(stats.percentile(50), 151)
+        self.assertEqual(stats.percentile(99), 199)
+        
+        # The sorted window is reused until the next sample
+        ordered = stats.ordered
+        stats.percentile(10)
+        self.assertIs(stats.ordered, ordered)
+        stats.add(300)
+        self.assertEqual(stats.percentile(100), 300)
+    
+    def test_disabled_profiler_records_nothing(self):
+        """Test that a disabled profiler ignores marks"""
+        profiler = main.FrameProfiler(enabled=False)
+        profiler.begin_frame()
+        profiler.mark("events")
+        profiler.end_frame()
+        
+        self.assertEqual(profiler.phases, {})
+        self.assertEqual(len(profiler.trace), 0)
+    
+    def test_phases_and_trace(self):
+        """Test recording phases and dumping a trace file"""
+        profiler = main.FrameProfiler(enabled=True)
+        for _ in range(3):
+            profiler.begin_frame()
+            profiler.mark("events")
+            profiler.mark("grid")
+            profiler.end_frame()
+        
+        # Marks outside a frame are ignored
+        profiler.mark("hud")
+        
+        self.assertEqual(set(profiler.summary()), {"events", "grid", "frame"})
+        self.assertEqual(len(profiler.phases["grid"].samples), 3)
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            profiler.dump_trace(path)
+            with open(path) as file:
+                trace = json.load(file)
+        
+        self.assertEqual(len(trace["traceEvents"]), 9)
+        self.assertEqual(trace["traceEvents"][0]["name"], "events")
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+
+class TestPerfOverlay(unittest.TestCase):
+    """Test the metrics registry and the performance overlay"""
+    
+    def test_metrics_registry(self):
+        """Test per-frame counters, gauges and rolling samples"""
+        metrics = main.MetricsRegistry()
+        metrics.count("blits")
+        metrics.count("blits", 2)
+        metrics.set_gauge("history_records", 42)
+        metrics.observe("frame_ms", 16.0)
+        
+        self.assertEqual(metrics.counters, {"blits": 3})
+        
+        metrics.end_frame()
+        
+        self.assertEqual(metrics.last_frame, {"blits": 3})
+        self.assertEqual(metrics.counters, {})
+        self.assertEqual(metrics.gauges["history_records"], 42)
+        self.assertEqual(metrics.stats["frame_ms"].percentile(50), 16.0)
+    
+    def test_toggle_key(self):
+        """Test toggling the overlay with its key"""
+        overlay = main.PerfOverlay(main.MetricsRegistry())
+        event = MagicMock()
+        event.type = pygame.KEYDOWN
+        event.key = main.PERF_OVERLAY_KEY
+        
+        self.assertTrue(overlay.handle_event(event))
+        self.assertTrue(overlay.visible)
+        
+        self.assertTrue(overlay.handle_event(event))
+        self.assertFalse(overlay.visible)
+        
+        event.key = pygame.K_SPACE
+        self.assertFalse(overlay.handle_event(event))
+    
+    def test_hidden_overlay_ends_frame(self):
+        """Test that drawing a hidden overlay only closes the frame's counters"""
+        metrics = main.MetricsRegistry()
+        overlay = main.PerfOverlay(metrics)
+        screen = MagicMock()
+        metrics.count("text_renders")
+        
+        overlay.draw(screen)
+        
+        self.assertEqual(metrics.last_frame, {"text_renders": 1})
+        screen.blit.assert_not_called()
+
+    def test_text_refreshed_periodically(self):
+        """Test that the overlay renders its text again only after the refresh interval"""
+        overlay = main.PerfOverlay(main.MetricsRegistry())
+        overlay.font = MagicMock()
+        overlay.visible = True
+        screen = MagicMock()
+        
+        with patch('main.time.perf_counter', side_effect=[10.0, 10.1, 10.1 + main.PERF_OVERLAY_REFRESH]):
+            overlay.draw(screen)
+            renders = overlay.font.render.call_count
+            overlay.draw(screen)
+            self.assertEqual(overlay.font.render.call_count, renders)
+            overlay.draw(screen)
+            self.assertGreater(overlay.font.render.call_count, renders)
+
+class TestInputLayer(unittest.TestCase):
+    """Test reading and timing input events"""
+
+    def test_latency_counts_from_previous_frame(self):
+        """Test that latency is measured from the end of the frame before the event was read"""
+        times = iter([1.0, 1.010, 1.016])
+        metrics = main.MetricsRegistry()
+        layer = main.InputLayer(metrics, clock=lambda: next(times))
+        event = MagicMock()
+        event.type = pygame.KEYDOWN
+
+        layer.presented()  # Frame ends at 1.0
+        with patch('main.pygame.event.get', return_value=[event]):
+            events = layer.poll()  # Read at 1.010
+        layer.mark(events[0])
+        layer.presented()  # Shown at 1.016
+
+        self.assertEqual(events[0].arrival_time, 1.0)
+        self.assertAlmostEqual(metrics.stats["input_latency_ms"].percentile(50), 16.0)
+
+class TestStartupProfile(unittest.TestCase):
+    """Test startup step timing"""
+    
+    def test_module_steps_recorded(self):
+        """Test that importing main recorded its startup steps"""
+        steps = [name for name, start, duration in main.STARTUP_STEPS]
+        
+        for step in ["pygame.init", "mixer.init", "load_settings", "load_all_foods",
+                     "load_sound:tap_sound.mp3", "apply_sound_settings", "create_star_image"]:
+            self.assertIn(step, steps)
+    
+    def test_startup_step(self):
+        """Test timing a step, even when it fails"""
+        count = len(main.STARTUP_STEPS)
+        
+        with self.assertRaises(ValueError):
+            with main.startup_step("failing step"):
+                raise ValueError()
+        
+        name, start, duration = main.STARTUP_STEPS[count]
+        self.assertEqual(name, "failing step")
+        self.assertGreaterEqual(duration, 0)
+        del main.STARTUP_STEPS[count:]
+    
+    def test_finish_without_profile_file(self):
+        """Test that finishing is a no-op unless startup profiling is on"""
+        with patch('main.STARTUP_PROFILE_FILE', None), patch('sys.exit') as mock_exit:
+            main.finish_startup_profile()
+        
+        mock_exit.assert_not_called()
+
+class TestGameClock(unittest.TestCase):
+    """Test the monotonic, pausable game clock"""
+
+    def test_pause_resume_and_scale(self):
+        """Test that paused time and the first sample don't count"""
+        source = [100.0]
+        clock = main.GameClock(source=lambda: source[0], time_scale=2.0)
+
+        self.assertEqual(clock.sample(), 0.0)
+        source[0] = 100.5
+        self.assertEqual(clock.sample(), 1.0)
+
+        clock.pause()
+        source[0] = 130.0
+        self.assertEqual(clock.sample(), 0.0)
+        source[0] = 160.0
+        clock.resume()
+        source[0] = 160.25
+        self.assertEqual(clock.sample(), 0.5)
+        self.assertEqual(clock.now, 1.5)
+
+class TestFontRegistry(unittest.TestCase):
+    """Test the shared font registry"""
+
+    def test_font_matched_once_and_cached_by_size(self):
+        """Test that the font file is matched once and each size opened once"""
+        with patch.object(main.pygame.font, 'match_font', return_value="/fonts/arial.ttf") as match_font, \
+             patch.object(main.pygame.font, 'Font', side_effect=lambda path, size: (path, size)) as font:
+            fonts = main.FontRegistry()
+            fonts.preload((18, 24))
+            fonts.preload_thread.join()
+
+            self.assertEqual(fonts.get(24), ("/fonts/arial.ttf", 24))
+            self.assertEqual(fonts.get(36), ("/fonts/arial.ttf", 36))
+            self.assertIs(fonts.get(18), fonts.get(18))
+        match_font.assert_called_once_with("Arial")
+        self.assertEqual(font.call_count, 3)
+
+class TestSoundManager(unittest.TestCase):
+    """Test channel pools and rate limiting of sound effects"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.sounds = main.SoundManager(clock=lambda: self.now)
+        self.sounds.sounds = {name: MagicMock() for name in main.SOUND_EFFECTS}
+        self.sounds.pools = {category: [MagicMock(name=f"{category}{i}") for i in range(count)]
+                             for category, count in main.SOUND_CHANNELS.items()}
+        for pool in self.sounds.pools.values():
+            for channel in pool:
+                channel.get_busy.return_value = True
+
+    def test_full_pool_reuses_oldest_channel(self):
+        """Test that a category never uses more than its channels"""
+        pool = list(self.sounds.pools["hazard"])
+        played = [self.sounds.play("bone") for _ in range(len(pool) + 1)]
+
+        self.assertEqual(played, pool + [pool[0]])
+        pool[1].get_busy.return_value = False
+        self.assertIs(self.sounds.play("mouse"), pool[1])
+
+    def test_tap_rate_limited(self):
+        """Test that taps closer than the minimum interval are dropped"""
+        self.assertIsNotNone(self.sounds.play("tap"))
+        self.now += main.SOUND_MIN_INTERVAL["tap"] / 2
+        self.assertIsNone(self.sounds.play("tap"))
+        self.now += main.SOUND_MIN_INTERVAL["tap"]
+        self.assertIsNotNone(self.sounds.play("tap"))
+
+    def test_missing_music_reported_once(self):
+        """Test that a background music file that fails to load isn't retried"""
+        with patch.object(main.pygame.mixer.music, 'get_busy', return_value=False), \
+             patch.object(main.pygame.mixer.music, 'load', side_effect=main.pygame.error("missing")) as load:
+            self.sounds.play_music()
+            self.sounds.play_music()
+        load.assert_called_once()
+
+class TestSoundCache(unittest.TestCase):
+    """Test caching decoded sound effects on disk"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache_dir = os.path.join(self.directory.name, "cache")
+        self.source = os.path.join(self.directory.name, "tap.mp3")
+        with open(self.source, "wb") as file:
+            file.write(b"mp3 data")
+        self.sounds = main.SoundManager(cache_dir=self.cache_dir)
+
+        self.mixer_format = (44100, -16, 2)
+        self.decoded = MagicMock()
+        self.decoded.get_raw.return_value = b"pcm"
+        patcher = patch.object(main.pygame.mixer, 'get_init', side_effect=lambda: self.mixer_format)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(main.pygame.mixer, 'Sound', side_effect=self.make_sound)
+        self.sound_class = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_sound(self, path=None, buffer=None):
+        return self.decoded if buffer is None else ("cached", buffer)
+
+    def test_miss_then_hit(self):
+        """Test that a sound is decoded once and read back from the cache afterwards"""
+        self.assertIs(self.sounds.load_cached(self.source), self.decoded)
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(self.sounds.cache_path(self.source))])
+
+        self.assertEqual(self.sounds.load_cached(self.source), ("cached", b"pcm"))
+        self.assertEqual(self.sound_class.call_count, 2)
+        self.sound_class.assert_called_with(buffer=b"pcm")
+
+    def test_changed_source_replaces_old_version(self):
+        """Test that a changed sound file is decoded again and its old cache removed"""
+        self.sounds.load_cached(self.source)
+        old_path = self.sounds.cache_path(self.source)
+        with open(self.source, "wb") as file:
+            file.write(b"new mp3 data")
+
+        self.assertIs(self.sounds.load_cached(self.source), self.decoded)
+        self.assertNotEqual(self.sounds.cache_path(self.source), old_path)
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(self.sounds.cache_path(self.source))])
+
+    def test_mixer_format_change_misses(self):
+        """Test that PCM cached for another mixer format isn't used"""
+        self.sounds.load_cached(self.source)
+        self.mixer_format = (22050, -16, 1)
+
+        self.assertIs(self.sounds.load_cached(self.source), self.decoded)
+        cached = os.listdir(self.cache_dir)
+        self.assertEqual(len(cached), 1)
+        self.assertTrue(cached[0].endswith("-22050--16-1.pcm"))
+
+class TestSceneManager(unittest.TestCase):
+    """Test running screens as coroutine scenes"""
+
+    class Scene:
+        def __init__(self, name, log, frames, child=None):
+            self.name = name
+            self.log = log
+            self.frames = frames
+            self.child = child
+            self.next_scene = None
+
+        async def enter(self):
+            self.log.append(("enter", self.name))
+
+        def step(self):
+            self.log.append(("step", self.name))
+            self.frames -= 1
+            if self.child:
+                self.next_scene, self.child = self.child, None
+            elif self.frames <= 0:
+                self.running = False
+
+        async def leave(self):
+            self.log.append(("leave", self.name))
+
+    def test_child_scene_returns_to_parent(self):
+        """Test that a scene opened with next_scene runs until it exits, then the parent resumes"""
+        log = []
+        records = self.Scene("records", log, frames=2)
+        menu = self.Scene("menu", log, frames=2, child=records)
+
+        main.SceneManager(frame_rate=1000).run(menu)
+
+        self.assertEqual(log, [("enter", "menu"), ("step", "menu"),
+                               ("enter", "records"), ("step", "records"), ("step", "records"), ("leave", "records"),
+                               ("step", "menu"), ("leave", "menu")])
+
+    def test_named_scenes_built_once(self):
+        """Test that named scenes are kept between visits and rebuilt once expired"""
+        log = []
+        built = []
+
+        def build_records():
+            built.append(self.Scene("records", log, frames=1))
+            return built[-1]
+
+        scenes = main.SceneManager({"records": build_records}, frame_rate=1000)
+        scenes.run(self.Scene("menu", log, frames=1, child="records"))
+        scenes.run(self.Scene("menu", log, frames=1, child="records"))
+        self.assertEqual(len(built), 1)
+        self.assertEqual(log.count(("enter", "records")), 2)
+
+        built[0].expired = True
+        scenes.run(self.Scene("menu", log, frames=1, child="records"))
+        self.assertEqual(len(built), 2)
+
+    def test_quit_leaves_every_scene(self):
+        """Test that quitting from a child scene ends the loop through each scene's leave()"""
+        log = []
+        settings = self.Scene("settings", log, frames=5)
+        settings.quit_requested = True
+        menu = self.Scene("menu", log, frames=5, child=settings)
+
+        main.SceneManager(frame_rate=1000).run(menu)
+
+        self.assertEqual(log, [("enter", "menu"), ("step", "menu"),
+                               ("enter", "settings"), ("step", "settings"), ("leave", "settings"),
+                               ("leave", "menu")])
+
+    def test_io_runs_off_the_loop(self):
+        """Test that run_io uses the I/O thread inside the loop and runs inline outside it"""
+        async def scene():
+            return await main.run_io(threading.current_thread)
+
+        self.assertIsNot(main.asyncio.run(scene()), threading.current_thread())
+        self.assertIs(main.run_io(threading.current_thread), threading.current_thread())
+
+class TestStarImages(unittest.TestCase):
+    """Test the star sprite cache"""
+
+    def test_star_drawn_once_per_size(self):
+        """Test that each size and fill of star is drawn once"""
+        with patch.object(main, 'STAR_IMAGES', {}), \
+             patch.object(main, 'create_star_image', side_effect=lambda filled, size: (filled, size)) as create:
+            self.assertEqual(main.get_star_image(20), (True, 20))
+            self.assertEqual(main.get_star_image(20, filled=False), (False, 20))
+            main.get_star_image(20)
+            main.get_star_image(50)
+        self.assertEqual(create.call_count, 3)
+
+class TestGridLine(unittest.TestCase):
+    """Test the Bresenham walk used to fill in dragged paths"""
+
+    def test_lines_are_chains_of_neighbours(self):
+        """Test that every line ends at its target through neighbouring cells"""
+        self.assertEqual(list(main.grid_line((3, 3), (0, 3))), [(2, 3), (1, 3), (0, 3)])
+        self.assertEqual(list(main.grid_line((3, 3), (6, 0))), [(4, 2), (5, 1), (6, 0)])
+        self.assertEqual(list(main.grid_line((3, 3), (3, 3))), [])
+
+        for end in [(0, 1), (6, 5), (2, 6), (5, 0), (1, 4)]:
+            cells = [(3, 3)] + list(main.grid_line((3, 3), end))
+            self.assertEqual(cells[-1], end)
+            self.assertEqual(len(cells) - 1, max(abs(end[0] - 3), abs(end[1] - 3)))
+            for (row, col), (next_row, next_col) in zip(cells, cells[1:]):
+                self.assertLessEqual(max(abs(next_row - row), abs(next_col - col)), 1)
+
+class TestFreeCellIndex(unittest.TestCase):
+    """Test the free cell index used to place mice and bones"""
+
+    def test_add_remove_and_sample(self):
+        """Test that swap-remove keeps the index consistent"""
+        index = main.FreeCellIndex([(0, 0), (0, 1), (0, 2), (0, 3)])
+
+        index.remove((0, 1))
+        index.remove((0, 1))
+        index.add((0, 3))
+
+        self.assertEqual(len(index), 3)
+        self.assertNotIn((0, 1), index)
+        for cell, position in index.positions.items():
+            self.assertEqual(index.cells[position], cell)
+
+        sampled = {index.sample() for _ in range(100)}
+        self.assertEqual(sampled, {(0, 0), (0, 2), (0, 3)})
+
+        for cell in [(0, 0), (0, 2), (0, 3)]:
+            index.remove(cell)
+        self.assertIsNone(index.sample())
+
+class TestChainSelection(unittest.TestCase):
+    """Test the incremental chain selection tallies"""
+
+    def test_tallies_follow_append_and_truncate(self):
+        """Test that the chain result is kept up to date"""
+        mice = [(0, 2)]
+        bones = [(0, 3)]
+        chain = main.ChainSelection([(0, 0)], mice, bones)
+        self.assertEqual(chain.result, 0)
+
+        chain.append((0, 1))
+        chain.append((0, 2))
+        self.assertEqual(chain.result, 6)
+        chain.append((0, 3))
+        self.assertEqual(chain.result, -4)
+
+        chain.truncate(2)
+        self.assertEqual(chain, [(0, 0), (0, 1)])
+        self.assertNotIn((0, 2), chain)
+        self.assertEqual(chain.result, 2)
+
+        # A mouse spawning on a selected cell needs a recount
+        mice.append((0, 1))
+        chain.recount(mice, bones)
+        self.assertEqual(chain.result, 5)
+
+        chain.clear()
+        self.assertEqual(len(chain), 0)
+        self.assertEqual(chain.result, 0)
+
+class TestBoardGenerator(unittest.TestCase):
+    """Test the board quality check used when boards are generated"""
+
+    def test_chain_potential(self):
+        """Test measuring the best food group next to the kitty"""
+        cells = ["ball"] * 9
+        cells[4] = None
+        self.assertEqual(main.chain_potential(cells, 3, (1, 1)), 8)
+
+        # The milk group wraps around the kitty diagonally
+        cells = ["ball", "ball", "milk",
+                 "milk", None, "milk",
+                 "milk", "milk", "can"]
+        self.assertEqual(main.chain_potential(cells, 3, (1, 1)), 5)
+        self.assertGreater(main.chain_potential(cells, 3, (1, 1), limit=3), 3)
+
+    def test_generated_boards_in_range(self):
+        """Test that generated boards meet the variant's chain range wherever the kitty is"""
+        # Unseeded: each board misses the range with odds below BOARD_QUALITY_FAILURE_ODDS
+        for variant in main.GAME_VARIANTS:
+            rules = main.get_game_rules(variant)
+            size = rules["grid_size"]
+            low, high = rules["chain_range"]
+            foods = ["food%d" % i for i in range(rules["food_items"])]
+            for kitty_pos in [(size // 2, size // 2), (1, 1), (0, 1), (0, size // 2), (0, 0), (size - 1, 0)]:
+                for _ in range(5):
+                    board = main.generate_board(foods, rules, kitty_pos)
+                    cells = [food for row in board for food in row]
+
+                    self.assertEqual(len(board), size)
+                    self.assertIsNone(board[kitty_pos[0]][kitty_pos[1]])
+                    self.assertTrue(low <= main.chain_potential(cells, size, kitty_pos) <= high)
+
+    def test_kitty_placement(self):
+        """Test classifying the kitty's position for the acceptance rates"""
+        self.assertEqual(main.kitty_placement((0, 6), 7), "corner")
+        self.assertEqual(main.kitty_placement((3, 0), 7), "edge")
+        self.assertEqual(main.kitty_placement((1, 1), 7), "interior")
+
+class TestOpeningLibrary(unittest.TestCase):
+    """Test the binary library of opening boards"""
+
+    def test_round_trip(self):
+        """Test saving a library and looking boards up by seed"""
+        easy = [(20, [index % 3 for index in range(49)]), (19, [2] * 49)]
+        hard = [(9, [1] * 48 + [3])]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "openings.bin")
+            main.save_opening_library([("easy", 18, 48, easy), ("hard", 8, 12, hard)], 7, path)
+            library = main.OpeningLibrary(path)
+
+        self.assertEqual(library.grid_size, 7)
+        self.assertEqual(library.tiers["easy"][:3], (18, 48, 2))
+        self.assertEqual(library.board("easy", 0), easy[0])
+        self.assertEqual(library.board("easy", 3), easy[1])
+        self.assertEqual(library.board("hard", 12345), hard[0])
+
+    def test_shipped_library(self):
+        """Test that the shipped boards sit in their tiers"""
+        library = main.OpeningLibrary()
+        for name, min_chain, max_chain in main.OPENING_TIERS:
+            for index in range(0, library.tiers[name][2], 97):
+                best_chain, codes = library.board(name, index)
+                cells = [None if code == main.OPENING_EMPTY_CODE else code for code in codes]
+
+                self.assertTrue(min_chain <= best_chain <= max_chain)
+                self.assertIsNone(cells[24])
+                self.assertGreaterEqual(main.chain_potential(cells, 7, (3, 3)), best_chain)
+
 class TestGameInstructions(unittest.TestCase):
     """Test game instructions generation"""
     
+    def test_get_instructions_follow_rules(self):
+        """Test that the goal and move limit come from the variant's rules"""
+        instructions = main.get_instructions(rules=main.get_game_rules("large"))
+        
+        self.assertIn("4. Collect 200 points to win.", instructions)
+        self.assertIn("5. You have only 20 moves.", instructions)
+    
     def test_get_instructions_food_mode(self):
         """Test instructions in food mode"""
         instructions = main.get_instructions(is_fruits_mode=False)